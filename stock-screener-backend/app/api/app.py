@@ -16,6 +16,12 @@ def create_app():
     # Register routes
     from app.api.routes import register_routes
     register_routes(app)
+
+    # warm the caches in the background, /api/v1/ready reports the progress
+    from app.data.warmup import warmer, warmup_enabled
+    if warmup_enabled():
+        from app.api.routes import screener
+        warmer.start(screener.preload)
     
     return app
 
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
-from app.screener import StockScreener, screen_stocks, screen_by_technical, create_combined_screen
-from app.data import get_stock_symbols
+from app.screener import StockScreener, screen_stocks, screen_by_technical, create_combined_screen, cached_screen, screen_projection
+from app.data import get_stock_symbols, get_symbol_indexes, UnknownIndexError
 from app.cli import parse_criteria
 import logging
 from app.data.db_utils import load_from_database
@@ -41,9 +41,15 @@ def screen_fundamental():
         if not criteria:
             return jsonify({'error': 'Fundamental criteria required'}), 400
         
-        symbols = get_stock_symbols(index=index)
-        screener.load_data(symbols=symbols, reload=reload, period=period, interval=interval)
-        results = screen_stocks(screener.stock_data, criteria, limit=limit)
+        def run_screen():
+            symbols = get_stock_symbols(index=index)
+            projection = screen_projection([{'fundamental_criteria': criteria}])
+            screener.load_data(symbols=symbols, reload=reload, period=period, interval=interval, projection=projection)
+            return screen_stocks(screener.stock_data, criteria)
+
+        results = cached_screen('fundamental', criteria, index, period, interval, run_screen, reload=reload)
+        if limit:
+            results = results[:limit]
         
         return jsonify({
             'count': len(results),
@@ -52,6 +58,8 @@ def screen_fundamental():
             'stocks': results
         })
     
+    except UnknownIndexError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error in fundamental screening: {e}")
         return jsonify({'error': str(e)}), 500
@@ -76,9 +84,13 @@ def screen_technical():
             return jsonify({'error': 'Technical criteria required'}), 400
         
       
-        symbols = get_stock_symbols(index=index)
-        screener.load_data(symbols=symbols, reload=reload, period=period, interval=interval)
-        results = screen_by_technical(screener.stock_data, screener.indicators, criteria)
+        def run_screen():
+            symbols = get_stock_symbols(index=index)
+            projection = screen_projection([{'technical_criteria': criteria}])
+            screener.load_data(symbols=symbols, reload=reload, period=period, interval=interval, projection=projection)
+            return screen_by_technical(screener.stock_data, screener.indicators, criteria)
+
+        results = cached_screen('technical', criteria, index, period, interval, run_screen, reload=reload)
         
         # Apply limit
         if limit and results:
@@ -90,6 +102,8 @@ def screen_technical():
             'index': index,
             'stocks': results
         })
+    except UnknownIndexError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error in technical screening: {e}")
         return jsonify({'error': str(e)}), 500
@@ -115,10 +129,21 @@ def screen_combined():
             return jsonify({'error': 'Both fundamental and technical criteria required'}), 400
         
 
-        symbols = get_stock_symbols(index=index)
-        screener.load_data(symbols=symbols, reload=reload, period=period, interval=interval)
-        
-        results = create_combined_screen(screener, fundamental_criteria, technical_criteria, limit=limit)
+        def run_screen():
+            symbols = get_stock_symbols(index=index)
+            if reload:
+                screener.load_data(symbols=symbols, reload=True, period=period, interval=interval)
+            else:
+                # history is loaded lazily for the fundamental survivors only
+                screener.load_info(symbols=symbols, period=period, interval=interval,
+                                   projection=screen_projection([{'fundamental_criteria': fundamental_criteria}]))
+            return create_combined_screen(screener, fundamental_criteria, technical_criteria, limit=None,
+                                          period=period, interval=interval)
+
+        combined_criteria = {'fundamental': fundamental_criteria, 'technical': technical_criteria}
+        results = cached_screen('combined', combined_criteria, index, period, interval, run_screen, reload=reload)
+        if limit:
+            results = results[:limit]
         
         return jsonify({
             'count': len(results),
@@ -127,10 +152,64 @@ def screen_combined():
             'index': index,
             'stocks': results
         })
+    except UnknownIndexError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error in combined screening: {e}")
         return jsonify({'error': str(e)}), 500
 
+# several screens against the same index, the universe is loaded once
+@api_bp.route('/screen/batch', methods=['POST'])
+def screen_batch():
+    try:
+        data = request.get_json() or {}
+        
+        index = data.get('index', 'sp500')
+        reload = data.get('reload', False)
+        period = data.get('period', '1y')
+        interval = data.get('interval', '1d')
+        screen_specs = data.get('screens') or []
+        
+        if not isinstance(screen_specs, list) or not screen_specs:
+            return jsonify({'error': 'At least one screen required'}), 400
+        
+        screens = []
+        for i, spec in enumerate(screen_specs):
+            if not isinstance(spec, dict):
+                return jsonify({'error': f'Screen {i} must be an object', 'screen': i}), 400
+            fundamental_str = spec.get('fundamental_criteria') or ''
+            technical_str = spec.get('technical_criteria') or ''
+            if not isinstance(fundamental_str, str) or not isinstance(technical_str, str):
+                return jsonify({'error': f'Screen {i}: criteria must be strings', 'screen': i}), 400
+            fundamental_criteria = parse_criteria(fundamental_str)
+            technical_criteria = parse_criteria(technical_str)
+            if not fundamental_criteria and not technical_criteria:
+                return jsonify({'error': f'Screen {i} needs fundamental or technical criteria', 'screen': i}), 400
+            screens.append({
+                'fundamental_criteria': fundamental_criteria,
+                'technical_criteria': technical_criteria,
+                'limit': spec.get('limit', 50),
+            })
+        
+        symbols = get_stock_symbols(index=index)
+        results = screener.screen_many(screens, symbols=symbols, reload=reload, period=period, interval=interval)
+        
+        return jsonify({
+            'count': len(results),
+            'index': index,
+            'results': [{
+                'count': len(stocks),
+                'fundamental_criteria': screen['fundamental_criteria'],
+                'technical_criteria': screen['technical_criteria'],
+                'stocks': stocks
+            } for screen, stocks in zip(screens, results)]
+        })
+    except UnknownIndexError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in batch screening: {e}")
+        return jsonify({'error': str(e)}), 500
+
 # ===== SUPPORTING ROUTES =====
 
 @api_bp.route('/indexes', methods=['GET'])
@@ -151,10 +230,43 @@ def get_symbols(index):
             'symbols': symbols,
             'count': len(symbols)
         })
+    except UnknownIndexError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting symbols for {index}: {e}")
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/symbols/<symbol>/indexes', methods=['GET'])
+def get_indexes_for_symbol(symbol):
+    """Get the indexes a symbol belongs to"""
+    indexes = get_symbol_indexes(symbol)
+    return jsonify({
+        'symbol': symbol.upper(),
+        'indexes': indexes,
+        'count': len(indexes)
+    })
+
+@api_bp.route('/cache/refresh-stats', methods=['GET'])
+def get_refresh_stats():
+    """Get background cache refresh queue statistics"""
+    from app.data.yfinance_fetcher import refresh_service, singleflight
+    from app.data.constituents import constituents
+    from app.data.local_cache import local_cache
+    from app.data.price_cube import price_cube
+    stats = refresh_service.stats()
+    stats['singleflight'] = singleflight.stats()
+    stats['constituents'] = constituents.stats()
+    stats['local_cache'] = local_cache.stats()
+    stats['price_cube'] = price_cube.stats()
+    return jsonify(stats)
+
+@api_bp.route('/ready', methods=['GET'])
+def get_readiness():
+    """Readiness for load balancers: 503 while the startup warm-up is running"""
+    from app.data.warmup import warmer
+    progress = warmer.progress()
+    return jsonify(progress), (200 if progress['ready'] else 503)
+
 @api_bp.route('/indicators', methods=['GET'])
 def get_available_indicators():
     """Get list of available technical indicators and fundamental fields"""
@@ -184,9 +296,14 @@ def api_docs():
             'POST /api/v1/screen/fundamental': 'Screen stocks by fundamental criteria',
             'POST /api/v1/screen/technical': 'Screen stocks by technical criteria', 
             'POST /api/v1/screen/combined': 'Screen stocks by both criteria',
+            'POST /api/v1/screen/batch': 'Run several screens against one index in a single pass',
             'GET /api/v1/indexes': 'Get available stock indexes',
             'GET /api/v1/symbols/<index>': 'Get stock symbols for an index',
+            'GET /api/v1/symbols/<symbol>/indexes': 'Get the indexes a symbol belongs to',
             'GET /api/v1/indicators': 'Get available indicators and fields',
+            'GET /api/v1/cache/refresh-stats': 'Get background refresh queue depth and drop counts',
+            'GET /api/v1/ready': 'Readiness, 503 while the startup cache warm-up is running',
+            'GET /api/watchlists/<id>/changes': 'Live matches of a watchlist and what price updates changed',
             'GET /api/v1/stock/<symbol>': 'Get detailed stock information',
             'POST /api/v1/chatbot/advice': 'Get advice from the AI chatbot',
             'GET /api/v1/chatbot/health': 'Check chatbot availability',
@@ -224,6 +341,18 @@ def api_docs():
                     'limit': 10
                 }
             },
+            'batch_screening': {
+                'url': '/api/v1/screen/batch',
+                'method': 'POST',
+                'body': {
+                    'index': 'sp500',
+                    'screens': [
+                        {'fundamental_criteria': 'sector=Technology', 'limit': 10},
+                        {'technical_criteria': 'rsi<30'},
+                        {'fundamental_criteria': 'pe_ratio<20', 'technical_criteria': 'ma>100'}
+                    ]
+                }
+            },
             'chatbot_advice': {
                 'url': '/api/v1/chatbot/advice',
                 'method': 'POST',
@@ -260,19 +389,8 @@ def get_stock_detail(symbol):
         live_price = get_price(symbol)
         data['live_price'] = live_price
 
-        # Convert historical data from JSON string to records format for charts
-        if 'historical_json' in data:
-            try:
-                import pandas as pd
-                hist_df = pd.read_json(data['historical_json'], orient="split")
-                # Convert to the format expected by frontend charts
-                data['historical'] = hist_df.reset_index().to_dict(orient='records')
-                logger.info(f"Successfully converted historical data for {symbol}, {len(data['historical'])} records")
-            except Exception as e:
-                logger.error(f"Error converting historical data for {symbol}: {e}")
-                data['historical'] = []
-        elif 'historical' in data and hasattr(data['historical'], 'to_dict'):
-            # Fallback for old format
+        # records format for the frontend charts, the only place the history becomes JSON
+        if hasattr(data.get('historical'), 'to_dict'):
             data['historical'] = data['historical'].reset_index().to_dict(orient='records')
 
         return jsonify(data)
@@ -297,23 +415,11 @@ def get_stock_indicators(symbol):
         logger.info(f"Loaded data for {symbol}, keys: {list(data.keys())}")
         
         # Get historical data
-        hist_raw = data.get('historical_json')  
-        if not hist_raw:
+        hist = data.get('historical')
+        if not isinstance(hist, pd.DataFrame):
             logger.error(f"No historical data found for {symbol}. Available keys: {list(data.keys())}")
             return jsonify({'error': 'No historical data available'}), 400
         
-        # Convert to DataFrame if it's a string
-        if isinstance(hist_raw, str):
-            try:
-                hist = pd.read_json(hist_raw, orient="split")
-                logger.info(f"Successfully converted JSON to DataFrame for {symbol}, shape: {hist.shape}")
-            except Exception as e:
-                logger.error(f"Error converting JSON to DataFrame for {symbol}: {e}")
-                return jsonify({'error': 'Invalid historical data format'}), 400
-        else:
-            hist = hist_raw
-            logger.info(f"Historical data already DataFrame for {symbol}, shape: {hist.shape}")
-        
         if hist.empty or len(hist) < 20:
             return jsonify({'error': 'Insufficient historical data (need at least 20 data points)'}), 400
         
@@ -485,4 +591,6 @@ def chatbot_health_check():
 def register_routes(app):
     app.register_blueprint(api_bp)
     from app.api.news_routes import news_bp
-    app.register_blueprint(news_bp)
\ No newline at end of file
+    app.register_blueprint(news_bp)
+    from app.api.watchlist_routes import watchlist_bp
+    app.register_blueprint(watchlist_bp)
\ No newline at end of file
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from app.database import SessionLocal
 from app.database.models import User, Watchlist, WatchlistMatch, Stock
+from app.services.watchlist_monitor import standing_watchlists, criteria_to_dict
+from app.screener import StockScreener, screen_projection
+from app.data import get_stock_symbols, UnknownIndexError
 import json
 import logging
 
@@ -139,6 +142,7 @@ def delete_watchlist(watchlist_id):
         
         db.delete(watchlist)
         db.commit()
+        standing_watchlists.forget(watchlist_id)
         
         return '', 204
         
@@ -171,6 +175,45 @@ def get_watchlist_matches(watchlist_id):
     finally:
         db.close()
 
+@watchlist_bp.route('/<int:watchlist_id>/changes', methods=['GET'])
+def get_watchlist_changes(watchlist_id):
+    """Live matches of a watchlist's fundamental criteria and the symbols price updates moved in or out"""
+    try:
+        db = SessionLocal()
+        watchlist = db.get(Watchlist, watchlist_id)
+
+        if not watchlist:
+            return jsonify({'error': 'Watchlist not found'}), 404
+
+        stored = json.loads(watchlist.criteria or '{}')
+        criteria = criteria_to_dict(stored.get('fundamental_criteria', []))
+        index = stored.get('index', 'sp500')
+
+        # a screener of its own, the shared one in routes serves other requests
+        def load():
+            symbols = get_stock_symbols(index=index)
+            projection = screen_projection([{'fundamental_criteria': criteria}])
+            return StockScreener().load_data(symbols=symbols, period='1y', interval='1d', projection=projection)
+
+        standing_watchlists.watch(watchlist_id, criteria, index, load)
+        snapshot = standing_watchlists.snapshot(watchlist_id, limit=request.args.get('limit', type=int))
+        return jsonify({
+            'watchlist_id': watchlist_id,
+            'criteria': criteria,
+            'index': index,
+            'count': len(snapshot['matches']),
+            'stocks': snapshot['matches'],
+            'changes': snapshot['changes']
+        })
+
+    except UnknownIndexError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting watchlist changes: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+    finally:
+        db.close()
+
 @watchlist_bp.route('/<int:watchlist_id>/matches/<int:match_id>', methods=['DELETE'])
 def delete_match(watchlist_id, match_id):
     """Delete a specific match"""
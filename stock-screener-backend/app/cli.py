@@ -6,7 +6,7 @@ import csv
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
-from app.screener import StockScreener
+from app.screener import StockScreener, screen_projection
 from app.data import get_stock_symbols
 
 # level is set to info! 
@@ -225,17 +225,23 @@ Examples:
         logger.info(f"Found {len(symbols)} symbols")
         
       
-        logger.info(f"Loading data for {len(symbols)} symbols (reload={args.reload})")
-        screener.load_data(
-            symbols=symbols, 
-            reload=args.reload,
-            period=args.period,
-            interval=args.interval
-        )
-        
-      
         fundamental_criteria = parse_criteria(args.fundamental)
         technical_criteria = parse_criteria(args.technical)
+
+        if fundamental_criteria and technical_criteria and not args.reload:
+            # combined screens only need history for the fundamental survivors
+            logger.info(f"Loading info for {len(symbols)} symbols")
+            screener.load_info(symbols=symbols, period=args.period, interval=args.interval,
+                               projection=screen_projection([{'fundamental_criteria': fundamental_criteria}]))
+        else:
+            logger.info(f"Loading data for {len(symbols)} symbols (reload={args.reload})")
+            screener.load_data(
+                symbols=symbols, 
+                reload=args.reload,
+                period=args.period,
+                interval=args.interval,
+                projection=screen_projection([{'fundamental_criteria': fundamental_criteria, 'technical_criteria': technical_criteria}])
+            )
         
        
         # Initialize results
@@ -250,7 +256,9 @@ Examples:
             results = screener.create_combined_screen(
                 fundamental_criteria, 
                 technical_criteria, 
-                limit=args.limit
+                limit=args.limit,
+                period=args.period,
+                interval=args.interval
             )
             
         elif technical_criteria:
@@ -1,5 +1,5 @@
 
 from .symbols import get_stock_symbols
-from .yfinance_fetcher import fetch_yfinance_data
-from .db_utils import load_from_database, save_to_database
-from .symbols import get_stock_symbols  
+from .yfinance_fetcher import fetch_yfinance_data, normalize_symbols
+from .db_utils import load_from_database, load_many_from_database, load_info_from_database, save_to_database, save_many_to_database, get_latest_dates, DatabaseWriteError
+from .symbols import get_stock_symbols, get_symbol_indexes, UnknownIndexError
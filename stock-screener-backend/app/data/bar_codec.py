@@ -0,0 +1,207 @@
+import os
+import struct
+import zlib
+import logging
+import numpy as np
+import pandas as pd
+
+# optional, faster than zlib when installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+logger = logging.getLogger(__name__)
+
+# Binary layout of one bar frame, all little-endian:
+#   header   magic "SSB1", version u8, codec u8, column count u16, row count u32
+#   names    timezone, index name, then per column: dtype u8 + name
+#            (each name is a u8 length followed by utf-8 bytes)
+#   payload  index as int64 ns (UTC when tz-aware), then every column as
+#            float64 or int64 back to back, compressed as one block by `codec`
+MAGIC = b"SSB1"
+VERSION = 1
+_HEADER = struct.Struct("<4sBBHI")
+
+CODEC_IDS = {'none': 0, 'zlib': 1, 'zstd': 2, 'lz4': 3}
+CODEC_NAMES = {value: name for name, value in CODEC_IDS.items()}
+
+_DTYPES = {0: np.dtype("<f8"), 1: np.dtype("<i8")}
+
+# A single column on its own (see split_bars):
+#   header   magic "SSC1", codec u8, dtype u8, row count u32
+#   payload  the values as float64 or int64, compressed by `codec`
+COLUMN_MAGIC = b"SSC1"
+_COLUMN_HEADER = struct.Struct("<4sBBI")
+
+
+def available_codecs():
+    codecs = ['none', 'zlib']
+    if zstandard is not None:
+        codecs.append('zstd')
+    if lz4_frame is not None:
+        codecs.append('lz4')
+    return codecs
+
+
+def _default_codec():
+    wanted = os.getenv('BAR_CODEC')
+    if wanted:
+        if wanted in available_codecs():
+            return wanted
+        logger.warning(f"BAR_CODEC={wanted} is not available, using the best installed codec")
+    for name in ('zstd', 'lz4', 'zlib'):
+        if name in available_codecs():
+            return name
+
+BAR_CODEC = _default_codec()
+ZLIB_LEVEL = int(os.getenv('BAR_ZLIB_LEVEL', 1))
+ZSTD_LEVEL = int(os.getenv('BAR_ZSTD_LEVEL', 3))
+
+
+def _compress(codec, data):
+    if codec == 'zlib':
+        return zlib.compress(data, ZLIB_LEVEL)
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if codec == 'lz4':
+        return lz4_frame.compress(data)
+    return data
+
+
+def _decompress(codec, data):
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == 'lz4':
+        return lz4_frame.decompress(data)
+    return data
+
+
+def _name(value):
+    raw = ("" if value is None else str(value)).encode("utf-8")
+    if len(raw) > 255:
+        raise ValueError(f"Name too long for the bar codec: {value!r}")
+    return bytes([len(raw)]) + raw
+
+
+def is_encoded_bars(value):
+    return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[:4]) == MAGIC
+
+
+def _column_values(column, values):
+    if values.dtype.kind in "iub":
+        return 1, values.astype("<i8", copy=False)
+    if values.dtype.kind == "f":
+        return 0, values.astype("<f8", copy=False)
+    raise TypeError(f"bar codec can't store column {column!r} of dtype {values.dtype}")
+
+
+def encode_bars(df, codec=None):
+    """
+    DataFrame of bars -> bytes. Needs a DatetimeIndex and numeric columns,
+    anything else raises TypeError (callers fall back to JSON).
+    """
+    codec = codec or BAR_CODEC
+    if not isinstance(df.index, pd.DatetimeIndex):
+        raise TypeError("bar codec needs a DatetimeIndex")
+    if len(df.columns) > 0xFFFF:
+        raise ValueError("too many columns for the bar codec")
+
+    index = df.index.as_unit("ns")
+    tz = str(index.tz) if index.tz is not None else ""
+
+    names = [_name(tz), _name(df.index.name)]
+    arrays = [index.asi8.astype("<i8", copy=False)]
+    for column in df.columns:
+        code, values = _column_values(column, df[column].to_numpy())
+        names.append(bytes([code]) + _name(column))
+        arrays.append(values)
+
+    payload = b"".join(np.ascontiguousarray(array).tobytes() for array in arrays)
+    header = _HEADER.pack(MAGIC, VERSION, CODEC_IDS[codec], len(df.columns), len(df))
+    return header + b"".join(names) + _compress(codec, payload)
+
+
+def decode_bars(blob):
+    blob = memoryview(blob)
+    magic, version, codec_id, n_cols, n_rows = _HEADER.unpack_from(blob, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not an encoded bar frame")
+
+    offset = _HEADER.size
+
+    def read_name():
+        nonlocal offset
+        length = blob[offset]
+        value = bytes(blob[offset + 1:offset + 1 + length]).decode("utf-8")
+        offset += 1 + length
+        return value
+
+    tz = read_name()
+    index_name = read_name() or None
+    columns = []
+    for _ in range(n_cols):
+        code = blob[offset]
+        offset += 1
+        columns.append((read_name(), _DTYPES[code]))
+
+    payload = _decompress(CODEC_NAMES[codec_id], blob[offset:])
+
+    stamps = np.frombuffer(payload, dtype="<i8", count=n_rows)
+    if tz:
+        index = pd.DatetimeIndex(stamps.view("M8[ns]"), name=index_name).tz_localize("UTC").tz_convert(tz)
+    else:
+        index = pd.DatetimeIndex(stamps.view("M8[ns]"), name=index_name)
+
+    data = {}
+    position = 8 * n_rows
+    for name, dtype in columns:
+        data[name] = np.frombuffer(payload, dtype=dtype, count=n_rows, offset=position)
+        position += dtype.itemsize * n_rows
+    return pd.DataFrame(data, index=index, columns=[name for name, _ in columns])
+
+
+def encode_column(column, values, codec=None):
+    codec = codec or BAR_CODEC
+    code, values = _column_values(column, np.asarray(values))
+    header = _COLUMN_HEADER.pack(COLUMN_MAGIC, CODEC_IDS[codec], code, len(values))
+    return header + _compress(codec, np.ascontiguousarray(values).tobytes())
+
+
+def decode_column(blob):
+    blob = memoryview(blob)
+    magic, codec_id, code, n_rows = _COLUMN_HEADER.unpack_from(blob, 0)
+    if magic != COLUMN_MAGIC:
+        raise ValueError("not an encoded bar column")
+    payload = _decompress(CODEC_NAMES[codec_id], blob[_COLUMN_HEADER.size:])
+    return np.frombuffer(payload, dtype=_DTYPES[code], count=n_rows)
+
+
+def split_bars(df, codec=None):
+    """
+    DataFrame of bars -> (index blob, {column: blob}), so columns can be
+    stored and read back one by one. The index blob is an encode_bars()
+    frame without columns, it keeps the timezone and index name.
+    """
+    if len(df.columns) != len(set(df.columns)):
+        raise ValueError("bar columns must be unique to be stored separately")
+    index = encode_bars(df.iloc[:, :0], codec)
+    return index, {column: encode_column(column, df[column].to_numpy(), codec) for column in df.columns}
+
+
+def join_bars(index, columns):
+    """Inverse of split_bars for any subset of the columns, in the order given."""
+    index = decode_bars(index).index
+    data = {}
+    for name, blob in columns.items():
+        values = decode_column(blob)
+        if len(values) != len(index):
+            raise ValueError(f"column {name!r} has {len(values)} rows, the index {len(index)}")
+        data[name] = values
+    return pd.DataFrame(data, index=index, columns=list(columns))
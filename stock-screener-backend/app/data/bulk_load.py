@@ -0,0 +1,159 @@
+import io
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from sqlalchemy import text
+
+from app.data.symbols import get_stock_symbols
+from app.data.db_utils import _write_stocks, _write_prices, _price_rows, DB_WRITE_CHUNK
+
+logger = logging.getLogger(__name__)
+
+LOAD_INDEXES = [index.strip() for index in os.getenv('LOAD_INDEXES', 'dow30,sp500,nasdaq100').split(',') if index.strip()]
+LOAD_PERIOD = os.getenv('LOAD_PERIOD', '1y')
+LOAD_WORKERS = int(os.getenv('LOAD_WORKERS', 4))
+LOAD_CHUNK = int(os.getenv('LOAD_CHUNK', 50))
+
+STAGING_TABLE = "historical_prices_staging"
+COPY_COLUMNS = ("symbol", "date", "open", "high", "low", "close", "volume")
+
+
+class CopyWriter:
+    """
+    Postgres: every batch of bars is streamed with COPY FROM STDIN into a
+    temp staging table, finish() merges the staging table into
+    historical_prices with one INSERT ... ON CONFLICT DO UPDATE. Stock rows
+    are upserted per batch, before their bars.
+    """
+
+    method = 'copy'
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = 0
+        conn.execute(text(
+            f"CREATE TEMP TABLE {STAGING_TABLE} ("
+            "symbol varchar(10) NOT NULL, date date NOT NULL, open double precision NOT NULL, "
+            "high double precision NOT NULL, low double precision NOT NULL, "
+            "close double precision NOT NULL, volume bigint NOT NULL"
+            ") ON COMMIT DROP"
+        ))
+
+    def write(self, entries):
+        _write_stocks(self.conn, entries)
+        rows = [row for symbol, data in entries.items() for row in _price_rows(symbol, data.get('historical'))]
+        if not rows:
+            return 0
+
+        buffer = io.StringIO()
+        pd.DataFrame(rows, columns=COPY_COLUMNS).to_csv(buffer, header=False, index=False)
+        buffer.seek(0)
+        cursor = self.conn.connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {STAGING_TABLE} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+        self.rows += len(rows)
+        return len(rows)
+
+    def finish(self):
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in COPY_COLUMNS[2:])
+        self.conn.execute(text(
+            f"INSERT INTO historical_prices ({', '.join(COPY_COLUMNS)}, created_at) "
+            f"SELECT {', '.join(COPY_COLUMNS)}, now() FROM {STAGING_TABLE} "
+            f"ON CONFLICT (symbol, date) DO UPDATE SET {updates}, created_at = EXCLUDED.created_at"
+        ))
+
+
+class ExecutemanyWriter:
+    """Anything but Postgres (SQLite): the bulk upsert of save_many_to_database, batch by batch."""
+
+    method = 'executemany'
+
+    def __init__(self, conn, chunk_size=DB_WRITE_CHUNK):
+        self.conn = conn
+        self.chunk_size = chunk_size
+        self.rows = 0
+
+    def write(self, entries):
+        _write_stocks(self.conn, entries)
+        rows = [row for symbol, data in entries.items() for row in _price_rows(symbol, data.get('historical'))]
+        if rows:
+            _write_prices(self.conn, rows, self.chunk_size)
+        self.rows += len(rows)
+        return len(rows)
+
+    def finish(self):
+        pass
+
+
+def _fetch(symbols, period):
+    from app.data.yfinance_fetcher import fetch_yfinance_data
+    return fetch_yfinance_data(symbols, period=period, reload=True)
+
+
+def initial_load(session_factory, indexes=None, period=LOAD_PERIOD, workers=LOAD_WORKERS,
+                 chunk_size=LOAD_CHUNK, fetch=_fetch, report=None):
+    """
+    Fill the database for the given indexes in one transaction.
+
+    Symbols are de-duplicated across indexes (the dow30 is inside the
+    sp500, most of the nasdaq100 too) and fetched in chunks on a thread
+    pool with fetch(symbols, period), which also fills Redis. Chunks are
+    written as they arrive, on the calling thread, with CopyWriter on
+    Postgres and ExecutemanyWriter elsewhere. report(summary) is called
+    after every chunk. Returns the summary.
+    """
+    indexes = list(indexes or LOAD_INDEXES)
+    started = time.time()
+
+    symbols = {}
+    summary = {'indexes': {}, 'symbols': 0, 'loaded': 0, 'failed': 0, 'rows': 0, 'method': None, 'elapsed': 0.0}
+    for index in indexes:
+        members = get_stock_symbols(index=index)
+        summary['indexes'][index] = len(members)
+        for symbol in members:
+            symbols.setdefault(symbol, None)
+    symbols = list(symbols)
+    summary['symbols'] = len(symbols)
+    logger.info(f"Initial load of {len(symbols)} symbols from {', '.join(indexes)}")
+
+    chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+    session = session_factory()
+    try:
+        conn = session.connection()
+        writer = CopyWriter(conn) if conn.dialect.name == 'postgresql' else ExecutemanyWriter(conn)
+        summary['method'] = writer.method
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="initial-load") as pool:
+            futures = {pool.submit(fetch, chunk, period): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    entries = {symbol: data for symbol, data in (future.result() or {}).items() if data}
+                except Exception as e:
+                    logger.error(f"Initial load fetch failed for {len(chunk)} symbols: {e}")
+                    entries = {}
+                summary['rows'] += writer.write(entries) if entries else 0
+                summary['loaded'] += len(entries)
+                summary['failed'] += len(chunk) - len(entries)
+                summary['elapsed'] = round(time.time() - started, 1)
+                if report:
+                    report(dict(summary))
+
+        writer.finish()
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Initial load failed, nothing was written")
+        raise
+    finally:
+        session.close()
+
+    summary['elapsed'] = round(time.time() - started, 1)
+    logger.info(f"Initial load done: {summary['loaded']}/{summary['symbols']} symbols, {summary['rows']} bars "
+                f"via {summary['method']} in {summary['elapsed']}s")
+    return summary
@@ -0,0 +1,337 @@
+import os
+import sys
+import json
+import time
+import threading
+import logging
+from datetime import datetime, timezone
+
+from app.data.providers import get_provider
+from app.data.index_snapshot import INDEX_SNAPSHOT, SNAPSHOT_DATE
+
+logger = logging.getLogger(__name__)
+
+# re-read constituents from the provider once a day, Redis keeps them a week
+CONSTITUENTS_REFRESH = int(os.getenv('CONSTITUENTS_REFRESH', 86400))
+CONSTITUENTS_TTL = int(os.getenv('CONSTITUENTS_TTL', 7 * 86400))
+# after a failed provider read wait this long before trying again
+CONSTITUENTS_RETRY = int(os.getenv('CONSTITUENTS_RETRY', 900))
+
+KNOWN_INDEXES = tuple(INDEX_SNAPSHOT)
+
+
+class UnknownIndexError(ValueError):
+    """Neither the bundled indexes nor the provider know the index."""
+
+    def __init__(self, index):
+        self.index = index
+        super().__init__(f"Unknown index: {index}, try {'/'.join(KNOWN_INDEXES)}")
+
+
+# Yahoo form (BRK.B -> BRK-B), upper case, no duplicates, order kept
+def normalize_constituents(symbols):
+    seen = {}
+    for symbol in symbols or []:
+        if not isinstance(symbol, str):
+            continue
+        symbol = symbol.strip().upper().replace('.', '-')
+        if symbol:
+            seen.setdefault(symbol, None)
+    return list(seen)
+
+
+class ConstituentCache:
+    """
+    Index constituent lists, looked up memory -> Redis -> database ->
+    provider -> bundled snapshot (app/data/index_snapshot.py).
+
+    A list older than refresh_after is still served, and refreshed from the
+    provider in a background thread (one per index); a failed provider read
+    is not retried for retry_after seconds. Every change rebuilds the
+    reverse map (symbol -> indexes), so membership lookups never leave the
+    process. Providers with cache_constituents = False skip Redis, the
+    database and the snapshot.
+    """
+
+    def __init__(self, client=None, session_factory=None, provider=None, refresh_after=CONSTITUENTS_REFRESH,
+                 ttl=CONSTITUENTS_TTL, retry_after=CONSTITUENTS_RETRY):
+        self._client = client
+        self._session_factory = session_factory
+        self._provider = provider
+        self.refresh_after = refresh_after
+        self.ttl = ttl
+        self.retry_after = retry_after
+
+        self._lock = threading.Lock()
+        self._lists = {}        # index -> (symbols tuple, updated_at, source)
+        self._members = {}      # symbol -> tuple of indexes
+        self._refreshing = set()
+        self._attempted = {}    # index -> time of the last provider read
+        self._owner = None      # provider the lists above came from
+        self._counters = {'memory': 0, 'redis': 0, 'database': 0, 'provider': 0, 'snapshot': 0, 'refresh_failed': 0}
+
+    def _redis(self):
+        if self._client is None:
+            from app.data.redis_cache import redis_client
+            self._client = redis_client
+        return self._client
+
+    def _sessions(self):
+        if self._session_factory is None:
+            from app.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    @staticmethod
+    def _key(index):
+        return f"constituents:{index}"
+
+    def _current_provider(self):
+        provider = self._provider or get_provider()
+        with self._lock:
+            # lists from another provider (set_provider) are not ours to serve
+            if provider is not self._owner:
+                self._owner = provider
+                self._lists = {}
+                self._members = {}
+                self._attempted = {}
+        return provider
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _remember(self, index, symbols, updated_at, source):
+        symbols = tuple(symbols)
+        with self._lock:
+            previous = self._lists.get(index)
+            self._lists[index] = (symbols, updated_at, source)
+            self._counters[source] += 1
+            if previous is None or previous[0] != symbols:
+                members = {}
+                for name in sorted(self._lists):
+                    for symbol in self._lists[name][0]:
+                        members.setdefault(symbol, []).append(name)
+                self._members = {symbol: tuple(names) for symbol, names in members.items()}
+            return self._lists[index]
+
+    def _read_redis(self, index):
+        try:
+            raw = self._redis().get(self._key(index))
+            if raw:
+                cached = json.loads(raw)
+                return cached['symbols'], float(cached['updated_at'])
+        except Exception as e:
+            logger.debug(f"Constituents for {index} unavailable from Redis: {e}")
+        return None
+
+    def _write_redis(self, index, symbols, updated_at):
+        try:
+            self._redis().setex(self._key(index), self.ttl, json.dumps({'symbols': list(symbols), 'updated_at': updated_at}))
+        except Exception as e:
+            logger.debug(f"Could not cache constituents for {index} in Redis: {e}")
+
+    def _read_database(self, index):
+        from app.database.models import IndexConstituent
+        from app.data.db_utils import db_timestamp
+        try:
+            session = self._sessions()()
+            try:
+                rows = (
+                    session.query(IndexConstituent.symbol, IndexConstituent.updated_at)
+                    .filter(IndexConstituent.index_name == index)
+                    .order_by(IndexConstituent.id)
+                    .all()
+                )
+            finally:
+                session.close()
+        except Exception as e:
+            logger.debug(f"Constituents for {index} unavailable from the database: {e}")
+            return None
+        if not rows:
+            return None
+        return [row.symbol for row in rows], db_timestamp(min(row.updated_at for row in rows))
+
+    # replace the stored list of an index in one transaction
+    def _write_database(self, index, symbols, updated_at):
+        from app.database.models import IndexConstituent
+        try:
+            session = self._sessions()()
+        except Exception as e:
+            logger.debug(f"Could not store constituents for {index}: {e}")
+            return
+        try:
+            stamp = datetime.fromtimestamp(updated_at, timezone.utc).replace(tzinfo=None)
+            session.query(IndexConstituent).filter(IndexConstituent.index_name == index).delete(synchronize_session=False)
+            session.add_all([IndexConstituent(index_name=index, symbol=symbol, updated_at=stamp) for symbol in symbols])
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error storing constituents for {index}: {e}")
+        finally:
+            session.close()
+
+    def _may_ask_provider(self, index):
+        with self._lock:
+            return time.time() - self._attempted.get(index, 0) >= self.retry_after
+
+    def refresh(self, index, provider=None):
+        """Read the index from the provider and store it everywhere. Returns the new entry or None."""
+        provider = provider or self._current_provider()
+        with self._lock:
+            self._attempted[index] = time.time()
+        try:
+            symbols = normalize_constituents(provider.get_index_constituents(index))
+        except Exception as e:
+            logger.error(f"Error fetching symbols for {index}: {e}")
+            symbols = []
+        if not symbols:
+            self._count('refresh_failed')
+            return None
+
+        updated_at = time.time()
+        if provider.cache_constituents:
+            self._write_database(index, symbols, updated_at)
+            self._write_redis(index, symbols, updated_at)
+        logger.info(f"Refreshed {index} constituents: {len(symbols)} symbols")
+        return self._remember(index, symbols, updated_at, 'provider')
+
+    def _load(self, index, provider):
+        if provider.cache_constituents:
+            found = self._read_redis(index)
+            if found:
+                return self._remember(index, found[0], found[1], 'redis')
+            found = self._read_database(index)
+            if found:
+                self._write_redis(index, *found)
+                return self._remember(index, found[0], found[1], 'database')
+
+        if self._may_ask_provider(index):
+            entry = self.refresh(index, provider)
+            if entry:
+                return entry
+
+        if provider.cache_constituents and index in INDEX_SNAPSHOT:
+            logger.warning(f"Using the bundled {index} constituents from {SNAPSHOT_DATE}")
+            # updated_at 0 keeps it due for a refresh once the provider is back
+            return self._remember(index, normalize_constituents(INDEX_SNAPSHOT[index]), 0.0, 'snapshot')
+        return None
+
+    def _refresh_in_background(self, index, provider):
+        if not self._may_ask_provider(index):
+            return
+        with self._lock:
+            if index in self._refreshing:
+                return
+            self._refreshing.add(index)
+
+        def run():
+            try:
+                # another process may have refreshed it already
+                if provider.cache_constituents:
+                    found = self._read_redis(index)
+                    if found and time.time() - found[1] < self.refresh_after:
+                        self._remember(index, found[0], found[1], 'redis')
+                        return
+                self.refresh(index, provider)
+            except Exception as e:
+                logger.error(f"Background refresh of {index} constituents failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(index)
+
+        threading.Thread(target=run, name=f"constituents-{index}", daemon=True).start()
+
+    def get(self, index):
+        """The symbols of index, raises UnknownIndexError for an index nobody knows."""
+        provider = self._current_provider()
+        with self._lock:
+            entry = self._lists.get(index)
+        if entry is None:
+            entry = self._load(index, provider)
+            if entry is None:
+                if index not in KNOWN_INDEXES:
+                    raise UnknownIndexError(index)
+                logger.error(f"No {index} constituents available from {provider.name}")
+                return []
+        else:
+            self._count('memory')
+
+        if time.time() - entry[1] >= self.refresh_after:
+            self._refresh_in_background(index, provider)
+        return list(entry[0])
+
+    def indexes_for(self, symbol):
+        """Indexes the symbol belongs to, e.g. ['dow30', 'sp500']."""
+        with self._lock:
+            missing = [index for index in KNOWN_INDEXES if index not in self._lists]
+        for index in missing:
+            self.get(index)
+        symbols = normalize_constituents([symbol])
+        if not symbols:
+            return []
+        return list(self._members.get(symbols[0], ()))
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            stats = dict(self._counters)
+            stats['indexes'] = {
+                index: {'count': len(symbols), 'source': source, 'age': round(now - updated_at) if updated_at else None}
+                for index, (symbols, updated_at, source) in self._lists.items()
+            }
+            return stats
+
+
+constituents = ConstituentCache()
+
+
+def get_constituents(index):
+    return constituents.get(index)
+
+
+def get_symbol_indexes(symbol):
+    return constituents.indexes_for(symbol)
+
+
+# regenerate app/data/index_snapshot.py from the current provider
+def write_snapshot(path=None):
+    path = path or os.path.join(os.path.dirname(__file__), 'index_snapshot.py')
+    provider = get_provider()
+    lines = [
+        '# bundled index constituents, used when the provider, Redis and the database',
+        '# all come up empty (first start with no network). symbols are in Yahoo form (BRK-B).',
+        '# regenerate with: python -m app.data.constituents --snapshot',
+        f'SNAPSHOT_DATE = "{datetime.now().strftime("%Y-%m-%d")}"',
+        '',
+        'INDEX_SNAPSHOT = {',
+    ]
+    for index in KNOWN_INDEXES:
+        symbols = normalize_constituents(provider.get_index_constituents(index))
+        if not symbols:
+            # keep what we had rather than writing an empty list
+            symbols = INDEX_SNAPSHOT[index]
+            logger.warning(f"No {index} constituents from {provider.name}, keeping the old snapshot")
+        lines.append(f"    '{index}': [")
+        line = '       '
+        for symbol in sorted(symbols):
+            item = f" '{symbol}',"
+            if len(line) + len(item) > 88:
+                lines.append(line)
+                line = '       '
+            line += item
+        lines.append(line)
+        lines.append('    ],')
+    lines.append('}')
+
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    logger.info(f"Wrote index snapshot to {path}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if '--snapshot' in sys.argv:
+        write_snapshot()
+    else:
+        print(json.dumps({index: len(get_constituents(index)) for index in KNOWN_INDEXES}))
@@ -1,6 +1,8 @@
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import logging
+from sqlalchemy import select, func
 from app.database.models import Stock, HistoricalPrice
 from io import StringIO
 
@@ -8,126 +10,353 @@ from io import StringIO
 
 logger = logging.getLogger(__name__)
 
-def load_from_database(symbol, session_factory, max_age_days=7):
+def _stock_info(symbol, stock):
+    stock_info = {
+        "symbol": symbol,
+        "shortName": stock.name if stock else symbol,
+        "sector": stock.sector if stock else "Unknown",
+        "industry": stock.industry if stock else None,
+        "marketCap": stock.market_cap if stock else None,
+        "currentPrice": stock.current_price if stock else None,
+        "peRatio": stock.pe_ratio if stock else None,
+        "dividendYield": stock.dividend_yield if stock else None,
+        "beta": stock.beta if stock else None,
+    }
+    if stock and stock.info:
+        stock_info.update(stock.info)
+    return stock_info
+
+
+# epoch seconds of a DB timestamp. The columns are naive and hold UTC:
+# func.now() is CURRENT_TIMESTAMP on SQLite and Postgres sessions run in UTC
+def db_timestamp(value):
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+# the current time the way the DB stores it, for comparing with its columns
+def db_now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# stock columns _stock_info reads, selected as plain rows (no ORM objects)
+def _stock_rows(session, symbols):
+    stocks = Stock.__table__
+    stmt = select(
+        stocks.c.symbol, stocks.c.name, stocks.c.sector, stocks.c.industry, stocks.c.market_cap,
+        stocks.c.current_price, stocks.c.pe_ratio, stocks.c.dividend_yield, stocks.c.beta,
+        stocks.c.info, stocks.c.updated_at,
+    ).where(stocks.c.symbol.in_(list(symbols)))
+    return session.execute(stmt).all()
+
+
+# info only (no price history) for many symbols in one query,
+# enough to run fundamental criteria before deciding what history to load
+def load_info_from_database(symbols, session_factory, max_age_days=7):
+    if not symbols:
+        return {}
     session = session_factory()
     try:
-        cutoff_date = datetime.now().date() - timedelta(days=max_age_days)
-        recent_count = (
-            session.query(HistoricalPrice)
-            .filter(HistoricalPrice.symbol == symbol,
-                    HistoricalPrice.date >= cutoff_date)
-            .count()
-        )
-        if recent_count < 1:
-            return None
-
-        rows = (
-            session.query(HistoricalPrice)
-            .filter(HistoricalPrice.symbol == symbol)
-            .order_by(HistoricalPrice.date.asc())
-            .all()
-        )
-        if not rows:
-            return None
-
-        df = pd.DataFrame([{
-            "Date": r.date,
-            "Open": r.open,
-            "High": r.high,
-            "Low":  r.low,
-            "Close": r.close,
-            "Volume": r.volume,
-        } for r in rows])
-        df["Date"] = pd.to_datetime(df["Date"])
-        df.set_index("Date", inplace=True)
-
-        stock = session.query(Stock).filter(Stock.symbol == symbol).first()
-        stock_info = {
-            "symbol": symbol,
-            "shortName": stock.name if stock else symbol,
-            "sector": stock.sector if stock else "Unknown",
-            "industry": stock.industry if stock else None,
-            "marketCap": stock.market_cap if stock else None,
-            "currentPrice": stock.current_price if stock else None,
-            "peRatio": stock.pe_ratio if stock else None,
-            "dividendYield": stock.dividend_yield if stock else None,
-            "beta": stock.beta if stock else None,
+        cutoff = db_now() - timedelta(days=max_age_days)
+        return {
+            stock.symbol: _stock_info(stock.symbol, stock) for stock in _stock_rows(session, symbols)
+            if stock.updated_at is not None and stock.updated_at >= cutoff
         }
-        if stock and stock.info:
-            stock_info.update(stock.info)
-
-        return {"historical_json": df.to_json(orient="split"), "info": stock_info, "last_updated": datetime.now().isoformat()}
     except Exception as e:
-        logger.error(f"Error loading {symbol} from database: {e}")
-        return None
+        logger.error(f"Error loading info for {len(symbols)} symbols from database: {e}")
+        return {}
     finally:
         session.close()
 
 
-def save_to_database(symbol, data, session_factory):
+# one symbol through the bulk loader: "historical" is a DataFrame straight
+# from the query, callers that need JSON convert at the HTTP boundary
+def load_from_database(symbol, session_factory, max_age_days=7):
+    return load_many_from_database([symbol], session_factory, max_age_days).get(symbol)
+
+
+# symbols per IN (...) query in load_many_from_database
+DB_LOAD_CHUNK = 200
+
+PRICE_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+PRICE_DTYPES = {"open": "float64", "high": "float64", "low": "float64", "close": "float64", "volume": "int64"}
+
+
+# many symbols per query: yields {symbol: data} one chunk at a time, same
+# freshness rule as load_from_database but with "historical" as a DataFrame.
+# Entries carry fetched_at (bars: newest row insert, info: stock update,
+# epoch seconds) and last_bar like the Redis cache does.
+def iter_load_from_database(symbols, session_factory, max_age_days=7, chunk_size=DB_LOAD_CHUNK):
+    symbols = list(symbols)
+    cutoff_date = db_now().date() - timedelta(days=max_age_days)
+    prices = HistoricalPrice.__table__
+
+    for i in range(0, len(symbols), chunk_size):
+        chunk = symbols[i:i + chunk_size]
+        session = session_factory()
+        try:
+            # only symbols with a bar newer than the cutoff, filtered in the same statement
+            fresh = (
+                select(prices.c.symbol)
+                .where(prices.c.symbol.in_(chunk), prices.c.date >= cutoff_date)
+                .distinct()
+            )
+            stmt = (
+                select(prices.c.symbol, prices.c.date, prices.c.open, prices.c.high,
+                       prices.c.low, prices.c.close, prices.c.volume, prices.c.created_at)
+                .where(prices.c.symbol.in_(fresh))
+                .order_by(prices.c.symbol, prices.c.date)
+            )
+            conn = session.connection()
+            df = pd.read_sql(stmt, conn, dtype=PRICE_DTYPES)
+            if df.empty:
+                yield {}
+                continue
+
+            found = df["symbol"].unique().tolist()
+            stocks = {stock.symbol: stock for stock in _stock_rows(session, found)}
+
+            df["date"] = pd.to_datetime(df["date"])
+            df = df.rename(columns={"date": "Date", **PRICE_COLUMNS})
+
+            loaded = {}
+            now = datetime.now().isoformat()
+            for symbol, group in df.groupby("symbol", sort=False):
+                hist = group.drop(columns=["symbol", "created_at"]).set_index("Date")
+                stock = stocks.get(symbol)
+
+                fetched_at = {}
+                bars_written = pd.to_datetime(group["created_at"]).max()
+                if pd.notna(bars_written):
+                    fetched_at["bars"] = db_timestamp(bars_written.to_pydatetime())
+                if stock is not None and stock.updated_at is not None:
+                    fetched_at["info"] = db_timestamp(stock.updated_at)
+
+                loaded[symbol] = {
+                    "historical": hist,
+                    "info": _stock_info(symbol, stock),
+                    "last_updated": now,
+                    "fetched_at": fetched_at,
+                    "last_bar": str(hist.index[-1]),
+                }
+            yield loaded
+        except Exception as e:
+            logger.error(f"Error loading {len(chunk)} symbols from database: {e}")
+            yield {}
+        finally:
+            session.close()
+
+
+def load_many_from_database(symbols, session_factory, max_age_days=7, chunk_size=DB_LOAD_CHUNK):
+    result = {}
+    for loaded in iter_load_from_database(symbols, session_factory, max_age_days, chunk_size):
+        result.update(loaded)
+    return result
+
+
+# last stored bar date per symbol, one grouped query per chunk, so an
+# incremental refresh knows where each symbol's history ends
+def get_latest_dates(symbols, session_factory, chunk_size=DB_LOAD_CHUNK):
+    symbols = list(symbols)
+    prices = HistoricalPrice.__table__
+    latest = {}
+
     session = session_factory()
     try:
-        info = data.get('info', {})
-        stock = session.query(Stock).filter(Stock.symbol == symbol).first()
-
-        stock_fields = dict(
-            symbol=symbol,
-            name=info.get('shortName', symbol),
-            sector=info.get('sector'),
-            industry=info.get('industry'),
-            market_cap=info.get('marketCap'),
-            current_price=info.get('currentPrice'),
-            pe_ratio=info.get('trailingPE'),
-            dividend_yield=info.get('dividendYield'),
-            beta=info.get('beta'),
-            info=info,
-        )
+        for i in range(0, len(symbols), chunk_size):
+            chunk = symbols[i:i + chunk_size]
+            stmt = (
+                select(prices.c.symbol, func.max(prices.c.date))
+                .where(prices.c.symbol.in_(chunk))
+                .group_by(prices.c.symbol)
+            )
+            for symbol, last_date in session.execute(stmt):
+                if last_date is not None:
+                    latest[symbol] = last_date
+        return latest
+    except Exception as e:
+        logger.error(f"Error reading latest dates for {len(symbols)} symbols: {e}")
+        return latest
+    finally:
+        session.close()
+
 
-        if not stock:
-            stock = Stock(**stock_fields)
-            session.add(stock)
+# rows per executemany in save_many_to_database
+DB_WRITE_CHUNK = 5000
+
+
+def _dialect_insert(conn):
+    name = conn.dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+def _stock_fields(symbol, info):
+    return dict(
+        symbol=symbol,
+        name=info.get('shortName', symbol),
+        sector=info.get('sector'),
+        industry=info.get('industry'),
+        market_cap=info.get('marketCap'),
+        current_price=info.get('currentPrice'),
+        pe_ratio=info.get('trailingPE'),
+        dividend_yield=info.get('dividendYield'),
+        beta=info.get('beta'),
+        info=info,
+    )
+
+
+# a bars-only refresh leaves the stored fundamentals alone, it only makes
+# sure the stock row exists for the prices to point at
+def _write_stocks(conn, entries):
+    stocks = Stock.__table__
+    with_info = [_stock_fields(symbol, data['info']) for symbol, data in entries.items() if data.get('info') is not None]
+    without_info = [{"symbol": symbol, "name": symbol} for symbol, data in entries.items() if data.get('info') is None]
+    insert = _dialect_insert(conn)
+
+    if with_info:
+        if insert is not None:
+            stmt = insert(stocks)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[stocks.c.symbol],
+                set_={**{column: stmt.excluded[column] for column in with_info[0] if column != "symbol"}, "updated_at": func.now()},
+            )
+            conn.execute(stmt, with_info)
         else:
-            for k, v in stock_fields.items():
-                setattr(stock, k, v)
+            conn.execute(stocks.delete().where(stocks.c.symbol.in_([row["symbol"] for row in with_info])))
+            conn.execute(stocks.insert(), with_info)
+    if without_info:
+        if insert is not None:
+            conn.execute(insert(stocks).on_conflict_do_nothing(index_elements=[stocks.c.symbol]), without_info)
+        else:
+            existing = set(conn.execute(select(stocks.c.symbol).where(stocks.c.symbol.in_([row["symbol"] for row in without_info]))).scalars())
+            missing = [row for row in without_info if row["symbol"] not in existing]
+            if missing:
+                conn.execute(stocks.insert(), missing)
 
-        session.flush()  # ensure parent 
 
-        # Replace existing history
-        session.query(HistoricalPrice)\
-               .filter(HistoricalPrice.symbol == symbol)\
-               .delete(synchronize_session=False)
+# one symbol's bars -> rows for historical_prices, built column-wise.
+# Bars without a full OHLC are dropped (the columns are NOT NULL), a
+# missing volume is stored as 0, and a date sent twice keeps its last bar
+def _price_rows(symbol, historical):
+    if not isinstance(historical, pd.DataFrame) or historical.empty:
+        return []
+    if not {"Open", "High", "Low", "Close"} <= set(historical.columns):
+        logger.debug(f"Not storing bars for {symbol}: columns {list(historical.columns)}")
+        return []
+
+    def values(column):
+        return pd.to_numeric(historical[column], errors="coerce").to_numpy(dtype=float)
+
+    dates = pd.DatetimeIndex(pd.to_datetime(historical.index))
+    columns = {"open": values("Open"), "high": values("High"), "low": values("Low"), "close": values("Close")}
+    volume = values("Volume") if "Volume" in historical.columns else np.zeros(len(dates))
+
+    keep = ~np.isnan(np.column_stack(list(columns.values()))).any(axis=1)
+    keep &= ~dates.normalize().duplicated(keep="last")
+    columns = {name: array[keep].tolist() for name, array in columns.items()}
+    columns["volume"] = np.nan_to_num(volume[keep]).astype("int64").tolist()
+    columns["date"] = list(dates[keep].date)
+
+    names = list(columns)
+    return [dict(zip(names, row), symbol=symbol) for row in zip(*columns.values())]
+
+
+# re-sent dates replace the stored bar, older history stays (incremental
+# refreshes send just the tail). created_at is reset on every write, the
+# loaders read it as the time the bars were fetched
+def _write_prices(conn, rows, chunk_size):
+    prices = HistoricalPrice.__table__
+    insert = _dialect_insert(conn)
+    if insert is not None:
+        stmt = insert(prices)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[prices.c.symbol, prices.c.date],
+            set_={**{column: stmt.excluded[column] for column in PRICE_COLUMNS}, "created_at": func.now()},
+        )
+    else:
+        stmt = prices.insert()
+        ranges = pd.DataFrame(rows).groupby("symbol")["date"].agg(["min", "max"])
+        for symbol, (first, last) in ranges.iterrows():
+            conn.execute(prices.delete().where(prices.c.symbol == symbol, prices.c.date.between(first, last)))
+
+    for i in range(0, len(rows), chunk_size):
+        conn.execute(stmt, rows[i:i + chunk_size])
 
-        historical = data.get("historical")
-        if isinstance(historical, str):
-            historical = pd.read_json(historical, orient="split")
-        elif "historical_json" in data and isinstance(data["historical_json"], str):
-            historical = pd.read_json(data["historical_json"], orient="split")
-
-        if isinstance(historical, pd.DataFrame) and not historical.empty:
-            df = historical.copy()
-            if df.index.name is None or str(df.index.name).lower() != "date":
-                df.index.name = "Date"
-            df = df.reset_index()
-
-            to_add = []
-            for row in df.itertuples(index=False):
-                date_val = pd.to_datetime(getattr(row, "Date")).date()
-                to_add.append(HistoricalPrice(
-                    symbol=symbol,
-                    date=date_val,
-                    open=float(getattr(row, "Open")) if "Open" in df.columns and pd.notna(getattr(row, "Open")) else None,
-                    high=float(getattr(row, "High")) if "High" in df.columns and pd.notna(getattr(row, "High")) else None,
-                    low=float(getattr(row, "Low")) if "Low" in df.columns and pd.notna(getattr(row, "Low")) else None,
-                    close=float(getattr(row, "Close")) if "Close" in df.columns and pd.notna(getattr(row, "Close")) else None,
-                    volume=int(getattr(row, "Volume")) if "Volume" in df.columns and pd.notna(getattr(row, "Volume")) else None,
-                ))
-
-            # Use add_all (respects ORM ordering) instead of bulk_save_objects
-            session.add_all(to_add)
 
+class DatabaseWriteError(Exception):
+    """Symbols save_many_to_database could not write, the others were committed."""
+
+    def __init__(self, symbols, rows=0):
+        self.symbols = list(symbols)
+        self.rows = rows
+        super().__init__(f"could not save {len(self.symbols)} symbols: {', '.join(self.symbols)}")
+
+
+def _write_entries(session_factory, entries, rows, chunk_size):
+    session = session_factory()
+    try:
+        conn = session.connection()
+        _write_stocks(conn, entries)
+        if rows:
+            _write_prices(conn, rows, chunk_size)
         session.commit()
     except Exception:
         session.rollback()
-        logger.exception(f"Error saving {symbol} to database")
+        raise
     finally:
         session.close()
+
+
+def save_many_to_database(entries, session_factory, chunk_size=DB_WRITE_CHUNK):
+    """
+    Write {symbol: data}: stocks with one upsert, then the bars of every
+    symbol with INSERT ... ON CONFLICT (symbol, date) DO UPDATE in
+    executemany chunks of chunk_size rows (SQLite and Postgres; other
+    databases delete the incoming date range and insert), all in one
+    transaction. Returns the number of bars written.
+
+    If that transaction fails every symbol is retried in its own, so one
+    bad symbol doesn't lose the batch. Symbols that still fail are raised
+    as DatabaseWriteError once the others are committed.
+    """
+    if not entries:
+        return 0
+    rows = {}
+    for symbol, data in entries.items():
+        historical = data.get("historical")
+        if isinstance(historical, str):
+            historical = pd.read_json(StringIO(historical), orient="split")
+        rows[symbol] = _price_rows(symbol, historical)
+
+    try:
+        _write_entries(session_factory, entries, [row for symbol_rows in rows.values() for row in symbol_rows], chunk_size)
+        return sum(len(symbol_rows) for symbol_rows in rows.values())
+    except Exception as e:
+        if len(entries) == 1:
+            logger.error(f"Error saving {next(iter(entries))} to database: {e}")
+            raise DatabaseWriteError(entries) from e
+        logger.warning(f"Saving {len(entries)} symbols in one transaction failed, retrying one by one: {e}")
+
+    written = 0
+    failed = []
+    for symbol, data in entries.items():
+        try:
+            _write_entries(session_factory, {symbol: data}, rows[symbol], chunk_size)
+            written += len(rows[symbol])
+        except Exception as e:
+            logger.error(f"Error saving {symbol} to database: {e}")
+            failed.append(symbol)
+    if failed:
+        raise DatabaseWriteError(failed, written)
+    return written
+
+
+def save_to_database(symbol, data, session_factory):
+    save_many_to_database({symbol: data}, session_factory)
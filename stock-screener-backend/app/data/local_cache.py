@@ -0,0 +1,196 @@
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# per-process memory for decoded stock data and prices, 0 turns it off
+LOCAL_CACHE_BYTES = int(os.getenv('LOCAL_CACHE_BYTES', 128 * 1024 * 1024))
+# upper bound on how long an entry is trusted, in case an invalidation is missed
+LOCAL_CACHE_TTL = float(os.getenv('LOCAL_CACHE_TTL', 300))
+
+# writers publish "<kind>:<SYM>,<SYM>,..." here, kind is data or price
+INVALIDATE_CHANNEL = "cache:invalidate"
+
+PRICE_SIZE = 100
+
+
+# rough in-memory size of a stock data entry: frames by their buffers,
+# the rest by the size of the Redis payload it was decoded from
+def entry_size(data, payload_bytes=0):
+    size = payload_bytes
+    historical = data.get('historical')
+    if isinstance(historical, pd.DataFrame):
+        size += int(historical.memory_usage(index=True).sum())
+    return size
+
+
+class LocalCache:
+    """
+    Byte-bounded LRU in front of Redis, one per process.
+
+    Keys are tuples starting with the kind and symbol, e.g.
+    ('data', 'AAPL', '1y', '1d') or ('price', 'AAPL'). Writers publish the
+    symbols they changed on INVALIDATE_CHANNEL and a listener thread drops
+    them here. The cache is only used while that listener is subscribed;
+    when the subscription breaks everything is cleared, since messages may
+    have been missed. Entries older than ttl are dropped on read as a
+    second line of defence.
+
+    A reader takes a token() before going to Redis and passes it to put(),
+    which is refused if the symbol was invalidated in between, so a slow
+    read can't put back what a concurrent write just replaced.
+    """
+
+    def __init__(self, max_bytes=LOCAL_CACHE_BYTES, ttl=LOCAL_CACHE_TTL, client=None, channel=INVALIDATE_CHANNEL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.channel = channel
+        self._client = client
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size, stored_at)
+        self._by_symbol = {}           # (kind, symbol) -> set of keys
+        self._bytes = 0
+        self._generations = {}         # (kind, symbol) -> invalidation count
+        self._epoch = 0                # bumped by clear()
+        self._listening = False
+        self._listener = None
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0, 'expired': 0}
+
+    def _redis(self):
+        if self._client is not None:
+            return self._client
+        from app.data import redis_cache
+        return redis_cache.redis_client
+
+    @property
+    def usable(self):
+        if self.max_bytes <= 0:
+            return False
+        self._ensure_listening()
+        return self._listening
+
+    def _drop(self, key):
+        value, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        index = (key[0], key[1])
+        keys = self._by_symbol.get(index)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_symbol[index]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            if time.time() - entry[2] >= self.ttl:
+                self._drop(key)
+                self._counters['expired'] += 1
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return entry[0]
+
+    def token(self, kind, symbol):
+        with self._lock:
+            return self._epoch, self._generations.get((kind, symbol.upper()), 0)
+
+    def put(self, key, value, size, token=None):
+        # anything bigger than an eighth of the budget would just churn it
+        if size > self.max_bytes // 8:
+            return
+        with self._lock:
+            if token is not None and token != (self._epoch, self._generations.get((key[0], key[1]), 0)):
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, time.time())
+            self._by_symbol.setdefault((key[0], key[1]), set()).add(key)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._counters['evictions'] += 1
+
+    def invalidate(self, kind, symbols):
+        with self._lock:
+            for symbol in symbols:
+                index = (kind, symbol.upper())
+                self._generations[index] = self._generations.get(index, 0) + 1
+                for key in list(self._by_symbol.get(index, ())):
+                    self._drop(key)
+                    self._counters['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._by_symbol.clear()
+            self._bytes = 0
+
+    # tell every process (this one included) that these symbols changed
+    def publish(self, pipe, kind, symbols):
+        symbols = [symbol.upper() for symbol in symbols]
+        if symbols:
+            pipe.publish(self.channel, f"{kind}:{','.join(symbols)}")
+
+    def handle_message(self, data):
+        kind, _, symbols = (data.decode() if isinstance(data, bytes) else data).partition(':')
+        if symbols:
+            self.invalidate(kind, symbols.split(','))
+
+    def _ensure_listening(self):
+        if self._listener is not None and self._listener.is_alive():
+            return
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen, name="local-cache-invalidation", daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        delay = 1.0
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # whatever was cached while we were not listening can't be trusted
+                self.clear()
+                self._listening = True
+                delay = 1.0
+                for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        self.handle_message(message['data'])
+            except Exception as e:
+                logger.debug(f"Local cache invalidation listener stopped: {e}")
+            finally:
+                self._listening = False
+                self.clear()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+            stats['max_bytes'] = self.max_bytes
+            stats['listening'] = self._listening
+            return stats
+
+
+local_cache = LocalCache()
@@ -0,0 +1,70 @@
+import pandas as pd
+
+# provider periods, shortest first; '1d'/'5d' count sessions, the rest calendar time
+SESSION_PERIODS = {'1d': 1, '5d': 5}
+PERIOD_OFFSETS = {
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+PERIODS = list(SESSION_PERIODS) + list(PERIOD_OFFSETS) + ['ytd', 'max']
+
+
+# rough length in calendar days, only good for comparing periods
+def period_days(period, today=None):
+    if period == 'max':
+        return float('inf')
+    today = pd.Timestamp(today or pd.Timestamp.now()).normalize()
+    if period in SESSION_PERIODS:
+        # a week holds five sessions
+        return SESSION_PERIODS[period] * 7 / 5
+    if period == 'ytd':
+        return (today - today.replace(month=1, day=1)).days + 1
+    if period in PERIOD_OFFSETS:
+        return (today - (today - PERIOD_OFFSETS[period])).days
+    raise ValueError(f"Unsupported period: {period}")
+
+
+# can a series fetched for `cached` answer a request for `requested`?
+def period_covers(cached, requested, today=None):
+    if cached is None or requested is None:
+        return False
+    if cached == requested:
+        return True
+    try:
+        return period_days(cached, today) >= period_days(requested, today)
+    except ValueError:
+        return False
+
+
+# the tail of a bar frame a fresh fetch of `period` would return, counted back from its last bar
+def slice_period(frame, period):
+    if frame is None or frame.empty or period in (None, 'max'):
+        return frame
+    if period in SESSION_PERIODS:
+        days = frame.index.normalize()
+        first = days.unique()[-SESSION_PERIODS[period]:][0]
+        return frame[days >= first]
+    last = frame.index[-1]
+    if period == 'ytd':
+        return frame[frame.index >= last.normalize().replace(month=1, day=1)]
+    if period in PERIOD_OFFSETS:
+        return frame[frame.index > last - PERIOD_OFFSETS[period]]
+    return frame
+
+
+# longest period a stored series fully covers (a few days of slack for
+# holidays and a late first fetch), None for an empty frame
+def covered_period(frame, slack_days=7):
+    if frame is None or frame.empty:
+        return None
+    first, last = frame.index[0], frame.index[-1]
+    for period in reversed(list(PERIOD_OFFSETS)):
+        if first <= last - PERIOD_OFFSETS[period] + pd.Timedelta(days=slack_days):
+            return period
+    sessions = len(frame.index.normalize().unique())
+    return '5d' if sessions >= SESSION_PERIODS['5d'] else '1d'
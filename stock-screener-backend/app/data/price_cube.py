@@ -0,0 +1,322 @@
+import os
+import json
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # windows: writers of one process are still serialized
+    fcntl = None
+
+from app.data.periods import SESSION_PERIODS, PERIOD_OFFSETS
+
+logger = logging.getLogger(__name__)
+
+# directory of the cube, off unless set. A relative path is resolved once
+# here against the working directory, so give an absolute one in deployments
+PRICE_CUBE_DIR = os.getenv('PRICE_CUBE_DIR', '')
+if PRICE_CUBE_DIR:
+    PRICE_CUBE_DIR = os.path.abspath(PRICE_CUBE_DIR)
+
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+CLOSE = FIELDS.index('Close')
+
+# spare rows and trading days allocated whenever the data file is rebuilt,
+# so most updates land in place
+SYMBOL_SLACK = 64
+DATE_SLACK = 260
+
+# Layout of PRICE_CUBE_DIR:
+#   index.json   data file name and capacity [symbols, dates], the dates of
+#                the date axis (ISO, ascending) and per symbol its row, first
+#                and last bar date and when its bars were fetched
+#   bars.<n>.f8  float64 array of shape (symbols, dates, FIELDS) in C order,
+#                NaN where a symbol has no bar. One symbol's history is one
+#                contiguous block, so it maps straight into a DataFrame
+#   lock         serializes writers across processes
+# Updates that fit the spare capacity are written in place, then index.json
+# is swapped atomically. Anything else (more symbols, dates before the last
+# one) goes to a new data file; readers keep the old one mapped until they
+# see the new index.
+INDEX_FILE = 'index.json'
+LOCK_FILE = 'lock'
+
+
+# a daily bar frame -> (dates as datetime64[D], float64 values in FIELDS order), None if unusable
+def _bar_values(frame):
+    if not isinstance(frame, pd.DataFrame) or frame.empty or 'Close' not in frame.columns:
+        return None
+    dates = pd.DatetimeIndex(pd.to_datetime(frame.index))
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    dates = dates.normalize()
+
+    values = np.column_stack([
+        pd.to_numeric(frame[field], errors='coerce').to_numpy(dtype=float) if field in frame.columns
+        else np.full(len(frame), np.nan)
+        for field in FIELDS
+    ])
+    keep = ~np.isnan(values[:, CLOSE]) & ~dates.duplicated(keep='last')
+    dates, values = dates[keep], values[keep]
+    if not len(dates):
+        return None
+    order = np.argsort(dates.asi8, kind='stable')
+    return dates.values[order].astype('datetime64[D]'), values[order]
+
+
+# (latest first date that still covers `period`, first date of the period)
+# for a daily series ending at `last`, matching covered_period / slice_period.
+# None when the cube can't answer the period
+@lru_cache(maxsize=256)
+def _period_bounds(last, period):
+    slack = pd.Timedelta(days=7)
+    if period in PERIOD_OFFSETS:
+        start = last - PERIOD_OFFSETS[period]
+        return start + slack, start + pd.Timedelta(days=1)
+    if period == 'ytd':
+        start = last.replace(month=1, day=1)
+        return start + slack, start
+    return None
+
+
+class _View:
+    """One index.json and the data file it points at, mapped read-only."""
+
+    def __init__(self, index, bars):
+        self.bars = bars
+        self.dates = pd.DatetimeIndex(pd.to_datetime(index['dates'], format='%Y-%m-%d'), name='Date')
+        self.order = sorted(index['symbols'], key=lambda symbol: index['symbols'][symbol]['row'])
+        self.spans = {
+            symbol: (entry['row'],
+                     self.dates.searchsorted(pd.Timestamp(entry['first'])),
+                     self.dates.searchsorted(pd.Timestamp(entry['last'])) + 1,
+                     entry['fetched_at'])
+            for symbol, entry in index['symbols'].items()
+        }
+
+    def frame(self, symbol, period, since=None):
+        span = self.spans.get(symbol)
+        if span is None:
+            return None
+        row, lo, hi, fetched_at = span
+        if since is not None and fetched_at < since:
+            return None
+
+        index = self.dates[lo:hi]
+        if period in SESSION_PERIODS:
+            sessions = SESSION_PERIODS[period]
+            if len(index) < sessions:
+                return None
+            start = len(index) - sessions
+        else:
+            bounds = _period_bounds(index[-1], period)
+            if bounds is None or index[0] > bounds[0]:
+                return None
+            start = index.searchsorted(bounds[1])
+
+        values = self.bars[row, lo + start:hi]
+        index = index[start:]
+        # days the symbol did not trade are the only reason to copy
+        gaps = np.isnan(values[:, CLOSE])
+        if gaps.any():
+            values, index = values[~gaps], index[~gaps]
+        return pd.DataFrame(values, index=index, columns=list(FIELDS), copy=False)
+
+
+class PriceCube:
+    """
+    Daily OHLCV of the whole universe on disk, date-aligned and opened with
+    numpy.memmap, so a process reads any number of symbols without
+    decoding anything.
+
+    The ingest path (fetches and background refreshes) merges every batch
+    of daily bars in with update(). Readers call frames() for per-symbol
+    DataFrames that are views of the mapped file, or panel() for one field
+    as a symbols x dates array.
+    """
+
+    def __init__(self, path=PRICE_CUBE_DIR):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = None  # (index.json stat, _View)
+        self._counters = {'hits': 0, 'misses': 0, 'updates': 0, 'rebuilds': 0}
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _read_index(self):
+        try:
+            with open(self._file(INDEX_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _map(self, index, mode='r'):
+        shape = (*index['capacity'], len(FIELDS))
+        return np.memmap(self._file(index['file']), dtype='<f8', mode=mode, shape=shape)
+
+    # the current view, re-read whenever index.json was replaced
+    def _view(self):
+        try:
+            stat = os.stat(self._file(INDEX_FILE))
+        except FileNotFoundError:
+            return None
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        state = self._state
+        if state is not None and state[0] == stamp:
+            return state[1]
+        index = self._read_index()
+        if index is None:
+            return None
+        view = _View(index, self._map(index))
+        self._state = (stamp, view)
+        return view
+
+    def frames(self, symbols, period='1y', max_age=None):
+        """
+        {symbol: DataFrame} of the daily bars of `period`, read-only views of
+        the mapped file (a series with gaps is copied). Symbols the cube
+        doesn't hold, holds less than the period of, or fetched more than
+        max_age seconds ago are left out.
+        """
+        symbols = list(symbols)
+        result = {}
+        if not self.enabled or not symbols:
+            return result
+        try:
+            view = self._view()
+        except Exception as e:
+            logger.warning(f"Price cube at {self.path} unreadable: {e}")
+            view = None
+
+        if view is not None:
+            since = time.time() - max_age if max_age is not None else None
+            for symbol in symbols:
+                frame = view.frame(symbol.upper(), period, since)
+                if frame is not None:
+                    result[symbol] = frame
+        self._counters['hits'] += len(result)
+        self._counters['misses'] += len(symbols) - len(result)
+        return result
+
+    def panel(self, field='Close'):
+        """
+        (symbols, dates, values) for one field across the whole cube. values
+        is a symbols x dates view of the mapped file, NaN where a symbol has
+        no bar, for cross-sectional calculations over the universe.
+        """
+        view = self._view() if self.enabled else None
+        if view is None:
+            return [], pd.DatetimeIndex([], name='Date'), np.empty((0, 0))
+        return list(view.order), view.dates, view.bars[:len(view.order), :len(view.dates), FIELDS.index(field)]
+
+    @contextmanager
+    def _write_lock(self):
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, open(self._file(LOCK_FILE), 'a') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            yield
+
+    def update(self, frames, fetched_at=None):
+        """
+        Merge {symbol: daily bar frame} into the cube. The dates given
+        replace what is stored and older bars stay, so incremental tails can
+        be passed as they are. Returns the number of symbols written.
+        """
+        if not self.enabled:
+            return 0
+        incoming = {}
+        for symbol, frame in frames.items():
+            bars = _bar_values(frame)
+            if bars is not None:
+                incoming[symbol.upper()] = bars
+        if not incoming:
+            return 0
+        fetched_at = fetched_at or time.time()
+
+        with self._write_lock():
+            index = self._read_index()
+            symbols = index['symbols'] if index else {}
+            dates = np.array(index['dates'], dtype='datetime64[D]') if index else np.array([], dtype='datetime64[D]')
+
+            new_dates = np.setdiff1d(np.concatenate([bars[0] for bars in incoming.values()]), dates)
+            new_symbols = [symbol for symbol in incoming if symbol not in symbols]
+            all_dates = np.union1d(dates, new_dates)
+
+            in_place = (
+                index is not None
+                and (not len(new_dates) or not len(dates) or new_dates[0] > dates[-1])
+                and len(all_dates) <= index['capacity'][1]
+                and len(symbols) + len(new_symbols) <= index['capacity'][0]
+            )
+            if in_place:
+                bars = self._map(index, mode='r+')
+                new_index = dict(index)
+            else:
+                generation = index['generation'] + 1 if index else 1
+                new_index = {
+                    'version': 1,
+                    'generation': generation,
+                    'file': f"bars.{generation}.f8",
+                    'capacity': [len(symbols) + len(new_symbols) + SYMBOL_SLACK, len(all_dates) + DATE_SLACK],
+                }
+                bars = self._map(new_index, mode='w+')
+                bars[:] = np.nan
+                if index and symbols:
+                    old = self._map(index)
+                    bars[:len(symbols), np.searchsorted(all_dates, dates)] = old[:len(symbols), :len(dates)]
+                    del old
+                self._counters['rebuilds'] += 1
+
+            for symbol, (symbol_dates, values) in incoming.items():
+                entry = symbols.setdefault(symbol, {'row': len(symbols)})
+                bars[entry['row'], np.searchsorted(all_dates, symbol_dates)] = values
+                first, last = str(symbol_dates[0]), str(symbol_dates[-1])
+                entry['first'] = min(entry.get('first', first), first)
+                entry['last'] = max(entry.get('last', last), last)
+                entry['fetched_at'] = fetched_at
+            bars.flush()
+            del bars
+
+            new_index['dates'] = [str(date) for date in all_dates]
+            new_index['symbols'] = symbols
+            tmp = self._file(f"{INDEX_FILE}.{os.getpid()}.tmp")
+            with open(tmp, 'w') as f:
+                json.dump(new_index, f)
+            os.replace(tmp, self._file(INDEX_FILE))
+
+            if index and not in_place:
+                try:
+                    os.remove(self._file(index['file']))
+                except OSError as e:
+                    logger.debug(f"Could not remove old price cube file {index['file']}: {e}")
+
+        self._counters['updates'] += 1
+        return len(incoming)
+
+    def stats(self):
+        stats = dict(self._counters)
+        view = None
+        try:
+            view = self._view() if self.enabled else None
+        except Exception as e:
+            logger.debug(f"Price cube stats unavailable: {e}")
+        stats['path'] = self.path
+        stats['symbols'] = len(view.order) if view else 0
+        stats['dates'] = len(view.dates) if view else 0
+        stats['bytes'] = int(view.bars.nbytes) if view else 0
+        return stats
+
+
+price_cube = PriceCube()
@@ -2,12 +2,24 @@ import time
 from app.database.connection import SessionLocal
 from app.database.models import Stock
 from app.data.yfinance_fetcher import _fetch_fresh_data
-from app.data.redis_cache import set_price
+from app.data.redis_cache import get_prices, set_prices, bump_data_version, CACHE_POLICIES
 import logging
 logger = logging.getLogger(__name__)
 
 
-REFRESH_INTERVAL = 300
+# quotes are the fastest moving component, see CACHE_POLICIES
+REFRESH_INTERVAL = CACHE_POLICIES['quote']['fresh']
+
+# callables taking {symbol: price} for the prices that changed in a cycle,
+# e.g. StandingWatchlists.on_prices
+_price_listeners = []
+
+def add_price_listener(callback):
+    _price_listeners.append(callback)
+
+def remove_price_listener(callback):
+    if callback in _price_listeners:
+        _price_listeners.remove(callback)
 
 def get_all_symbols(): # get all symbol from database 
     session = SessionLocal()
@@ -23,19 +35,45 @@ def fetch_and_cache_prices():
         logger.info("No symbols found in database.")
         return
 
-    fresh_data = _fetch_fresh_data(symbols, period="1d", interval="1m")
+    fresh_data = _fetch_fresh_data(symbols, period="1d", interval="1m", include_info=False)
+    updated = {}
     for symbol, data in fresh_data.items():
         try:
             hist = data.get('historical')
             if hist is not None and not hist.empty:
-                latest_price = hist['Close'].iloc[-1]
-                set_price(symbol, latest_price)
-                logger.info(f"Updated Redis: {symbol} = {latest_price}")
+                updated[symbol] = float(hist['Close'].iloc[-1])
             else:
                 logger.info(f"No historical data for {symbol}")
         except Exception as e:
             logger.error(f"Error updating price for {symbol}: {e}")
 
+    if updated:
+        # off-hours the same last close comes back every cycle, only moved
+        # prices make cached screens stale
+        try:
+            previous = get_prices(list(updated))
+        except Exception as e:
+            logger.warning(f"Could not read previous prices from Redis: {e}")
+            previous = {}
+        changed = {symbol: price for symbol, price in updated.items() if previous.get(symbol) != price}
+
+        try:
+            set_prices(updated)
+            logger.info(f"Updated Redis prices for {len(updated)} symbols, {len(changed)} changed")
+        except Exception as e:
+            logger.error(f"Error writing prices to Redis: {e}")
+            return {}
+        if not changed:
+            return updated
+        bump_data_version()
+
+        for callback in list(_price_listeners):
+            try:
+                callback(changed)
+            except Exception as e:
+                logger.error(f"Price listener {callback} failed: {e}")
+    return updated
+
 def main():
     print("Starting price worker...")
     while True:
@@ -0,0 +1,40 @@
+import os
+import threading
+import logging
+from .base import MarketDataProvider, OHLCV_COLUMNS
+from .yahoo import YFinanceProvider
+from .synthetic import SyntheticProvider
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = {
+    'yfinance': YFinanceProvider,
+    'synthetic': SyntheticProvider,
+}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+# process-wide provider, picked by MARKET_DATA_PROVIDER (default yfinance)
+def get_provider():
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                name = os.getenv('MARKET_DATA_PROVIDER', 'yfinance')
+                if name not in PROVIDERS:
+                    logger.error(f"Unknown market data provider: {name}, using yfinance")
+                    name = 'yfinance'
+                _provider = PROVIDERS[name]()
+    return _provider
+
+
+# swap the provider, by name or instance (e.g. set_provider(SyntheticProvider(latency_ms=50)))
+def set_provider(provider):
+    global _provider
+    if isinstance(provider, str):
+        provider = PROVIDERS[provider]()
+    with _provider_lock:
+        _provider = provider
+    return provider
@@ -0,0 +1,42 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional
+import pandas as pd
+
+# columns every provider returns bars with, indexed by a "Date" DatetimeIndex
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class MarketDataProvider(ABC):
+    """
+    Where market data comes from. The fetcher, the price worker and the
+    symbol lists only talk to this interface, so the source can be swapped
+    (see get_provider / set_provider).
+
+    download_bars gets one batch of symbols at a time, the caller does the
+    batching. Symbols without data are simply left out of the result.
+    """
+
+    name = "base"
+    # index lists from this provider may go to the shared Redis/DB constituent cache
+    cache_constituents = True
+
+    @abstractmethod
+    def download_bars(self, symbols: List[str], period: str = "1y", interval: str = "1d",
+                      start=None) -> Dict[str, pd.DataFrame]:
+        ...
+
+    @abstractmethod
+    def get_quotes(self, symbols: List[str]) -> Dict[str, float]:
+        ...
+
+    @abstractmethod
+    def get_info(self, symbol: str) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def get_financials(self, symbol: str) -> Dict[str, Optional[pd.DataFrame]]:
+        ...
+
+    @abstractmethod
+    def get_index_constituents(self, index: str) -> List[str]:
+        ...
@@ -0,0 +1,294 @@
+from typing import Dict, Any, List
+import os
+import time
+import random
+import string
+import zlib
+import logging
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from app.data.rate_limit import RateLimitError
+from app.data.periods import PERIODS, slice_period
+from .base import MarketDataProvider, OHLCV_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_SEED = int(os.getenv('SYNTHETIC_SEED', 42))
+# injected latency per call, plus per symbol in the call
+SYNTHETIC_LATENCY_MS = float(os.getenv('SYNTHETIC_LATENCY_MS', 0))
+SYNTHETIC_LATENCY_PER_SYMBOL_MS = float(os.getenv('SYNTHETIC_LATENCY_PER_SYMBOL_MS', 0))
+# share of calls answered with a rate limit error, to exercise retries and backoff
+SYNTHETIC_THROTTLE_RATE = float(os.getenv('SYNTHETIC_THROTTLE_RATE', 0))
+# symbols returned for index "all", the named indexes are slices of it
+SYNTHETIC_UNIVERSE = int(os.getenv('SYNTHETIC_UNIVERSE', 600))
+
+# every daily series starts here, so any window of it is the same on every run
+ORIGIN = pd.Timestamp("2000-01-03")
+
+INDEX_SLICES = {
+    'dow30': (0, 30),
+    'nasdaq100': (20, 120),
+    'sp500': (0, 500),
+}
+
+SECTORS = {
+    'Technology': ['Software - Infrastructure', 'Semiconductors', 'Consumer Electronics'],
+    'Healthcare': ['Drug Manufacturers - General', 'Medical Devices', 'Biotechnology'],
+    'Financial Services': ['Banks - Diversified', 'Asset Management', 'Insurance - Diversified'],
+    'Consumer Cyclical': ['Internet Retail', 'Auto Manufacturers', 'Restaurants'],
+    'Industrials': ['Aerospace & Defense', 'Railroads', 'Specialty Industrial Machinery'],
+    'Energy': ['Oil & Gas Integrated', 'Oil & Gas E&P'],
+    'Consumer Defensive': ['Discount Stores', 'Beverages - Non-Alcoholic', 'Household & Personal Products'],
+    'Utilities': ['Utilities - Regulated Electric'],
+    'Communication Services': ['Internet Content & Information', 'Telecom Services'],
+    'Real Estate': ['REIT - Specialty', 'REIT - Industrial'],
+    'Basic Materials': ['Specialty Chemicals', 'Gold'],
+}
+
+INTRADAY_MINUTES = {'1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30, '60m': 60, '90m': 90, '1h': 60}
+RESAMPLE_RULES = {'1wk': 'W-FRI', '1mo': 'MS', '3mo': 'QS'}
+OHLCV_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+# weekdays from ORIGIN to end, built once per day (pd.bdate_range is slow at this length)
+@lru_cache(maxsize=8)
+def _business_days(end):
+    days = np.arange(np.datetime64(ORIGIN.date()), np.datetime64(end.date()) + 1, dtype='datetime64[D]')
+    days = days[np.is_busday(days)]
+    return pd.DatetimeIndex(days, name="Date")
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Offline, deterministic market data for benchmarks and load tests.
+
+    Every symbol gets its own seeded random walk for prices and a matching
+    set of fundamentals, so the same seed always produces the same data and
+    any symbol name works. Latency and throttling can be injected to mimic a
+    remote API. Pass as_of to pin "today" as well.
+    """
+
+    name = "synthetic"
+    # the universe is generated, keep it out of the caches a real provider fills
+    cache_constituents = False
+
+    def __init__(self, seed=SYNTHETIC_SEED, latency_ms=SYNTHETIC_LATENCY_MS,
+                 latency_per_symbol_ms=SYNTHETIC_LATENCY_PER_SYMBOL_MS,
+                 throttle_rate=SYNTHETIC_THROTTLE_RATE, universe_size=SYNTHETIC_UNIVERSE, as_of=None):
+        self.seed = seed
+        self.latency_ms = latency_ms
+        self.latency_per_symbol_ms = latency_per_symbol_ms
+        self.throttle_rate = throttle_rate
+        self._throttle_random = random.Random(seed)
+        self.universe_size = universe_size
+        self.as_of = pd.Timestamp(as_of).normalize() if as_of is not None else None
+
+    def _rng(self, symbol, *salt):
+        return np.random.default_rng([self.seed, zlib.crc32(symbol.encode()), *salt])
+
+    def _wait(self, n_symbols):
+        delay = self.latency_ms + self.latency_per_symbol_ms * n_symbols
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        if self.throttle_rate and self._throttle_random.random() < self.throttle_rate:
+            raise RateLimitError("Too Many Requests (synthetic)")
+
+    def _today(self):
+        return self.as_of if self.as_of is not None else pd.Timestamp.now().normalize()
+
+    def _profile(self, symbol):
+        rng = self._rng(symbol, 0)
+        sector = list(SECTORS)[rng.integers(len(SECTORS))]
+        industries = SECTORS[sector]
+        return {
+            'sector': sector,
+            'industry': industries[rng.integers(len(industries))],
+            'start_price': float(np.exp(rng.uniform(np.log(5), np.log(300)))),
+            'drift': float(rng.normal(0.08, 0.06)),
+            'volatility': float(rng.uniform(0.15, 0.55)),
+            'beta': float(np.round(rng.uniform(0.4, 1.9), 2)),
+            'shares': float(np.round(np.exp(rng.uniform(np.log(5e7), np.log(1.5e10))), -5)),
+            'earnings_yield': float(rng.normal(0.05, 0.035)),
+            'book_to_price': float(rng.uniform(0.05, 0.9)),
+            'payout': float(rng.uniform(0.0, 0.6)) if rng.random() < 0.6 else 0.0,
+            'avg_volume': float(np.exp(rng.uniform(np.log(3e5), np.log(6e7)))),
+        }
+
+    def _daily(self, symbol, end):
+        dates = _business_days(end)
+        n = len(dates)
+        profile = self._profile(symbol)
+        daily_vol = profile['volatility'] / np.sqrt(252)
+
+        # one generator per series keeps every series a prefix of the longer one
+        returns = self._rng(symbol, 1).normal(profile['drift'] / 252 - daily_vol ** 2 / 2, daily_vol, n)
+        close = profile['start_price'] * np.exp(np.cumsum(returns))
+        gaps = self._rng(symbol, 2).normal(0, daily_vol / 4, n)
+        prev_close = np.concatenate(([profile['start_price']], close[:-1]))
+        open_ = prev_close * np.exp(gaps)
+        upper = np.abs(self._rng(symbol, 3).normal(0, daily_vol / 2, n))
+        lower = np.abs(self._rng(symbol, 8).normal(0, daily_vol / 2, n))
+        high = np.maximum(open_, close) * (1 + upper)
+        low = np.minimum(open_, close) * (1 - lower)
+        volume = (profile['avg_volume'] * self._rng(symbol, 4).lognormal(0, 0.35, n)).astype(np.int64)
+
+        return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=dates)
+
+    def _window(self, daily, period, start):
+        if start is not None:
+            return daily[daily.index >= pd.Timestamp(start).normalize()]
+        if period is not None and period not in PERIODS:
+            raise ValueError(f"Unsupported period: {period}")
+        return slice_period(daily, period)
+
+    def _intraday(self, symbol, daily, minutes):
+        per_day = 390 // minutes
+        frames = []
+        for day, row in daily.iterrows():
+            rng = self._rng(symbol, 5, day.toordinal(), minutes)
+            # brownian bridge from the day's open to its close
+            steps = rng.normal(0, row['Close'] * 0.0008 * np.sqrt(minutes), per_day)
+            path = row['Open'] + np.cumsum(steps)
+            path += np.linspace(0, 1, per_day) * (row['Close'] - path[-1])
+            opens = np.concatenate(([row['Open']], path[:-1]))
+            spread = np.abs(rng.normal(0, row['Close'] * 0.0004, (2, per_day)))
+            volume = rng.dirichlet(np.ones(per_day)) * row['Volume']
+            index = day + pd.Timedelta(hours=9, minutes=30) + pd.to_timedelta(np.arange(per_day) * minutes, unit='min')
+            frames.append(pd.DataFrame({
+                'Open': opens,
+                'High': np.maximum(opens, path) + spread[0],
+                'Low': np.minimum(opens, path) - spread[1],
+                'Close': path,
+                'Volume': volume.astype(np.int64),
+            }, index=index))
+        if not frames:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        df = pd.concat(frames)
+        df.index.name = "Date"
+        return df
+
+    def _bars(self, symbol, period, interval, start):
+        daily = self._window(self._daily(symbol, self._today()), period, start)
+
+        if interval == '1d':
+            return daily
+        if interval in INTRADAY_MINUTES:
+            return self._intraday(symbol, daily, INTRADAY_MINUTES[interval])
+        if interval in RESAMPLE_RULES:
+            return daily.resample(RESAMPLE_RULES[interval]).agg(OHLCV_AGG).dropna()
+        raise ValueError(f"Unsupported interval: {interval}")
+
+    def download_bars(self, symbols, period="1y", interval="1d", start=None):
+        self._wait(len(symbols))
+        result = {}
+        for symbol in symbols:
+            bars = self._bars(symbol, period, interval, start)
+            if not bars.empty:
+                result[symbol] = bars
+        return result
+
+    def get_quotes(self, symbols):
+        self._wait(len(symbols))
+        end = self._today()
+        return {symbol: float(self._daily(symbol, end)['Close'].iloc[-1]) for symbol in symbols}
+
+    def get_info(self, symbol):
+        self._wait(1)
+        profile = self._profile(symbol)
+        daily = self._daily(symbol, self._today())
+        last_year = daily.iloc[-252:]
+        price = float(daily['Close'].iloc[-1])
+
+        eps = price * profile['earnings_yield']
+        book_value = price * profile['book_to_price']
+        dividend_rate = max(eps, 0) * profile['payout']
+
+        info = {
+            'symbol': symbol,
+            'shortName': f"{symbol} Corp",
+            'longName': f"{symbol} Corporation",
+            'quoteType': 'EQUITY',
+            'currency': 'USD',
+            'exchange': 'SYN',
+            'sector': profile['sector'],
+            'industry': profile['industry'],
+            'currentPrice': price,
+            'regularMarketPrice': price,
+            'previousClose': float(daily['Close'].iloc[-2]) if len(daily) > 1 else price,
+            'sharesOutstanding': profile['shares'],
+            'marketCap': price * profile['shares'],
+            'trailingEps': eps,
+            'forwardEps': eps * 1.08,
+            'bookValue': book_value,
+            'priceToBook': price / book_value,
+            'dividendRate': dividend_rate,
+            # Yahoo reports dividendYield in percent
+            'dividendYield': 100 * dividend_rate / price,
+            'beta': profile['beta'],
+            'averageVolume': int(last_year['Volume'].mean()),
+            'fiftyTwoWeekHigh': float(last_year['High'].max()),
+            'fiftyTwoWeekLow': float(last_year['Low'].min()),
+        }
+        # negative earnings have no P/E, same as Yahoo
+        if eps > 0:
+            info['trailingPE'] = price / eps
+            info['forwardPE'] = price / info['forwardEps']
+        return info
+
+    def get_financials(self, symbol):
+        self._wait(1)
+        profile = self._profile(symbol)
+        rng = self._rng(symbol, 6)
+        price = float(self._daily(symbol, self._today())['Close'].iloc[-1])
+
+        years = [pd.Timestamp(year=self._today().year - i - 1, month=12, day=31) for i in range(4)]
+        growth = np.cumprod(np.concatenate(([1.0], 1 / (1 + rng.normal(0.06, 0.05, 3)))))
+
+        net_income = price * profile['earnings_yield'] * profile['shares'] * growth
+        revenue = np.abs(net_income) / rng.uniform(0.05, 0.3) + price * profile['shares'] * 0.1 * growth
+        equity = price * profile['book_to_price'] * profile['shares'] * growth
+        assets = equity * rng.uniform(1.5, 4.0)
+        operating_cash = net_income * rng.uniform(1.0, 1.5) + revenue * 0.02
+        capex = -revenue * rng.uniform(0.02, 0.1)
+
+        return {
+            'income_statement': pd.DataFrame({
+                'Total Revenue': revenue,
+                'Gross Profit': revenue * rng.uniform(0.25, 0.7),
+                'Operating Income': net_income * 1.25,
+                'Net Income': net_income,
+            }, index=years).T,
+            'balance_sheet': pd.DataFrame({
+                'Total Assets': assets,
+                'Total Liabilities Net Minority Interest': assets - equity,
+                'Stockholders Equity': equity,
+            }, index=years).T,
+            'cash_flow': pd.DataFrame({
+                'Operating Cash Flow': operating_cash,
+                'Capital Expenditure': capex,
+                'Free Cash Flow': operating_cash + capex,
+            }, index=years).T,
+        }
+
+    def _universe(self):
+        rng = np.random.default_rng([self.seed, 7])
+        letters = np.array(list(string.ascii_uppercase))
+        symbols = []
+        seen = set()
+        while len(symbols) < self.universe_size:
+            symbol = ''.join(rng.choice(letters, rng.integers(2, 5)))
+            if symbol not in seen:
+                seen.add(symbol)
+                symbols.append(symbol)
+        return symbols
+
+    def get_index_constituents(self, index):
+        universe = self._universe()
+        if index == 'all':
+            return universe
+        if index not in INDEX_SLICES:
+            logger.error(f"Unknown index: {index}, try sp500/dow30/nasdaq100/all")
+            return []
+        first, last = INDEX_SLICES[index]
+        return universe[first:last]
@@ -0,0 +1,162 @@
+from typing import Dict, Any, List
+import logging
+import traceback
+import pandas as pd
+import yfinance as yf
+from app.data.rate_limit import TransientProviderError, is_transient_error
+from .base import MarketDataProvider, OHLCV_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Yahoo Finance through yfinance, index lists from Wikipedia."""
+
+    name = "yfinance"
+
+    def download_bars(self, symbols, period="1y", interval="1d", start=None):
+        if not symbols:
+            return {}
+        if len(symbols) == 1:
+            return self._download_one(symbols[0], period, interval, start)
+
+        # with a start date only the bars from there on are requested
+        data = yf.download(
+            tickers=symbols,
+            period=None if start else period,
+            start=start,
+            interval=interval,
+            group_by="ticker",
+            auto_adjust=True,
+            prepost=False,
+            threads=True,
+            progress=False,
+        )
+
+        result = {}
+        if data is not None:
+            for symbol in symbols:
+                symbol_df = self._clean(symbol, data.get(symbol))
+                if symbol_df is not None:
+                    result[symbol] = symbol_df
+
+        # yf.download only logs per-ticker errors, the frame is all there is:
+        # tickers without bars are left out, but a batch without any bars at
+        # all is what throttling or an outage looks like, so it is retried
+        if not result:
+            raise TransientProviderError(f"Yahoo returned no bars for any of {len(symbols)} symbols")
+        missing = [symbol for symbol in symbols if symbol not in result]
+        if missing:
+            logger.warning(f"No data available for {len(missing)}/{len(symbols)} symbols of the batch: {missing}")
+        return result
+
+    # a single ticker goes through Ticker.history, which raises what went
+    # wrong (throttling, missing prices) instead of only logging it
+    def _download_one(self, symbol, period, interval, start):
+        window = {"start": start} if start else {"period": period}
+        try:
+            data = yf.Ticker(symbol).history(interval=interval, auto_adjust=True, prepost=False,
+                                             raise_errors=True, **window)
+        except Exception as e:
+            if is_transient_error(e):
+                raise
+            logger.warning(f"No data available for {symbol}: {e}")
+            return {}
+
+        # yf.download drops the timezone of daily and longer bars, so does this
+        if interval[-1] not in "mh" and getattr(data.index, "tz", None) is not None:
+            data.index = data.index.tz_localize(None)
+        symbol_df = self._clean(symbol, data)
+        return {symbol: symbol_df} if symbol_df is not None else {}
+
+    # one ticker's bars -> OHLCV frame, None when there are none
+    def _clean(self, symbol, symbol_df):
+        try:
+            if symbol_df is None or not hasattr(symbol_df, "empty") or symbol_df.empty:
+                return None
+
+            # Flatten MultiIndex -> "AAPL_Close" then strip "AAPL_"
+            if isinstance(symbol_df.columns, pd.MultiIndex):
+                symbol_df = symbol_df.copy()
+                symbol_df.columns = [
+                    "_".join(col).strip() if isinstance(col, tuple) else col
+                    for col in symbol_df.columns.values
+                ]
+                prefix = f"{symbol}_"
+                rename_map = {c: c[len(prefix):] for c in symbol_df.columns if c.startswith(prefix)}
+                if rename_map:
+                    symbol_df = symbol_df.rename(columns=rename_map)
+
+            # Expected OHLCV columns
+            expected_cols = set(OHLCV_COLUMNS)
+            have_cols = set(symbol_df.columns)
+            if not expected_cols.issubset(have_cols):
+                logger.warning(f"Column mismatch for {symbol}: have {list(have_cols)}, expected {list(expected_cols)}")
+
+            # Keep only standard OHLCV if present
+            wanted_cols = [c for c in OHLCV_COLUMNS if c in symbol_df.columns]
+            if wanted_cols:
+                symbol_df = symbol_df[wanted_cols]
+
+            symbol_df = symbol_df.dropna()
+            if symbol_df.empty:
+                logger.debug(f"No valid data for {symbol} after dropna()")
+                return None
+            return symbol_df
+
+        except Exception as e:
+            logger.error(f"Error processing data for {symbol}: {e}\n{traceback.format_exc()}")
+            return None
+
+    def get_quotes(self, symbols):
+        bars = self.download_bars(symbols, period="1d", interval="1m")
+        return {symbol: float(df["Close"].iloc[-1]) for symbol, df in bars.items() if "Close" in df.columns}
+
+    def get_info(self, symbol):
+        info = {"symbol": symbol}
+        t = yf.Ticker(symbol)
+
+        # fast_info (lightweight)
+        try:
+            fi = getattr(t, "fast_info", None)
+            if fi:
+                info.update(dict(fi))
+        except Exception:
+            pass
+
+        # info (heavier / flaky)
+        try:
+            ticker_info = t.info
+            if isinstance(ticker_info, dict) and ticker_info:
+                info.update(ticker_info)
+        except Exception as e:
+            if is_transient_error(e):
+                raise
+            logger.debug(f"ticker.info failed for {symbol}: {e}\n{traceback.format_exc()}")
+
+        return info
+
+    def get_financials(self, symbol):
+        t = yf.Ticker(symbol)
+        return {
+            "income_statement": t.income_stmt,
+            "balance_sheet": t.balance_sheet,
+            "cash_flow": t.cashflow,
+        }
+
+    def get_index_constituents(self, index):
+        if index == "sp500":
+            table = pd.read_html('https://en.wikipedia.org/wiki/List_of_S%26P_500_companies')
+            df = table[0]
+            return df['Symbol'].str.replace('.', '-').tolist()
+        elif index == "nasdaq100":
+            table = pd.read_html('https://en.wikipedia.org/wiki/Nasdaq-100')
+            df = table[4]
+            return df['Ticker'].tolist()
+        elif index == "dow30":
+            table = pd.read_html('https://en.wikipedia.org/wiki/Dow_Jones_Industrial_Average')
+            df = table[2]
+            return df['Symbol'].tolist()
+        else:
+            logger.error(f"Unknown index: {index}, try sp500/dow30/nasdaq100")
+            return []
@@ -0,0 +1,274 @@
+import os
+import time
+import random
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# provider requests per second across the process (or all processes with the redis backend)
+PROVIDER_RATE_LIMIT = float(os.getenv('PROVIDER_RATE_LIMIT', 5))
+PROVIDER_RATE_BURST = float(os.getenv('PROVIDER_RATE_BURST', 10))
+PROVIDER_RATE_BACKEND = os.getenv('PROVIDER_RATE_BACKEND', 'local')  # local | redis
+
+PROVIDER_RETRIES = int(os.getenv('PROVIDER_RETRIES', 4))
+BACKOFF_BASE = float(os.getenv('PROVIDER_BACKOFF_BASE', 1.0))
+BACKOFF_MAX = float(os.getenv('PROVIDER_BACKOFF_MAX', 30.0))
+
+RATE_LIMIT_MARKERS = ("too many requests", "rate limit", "429")
+
+# failures that can clear on their own: throttling, server errors, timeouts
+TRANSIENT_STATUS_CODES = (429, 500, 502, 503, 504)
+TRANSIENT_ERROR_NAMES = ("Timeout", "ConnectTimeout", "ReadTimeout", "ConnectionError")
+TRANSIENT_MARKERS = ("timed out", "timeout", "connection reset", "connection aborted",
+                     "temporarily unavailable", "service unavailable", "bad gateway")
+
+
+class RateLimitError(Exception):
+    """The provider told us to slow down."""
+
+
+class TransientProviderError(Exception):
+    """The provider failed in a way a later attempt may not, e.g. an empty answer to a whole batch."""
+
+
+def is_rate_limit_error(error):
+    if isinstance(error, RateLimitError) or type(error).__name__ == "YFRateLimitError":
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in RATE_LIMIT_MARKERS)
+
+
+# HTTP status of a requests/curl style error, None when it has none
+def _status_code(error):
+    response = getattr(error, "response", None)
+    for status in (getattr(response, "status_code", None), getattr(error, "status_code", None)):
+        if isinstance(status, int):
+            return status
+    return None
+
+
+# worth retrying? Anything else (bad symbol, missing prices, bugs) fails the same way again
+def is_transient_error(error):
+    if is_rate_limit_error(error) or isinstance(error, (TransientProviderError, TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return status in TRANSIENT_STATUS_CODES
+    if type(error).__name__ in TRANSIENT_ERROR_NAMES:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in TRANSIENT_MARKERS)
+
+
+class TokenBucket:
+    """
+    In-process token bucket: `rate` tokens per second, at most `capacity`
+    banked. penalize() pushes the balance negative so every caller backs
+    off together after the provider throttles one of them.
+    """
+
+    def __init__(self, rate=PROVIDER_RATE_LIMIT, capacity=PROVIDER_RATE_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    # take tokens if available, otherwise seconds until they will be
+    def _reserve(self, tokens):
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1, timeout=None):
+        if self.rate <= 0:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+
+# refill and take in one round trip, using the server clock so every worker agrees
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = (requested - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+_PENALIZE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local seconds = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(0, math.min(capacity, tokens + (now - ts) * rate)) - seconds * rate
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate + seconds) + 60)
+return tostring(tokens)
+"""
+
+
+class RedisTokenBucket(TokenBucket):
+    """
+    Same bucket kept in Redis, so API processes and workers share one budget.
+    Falls back to the in-process bucket while Redis is unreachable.
+    """
+
+    def __init__(self, name="provider", rate=PROVIDER_RATE_LIMIT, capacity=PROVIDER_RATE_BURST, client=None):
+        super().__init__(rate, capacity)
+        self.key = f"ratelimit:{name}"
+        if client is None:
+            from app.data.redis_cache import redis_client as client
+        self._client = client
+        self._take = client.register_script(_TAKE_SCRIPT)
+        self._penalize = client.register_script(_PENALIZE_SCRIPT)
+        self._redis_down = False
+
+    def _redis_failed(self, e):
+        if not self._redis_down:
+            logger.warning(f"Redis rate limiter unavailable, limiting in-process: {e}")
+        self._redis_down = True
+
+    def _reserve(self, tokens):
+        try:
+            wait = float(self._take(keys=[self.key], args=[self.rate, self.capacity, tokens]))
+            self._redis_down = False
+            return wait
+        except Exception as e:
+            self._redis_failed(e)
+            return super()._reserve(tokens)
+
+    def penalize(self, seconds):
+        try:
+            self._penalize(keys=[self.key], args=[self.rate, self.capacity, seconds])
+        except Exception as e:
+            self._redis_failed(e)
+            super().penalize(seconds)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+# shared limiter for all provider calls, PROVIDER_RATE_BACKEND picks local or redis
+def get_limiter():
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                if PROVIDER_RATE_BACKEND == 'redis':
+                    _limiter = RedisTokenBucket()
+                else:
+                    _limiter = TokenBucket()
+    return _limiter
+
+
+def set_limiter(limiter):
+    global _limiter
+    with _limiter_lock:
+        _limiter = limiter
+    return limiter
+
+
+# "full jitter": uniform in [0, min(cap, base * 2^attempt)]
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def call_with_retry(fn, *args, limiter=None, attempts=None, base=None, cap=None, retry_if=is_transient_error, **kwargs):
+    """
+    Call fn through the limiter, retrying transient failures (retry_if)
+    with exponential backoff and jitter. When the provider throttles us the
+    whole limiter is paused for the backoff, not just this caller. Other
+    errors and the last transient one are re-raised.
+    """
+    attempts = attempts or PROVIDER_RETRIES
+    base = BACKOFF_BASE if base is None else base
+    cap = BACKOFF_MAX if cap is None else cap
+    for attempt in range(attempts):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == attempts - 1 or not retry_if(e):
+                raise
+            delay = backoff_delay(attempt, base, cap)
+            if is_rate_limit_error(e):
+                # at least the un-jittered step, throttling rarely clears faster
+                delay = max(delay, min(cap, base * (2 ** attempt)))
+                if limiter is not None:
+                    limiter.penalize(delay)
+                logger.warning(f"Rate limited, backing off {delay:.1f}s (attempt {attempt + 1}/{attempts})")
+            else:
+                logger.debug(f"Provider call failed, retrying in {delay:.1f}s (attempt {attempt + 1}/{attempts}): {e}")
+            time.sleep(delay)
+
+
+class AdaptiveBatchSizer:
+    """
+    Batch size for provider downloads, additive increase / multiplicative
+    decrease: grows by `step` after a clean batch, halves when a batch is
+    throttled or too many of its symbols fail.
+    """
+
+    def __init__(self, initial=20, minimum=1, maximum=50, step=2, max_error_rate=0.2):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.step = step
+        self.max_error_rate = max_error_rate
+        self._size = initial
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        with self._lock:
+            return self._size
+
+    def record(self, requested, failed, throttled=False):
+        with self._lock:
+            error_rate = failed / requested if requested else 0.0
+            if throttled or error_rate > self.max_error_rate:
+                self._size = max(self.minimum, self._size // 2)
+            elif failed == 0:
+                self._size = min(self.maximum, self._size + self.step)
+            return self._size
@@ -1,35 +1,187 @@
 import redis
 import os
 import json
+import time
+import logging
+from collections import namedtuple
+from datetime import datetime
 import pandas as pd
 import numpy as np
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from app.data.periods import period_covers, slice_period, covered_period
+from app.data.bar_codec import split_bars, join_bars
+from app.data.local_cache import local_cache, entry_size, PRICE_SIZE
+
+logger = logging.getLogger(__name__)
 
 # Connect to Redis (default: localhost:6379)
 REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
 REDIS_DB = int(os.getenv('REDIS_DB', 0))
 redis_client = redis.StrictRedis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+# bars are stored binary (see bar_codec), so stock data is read without decoding
+redis_binary = redis.StrictRedis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=False)
 
 # ex: APPL -> price:APPL
 def _price_key(symbol):
     return f"price:{symbol.upper()}"
 
-# Get price from Redis cache
+# Get price from the local cache or Redis
 def get_price(symbol):
-    price = redis_client.get(_price_key(symbol))
-    if price is not None:
+    return get_prices([symbol]).get(symbol)
+
+# one MGET for many symbols -> {symbol: price}, symbols without a price are left out.
+# prices already in this process (see local_cache) skip Redis
+def get_prices(symbols):
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+
+    prices = {}
+    tokens = {}
+    if local_cache.usable:
+        for symbol in symbols:
+            price = local_cache.get(('price', symbol.upper()))
+            if price is not None:
+                prices[symbol] = price
+            else:
+                tokens[symbol] = local_cache.token('price', symbol)
+        symbols = list(tokens)
+        if not symbols:
+            return prices
+
+    values = redis_client.mget([_price_key(symbol) for symbol in symbols])
+    for symbol, value in zip(symbols, values):
+        if value is None:
+            continue
         try:
-            return float(price)
+            prices[symbol] = float(value)
         except ValueError:
-            return None
-    return None
+            continue
+        if symbol in tokens:
+            local_cache.put(('price', symbol.upper()), prices[symbol], PRICE_SIZE, tokens[symbol])
+    return prices
+
+# each part of a symbol's data has its own key and freshness windows (seconds):
+#   age < fresh          -> served as is, no refresh
+#   fresh <= age < stale -> served, one background revalidation is scheduled
+#   age >= stale         -> expired, refetched before serving (kept until ttl
+#                           only as a fallback for when the provider is down)
+def _policy(kind, fresh, stale, ttl):
+    return {
+        'fresh': int(os.getenv(f'CACHE_FRESH_{kind.upper()}', fresh)),
+        'stale': int(os.getenv(f'CACHE_STALE_{kind.upper()}', stale)),
+        'ttl': int(os.getenv(f'CACHE_TTL_{kind.upper()}', ttl)),
+    }
+
+DAY = 86400
+CACHE_POLICIES = {
+    'quote': _policy('quote', 60, 300, 900),
+    'bars': _policy('bars', DAY, 3 * DAY, 7 * DAY),
+    'info': _policy('info', DAY, 3 * DAY, 7 * DAY),
+    'financials': _policy('financials', 7 * DAY, 30 * DAY, 60 * DAY),
+}
+
+FRESH, STALE, EXPIRED = 'fresh', 'stale', 'expired'
+
+# components refreshed through the fetcher, quotes have the price worker
+DATA_COMPONENTS = ('bars', 'info', 'financials')
+
+# where each component lives in the stock data dicts passed around the app
+COMPONENT_FIELDS = {'bars': 'historical', 'info': 'info', 'financials': 'financials'}
+
+# Layout per symbol, so a read only pulls what it needs (see Projection):
+#   stockdata:AAPL:columns:1d  hash of the bars at one interval, one series
+#                              covering the longest period fetched: _index
+#                              (timestamps), _columns (their order) and one
+#                              field per column, see bar_codec.split_bars.
+#                              Frames the codec can't hold go whole in _json
+#   stockdata:AAPL:core        CORE_INFO_FIELDS of info, what screens read
+#   stockdata:AAPL:info        Yahoo's whole info dict
+#   stockdata:AAPL:financials  statements
+#   stockdata:AAPL:meta        fetch times, see _meta_key
+def _component_key(symbol, kind, interval=None):
+    if kind == 'bars':
+        return f"stockdata:{symbol.upper()}:columns:{interval}"
+    return f"stockdata:{symbol.upper()}:{kind}"
+
+_BAR_INDEX, _BAR_COLUMNS, _BAR_JSON = '_index', '_columns', '_json'
+
+# info fields the screens, result rows and live-price updates read
+CORE_INFO_FIELDS = (
+    'symbol', 'shortName', 'longName', 'sector', 'industry', 'country',
+    'currentPrice', 'regularMarketChangePercent', 'earningsTimestamp',
+    'marketCap', 'trailingPE', 'forwardPE', 'peRatio', 'priceToBook', 'priceToSales',
+    'dividendYield', 'payoutRatio', 'returnOnEquity', 'returnOnAssets',
+    'profitMargins', 'operatingMargins', 'revenueGrowth', 'earningsGrowth', 'beta',
+    'currentRatio', 'debtToEquity', 'enterpriseToRevenue', 'enterpriseToEbitda',
+    'trailingEps', 'bookValue', 'sharesOutstanding', 'dividendRate',
+)
+
+def core_info(info):
+    return {field: info[field] for field in CORE_INFO_FIELDS if field in info}
+
+OHLCV = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# what a read pulls from Redis: bar columns (None for all of them, () for
+# no bars), info ('full', 'core' or None) and whether financials come along
+Projection = namedtuple('Projection', ['columns', 'info', 'financials'])
 
-# time to live 
-def set_price(symbol, price):
-    redis_client.set(_price_key(symbol), price) 
+FULL = Projection(None, 'full', True)
+TECHNICAL = Projection(OHLCV, 'core', False)
+FUNDAMENTAL = Projection((), 'core', False)
 
-def _stock_data_key(symbol):
-    return f"stockdata:{symbol.upper()}"
+# hash of per-component fetch times (epoch seconds), kept as long as the
+# longest TTL. bars fields are per interval: bars:1d (fetch time),
+# period:1d (what the series covers) and last_bar:1d
+def _meta_key(symbol):
+    return f"stockdata:{symbol.upper()}:meta"
+
+# meta as seen from one interval: bars / period / last_bar are that interval's
+def _parse_meta(meta, interval='1d'):
+    parsed = {}
+    for field, value in meta.items():
+        field, _, field_interval = field.partition(':')
+        if field_interval and field_interval != interval:
+            continue
+        if field in ('last_bar', 'period'):
+            parsed[field] = value
+            continue
+        try:
+            parsed[field] = float(value)
+        except (TypeError, ValueError):
+            continue
+    return parsed
+
+META_TTL = max(policy['ttl'] for policy in CACHE_POLICIES.values())
+
+def set_price(symbol, price, fetched_at=None):
+    set_prices({symbol: price}, fetched_at)
+
+# {symbol: price} in one pipeline, other processes drop their local copies
+def set_prices(prices, fetched_at=None):
+    if not prices:
+        return
+    fetched_at = fetched_at or time.time()
+    pipe = redis_client.pipeline()
+    for symbol, price in prices.items():
+        pipe.setex(_price_key(symbol), CACHE_POLICIES['quote']['ttl'], price)
+        pipe.hset(_meta_key(symbol), 'quote', fetched_at)
+        pipe.expire(_meta_key(symbol), META_TTL)
+    local_cache.publish(pipe, 'price', list(prices))
+    pipe.execute()
+    local_cache.invalidate('price', list(prices))
+
+# bumped on every stock data write, screen caches key on it
+DATA_VERSION_KEY = "stockdata:version"
+
+def get_data_version():
+    value = redis_client.get(DATA_VERSION_KEY)
+    return int(value) if value is not None else 0
+
+def bump_data_version():
+    return redis_client.incr(DATA_VERSION_KEY)
 
 def make_json_serializable(obj):
 
@@ -53,15 +205,302 @@ def make_json_serializable(obj):
         return obj
 
 
-def set_stock_data(symbol, data, ttl=172800):  # 2 days
-    serializable_data = make_json_serializable(data)
-    redis_client.setex(_stock_data_key(symbol), ttl, json.dumps(serializable_data))
-
-def get_stock_data(symbol):
-    value = redis_client.get(_stock_data_key(symbol))
-    if value is not None:
+# the fields of a bars hash: binary columns, or the whole frame as JSON
+# when the codec can't hold it
+def _bar_fields(value):
+    if isinstance(value, pd.DataFrame):
         try:
-            return json.loads(value)
-        except Exception:
-            return None
-    return None 
\ No newline at end of file
+            index, columns = split_bars(value)
+            fields = {str(name): blob for name, blob in columns.items()}
+            fields[_BAR_COLUMNS] = json.dumps(list(fields))
+            fields[_BAR_INDEX] = index
+            return fields
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Storing bars as JSON: {e}")
+    return {_BAR_JSON: json.dumps(make_json_serializable(value))}
+
+# queue the writes for one symbol: only the components present in data
+# (historical / info / financials), each under its own key and TTL, plus
+# when each was fetched. fetched_at is one timestamp or {component: ts}.
+# The bars go under `interval` and are recorded as covering `period`
+# (default: the entry's cached_period, else what the frame spans).
+def _queue_stock_data(pipe, symbol, data, fetched_at=None, period=None, interval='1d'):
+    stamps = fetched_at if isinstance(fetched_at, dict) else {}
+    default = fetched_at if isinstance(fetched_at, (int, float)) else time.time()
+
+    written = {}
+    for kind in DATA_COMPONENTS:
+        value = data.get(COMPONENT_FIELDS[kind])
+        if value is None:
+            continue
+        key = _component_key(symbol, kind, interval)
+        ttl = CACHE_POLICIES[kind]['ttl']
+        if kind == 'bars':
+            # the series is replaced as a whole, no columns of an older write may linger
+            pipe.delete(key)
+            pipe.hset(key, mapping=_bar_fields(value))
+            pipe.expire(key, ttl)
+        else:
+            pipe.setex(key, ttl, json.dumps(make_json_serializable(value)))
+            if kind == 'info' and isinstance(value, dict):
+                pipe.setex(_component_key(symbol, 'core'), ttl, json.dumps(make_json_serializable(core_info(value))))
+        written[f'bars:{interval}' if kind == 'bars' else kind] = stamps.get(kind) or default
+
+    if not written:
+        return False
+
+    historical = data.get('historical')
+    if isinstance(historical, pd.DataFrame) and not historical.empty:
+        written[f'last_bar:{interval}'] = str(historical.index[-1])
+    if historical is not None:
+        period = period or data.get('cached_period') or covered_period(historical if isinstance(historical, pd.DataFrame) else None)
+        if period:
+            written[f'period:{interval}'] = period
+
+    # the earnings date tells us when the statements change, see due_components
+    info = data.get('info')
+    if isinstance(info, dict) and isinstance(info.get('earningsTimestamp'), (int, float)):
+        written['earnings_at'] = info['earningsTimestamp']
+
+    pipe.hset(_meta_key(symbol), mapping=written)
+    pipe.expire(_meta_key(symbol), META_TTL)
+    return True
+
+def set_stock_data(symbol, data, fetched_at=None, period=None, interval='1d'):
+    pipe = redis_client.pipeline()
+    if _queue_stock_data(pipe, symbol, data, fetched_at, period, interval):
+        pipe.incr(DATA_VERSION_KEY)
+        local_cache.publish(pipe, 'data', [symbol])
+        pipe.execute()
+        local_cache.invalidate('data', [symbol])
+
+# {symbol: data} in one pipeline; each entry's own "fetched_at" is kept when present
+def set_stock_data_many(entries, period=None, interval='1d'):
+    pipe = redis_client.pipeline(transaction=False)
+    written = [
+        symbol for symbol, data in entries.items()
+        if _queue_stock_data(pipe, symbol, data, data.get('fetched_at'), period, interval)
+    ]
+    if written:
+        pipe.incr(DATA_VERSION_KEY)
+        local_cache.publish(pipe, 'data', written)
+        pipe.execute()
+        local_cache.invalidate('data', written)
+    return len(written)
+
+def get_stock_data(symbol, period='1y', interval='1d', projection=FULL):
+    return get_stock_data_many([symbol], period, interval, projection).get(symbol)
+
+
+# keys per MGET in get_stock_data_many, sp500 -> 6 round-trips
+BULK_READ_CHUNK = 100
+BULK_DECODE_WORKERS = 4
+
+def _decode_frame(value):
+    try:
+        return pd.read_json(StringIO(value), orient="split")
+    except Exception as e:
+        logger.debug(f"Could not decode cached frame: {e}")
+        return None
+
+def _text(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+# bars hash fields (HGETALL, or HMGET of _index, _json and the wanted
+# columns) -> {field: blob}, None when the hash is missing or lacks a column
+def _bar_reply(reply, fields):
+    if fields is None:
+        found = {_text(field): value for field, value in reply.items()}
+    else:
+        found = {field: value for field, value in zip(fields, reply) if value is not None}
+    if _BAR_JSON in found:
+        return found
+    if _BAR_INDEX not in found:
+        return None
+    if fields is not None and len(found) < len(fields) - 1:
+        return None
+    return found
+
+def _decode_bars(fields, columns=None):
+    if _BAR_JSON in fields:
+        historical = json.loads(fields[_BAR_JSON])
+        if isinstance(historical, str):
+            historical = _decode_frame(historical)
+        if columns is not None and isinstance(historical, pd.DataFrame):
+            historical = historical[[column for column in columns if column in historical.columns]]
+        return historical
+    if columns is None:
+        columns = json.loads(fields[_BAR_COLUMNS]) if _BAR_COLUMNS in fields else [
+            field for field in fields if field not in (_BAR_INDEX, _BAR_COLUMNS)]
+    return join_bars(fields[_BAR_INDEX], {column: fields[column] for column in columns})
+
+def _decode_stock_data(bars, info, financials, meta, period='1y', interval='1d', projection=FULL):
+    try:
+        data = {}
+        if bars is not None:
+            data['historical'] = _decode_bars(bars, projection.columns)
+        if info is not None:
+            data['info'] = json.loads(info)
+        if projection.financials:
+            data['financials'] = json.loads(financials) if financials is not None else {}
+    except Exception:
+        return None
+    # a longer cached series answers shorter requests
+    if isinstance(data.get('historical'), pd.DataFrame):
+        data['historical'] = slice_period(data['historical'], period)
+    if isinstance(data.get('financials'), dict):
+        data['financials'] = {
+            name: _decode_frame(frame) if isinstance(frame, str) else frame
+            for name, frame in data['financials'].items()
+        }
+    meta = _parse_meta(meta, interval)
+    data['last_bar'] = meta.pop('last_bar', None)
+    data['cached_period'] = meta.pop('period', None)
+    data['fetched_at'] = meta
+    if 'bars' in data['fetched_at']:
+        data['last_updated'] = datetime.fromtimestamp(data['fetched_at']['bars']).isoformat()
+    return data
+
+# callers change info in place (live prices), so each gets its own dicts;
+# the frames are shared and treated as read-only
+def _local_copy(data):
+    data = dict(data)
+    for field in ('info', 'fetched_at'):
+        if isinstance(data.get(field), dict):
+            data[field] = dict(data[field])
+    return data
+
+# many symbols with one pipeline (MGET, bars hashes and meta) per chunk;
+# chunks are decoded on a thread pool while the next chunk is being read.
+# Only what `projection` asks for is read: a symbol is a hit when that info
+# and those bar columns at `interval` are cached and the bars cover `period`
+# (then they come back sliced to it), financials are optional. Entries
+# decoded earlier in this process are served from local_cache instead.
+def get_stock_data_many(symbols, period='1y', interval='1d', projection=FULL, chunk_size=BULK_READ_CHUNK, decode_workers=BULK_DECODE_WORKERS):
+    symbols = list(symbols)
+    result = {}
+    if not symbols:
+        return result
+
+    columns = tuple(projection.columns) if projection.columns is not None else None
+    projection = Projection(columns, projection.info, projection.financials)
+    kinds = ([{'core': 'core', 'full': 'info'}[projection.info]] if projection.info else []) + (['financials'] if projection.financials else [])
+    with_bars = columns != ()
+    bar_fields = None if columns is None else [_BAR_INDEX, _BAR_JSON, *columns]
+
+    tokens = {}
+    if local_cache.usable:
+        for symbol in symbols:
+            data = local_cache.get(('data', symbol.upper(), period, interval, projection))
+            if data is not None:
+                result[symbol] = _local_copy(data)
+            else:
+                tokens[symbol] = local_cache.token('data', symbol)
+        symbols = list(tokens)
+        if not symbols:
+            return result
+
+    with ThreadPoolExecutor(max_workers=decode_workers) as pool:
+        pending = []
+        for i in range(0, len(symbols), chunk_size):
+            chunk = symbols[i:i + chunk_size]
+            pipe = redis_binary.pipeline(transaction=False)
+            if kinds:
+                pipe.mget([_component_key(symbol, kind) for symbol in chunk for kind in kinds])
+            if with_bars:
+                for symbol in chunk:
+                    key = _component_key(symbol, 'bars', interval)
+                    if bar_fields is None:
+                        pipe.hgetall(key)
+                    else:
+                        pipe.hmget(key, bar_fields)
+            for symbol in chunk:
+                pipe.hgetall(_meta_key(symbol))
+            replies = pipe.execute()
+
+            values = replies.pop(0) if kinds else []
+            bar_replies = [replies.pop(0) for _ in chunk] if with_bars else [None] * len(chunk)
+            metas = [{_text(field): _text(value) for field, value in meta.items()} for meta in replies]
+
+            n = len(kinds)
+            for j, symbol in enumerate(chunk):
+                found = dict(zip(kinds, values[j * n:(j + 1) * n]))
+                info = found.get('core', found.get('info'))
+                financials = found.get('financials')
+                if projection.info and info is None:
+                    continue
+                bars = None
+                if with_bars:
+                    bars = _bar_reply(bar_replies[j], bar_fields)
+                    if bars is None or not period_covers(metas[j].get(f'period:{interval}'), period):
+                        continue
+                payload = len(info or b'') + len(financials or b'')
+                pending.append((symbol, payload, pool.submit(_decode_stock_data, bars, info, financials, metas[j], period, interval, projection)))
+
+        for symbol, payload, future in pending:
+            data = future.result()
+            if not data:
+                continue
+            if symbol in tokens:
+                local_cache.put(('data', symbol.upper(), period, interval, projection), data, entry_size(data, payload), tokens[symbol])
+                data = _local_copy(data)
+            result[symbol] = data
+    return result
+
+
+# {symbol: {component: fetched_at}} for the refresh scheduling, no payloads read
+def get_freshness(symbols, interval='1d'):
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+    pipe = redis_client.pipeline(transaction=False)
+    for symbol in symbols:
+        pipe.hgetall(_meta_key(symbol))
+    return {symbol: _parse_meta(meta, interval) for symbol, meta in zip(symbols, pipe.execute())}
+
+
+# fresh / stale / expired for a component fetched at `fetched_at`, None if unknown
+def freshness_state(kind, fetched_at, now=None):
+    if fetched_at is None:
+        return None
+    age = (now or time.time()) - fetched_at
+    policy = CACHE_POLICIES[kind]
+    if age < policy['fresh']:
+        return FRESH
+    if age < policy['stale']:
+        return STALE
+    return EXPIRED
+
+
+# which components of each symbol are due for a refresh: never fetched,
+# no longer fresh, or (financials) older than the last earnings date
+def due_components(symbols, now=None, freshness=None, interval='1d'):
+    now = now or time.time()
+    if freshness is None:
+        freshness = get_freshness(symbols, interval)
+
+    due = {}
+    for symbol in symbols:
+        meta = freshness.get(symbol) or {}
+        kinds = set()
+        for kind in DATA_COMPONENTS:
+            if freshness_state(kind, meta.get(kind), now) != FRESH:
+                kinds.add(kind)
+        earnings_at = meta.get('earnings_at')
+        if earnings_at and 'financials' in meta and meta['financials'] < earnings_at <= now:
+            kinds.add('financials')
+        due[symbol] = kinds
+    return due
+
+
+# at most one revalidation per symbol and interval across all processes
+# within `ttl` seconds (every period of an interval shares one series);
+# returns the symbols this caller may revalidate
+def claim_revalidation(symbols, interval, ttl=300):
+    symbols = list(symbols)
+    if not symbols:
+        return []
+    pipe = redis_client.pipeline(transaction=False)
+    for symbol in symbols:
+        pipe.set(f"revalidate:{symbol.upper()}:{interval}", 1, nx=True, ex=ttl)
+    return [symbol for symbol, claimed in zip(symbols, pipe.execute()) if claimed]
@@ -0,0 +1,128 @@
+import os
+import threading
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+REFRESH_WORKERS = int(os.getenv('REFRESH_WORKERS', 2))
+REFRESH_MAX_QUEUE = int(os.getenv('REFRESH_MAX_QUEUE', 2000))
+REFRESH_BATCH_SIZE = int(os.getenv('REFRESH_BATCH_SIZE', 20))
+
+
+class RefreshService:
+    """
+    Background refresh of cached stock data with a fixed number of workers.
+
+    Requests are keyed by (symbol, period, interval) and ignored while the
+    same key is already queued or being refreshed. The queue is bounded,
+    overflow is dropped and counted. A worker takes up to batch_size queued
+    symbols sharing a period/interval and an equal context (the caller's
+    storage callbacks) and refreshes them with one call to
+    refresh(symbols, period, interval, context).
+    """
+
+    def __init__(self, refresh, workers=REFRESH_WORKERS, max_queue=REFRESH_MAX_QUEUE, batch_size=REFRESH_BATCH_SIZE):
+        self._refresh = refresh
+        self.workers = workers
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+
+        self._cond = threading.Condition()
+        self._queue = deque()          # keys in arrival order
+        self._contexts = {}            # queued key -> context passed back to refresh
+        self._in_flight = set()
+        self._threads = []
+
+        self._counters = {
+            'submitted': 0,
+            'deduplicated': 0,
+            'dropped': 0,
+            'refreshed': 0,
+            'failed': 0,
+            'batches': 0,
+        }
+
+    def _ensure_started(self):
+        alive = [t for t in self._threads if t.is_alive()]
+        for i in range(self.workers - len(alive)):
+            t = threading.Thread(target=self._run, name=f"refresh-worker-{len(alive) + i}", daemon=True)
+            t.start()
+            alive.append(t)
+        self._threads = alive
+
+    def submit(self, symbols, period, interval, context=None):
+        accepted = 0
+        with self._cond:
+            for symbol in symbols:
+                key = (symbol, period, interval)
+                self._counters['submitted'] += 1
+                if key in self._contexts or key in self._in_flight:
+                    self._counters['deduplicated'] += 1
+                    continue
+                if len(self._queue) >= self.max_queue:
+                    self._counters['dropped'] += 1
+                    continue
+                self._queue.append(key)
+                self._contexts[key] = context
+                accepted += 1
+
+            if accepted:
+                self._ensure_started()
+                self._cond.notify_all()
+
+        if accepted < len(symbols):
+            logger.debug(f"Refresh queue accepted {accepted}/{len(symbols)} symbols")
+        return accepted
+
+    def _take_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+
+            first = self._queue.popleft()
+            _, period, interval = first
+            context = self._contexts.pop(first)
+            batch = [first]
+
+            # coalesce other queued symbols of the same resolution into this download
+            rest = deque()
+            while self._queue:
+                key = self._queue.popleft()
+                if (len(batch) < self.batch_size and key[1] == period and key[2] == interval
+                        and self._contexts[key] == context):
+                    self._contexts.pop(key)
+                    batch.append(key)
+                else:
+                    rest.append(key)
+            self._queue = rest
+
+            self._in_flight.update(batch)
+            return batch, period, interval, context
+
+    def _run(self):
+        while True:
+            batch, period, interval, context = self._take_batch()
+            symbols = [key[0] for key in batch]
+
+            try:
+                self._refresh(symbols, period, interval, context)
+                with self._cond:
+                    self._counters['refreshed'] += len(symbols)
+            except Exception as e:
+                logger.error(f"Background refresh failed for {symbols}: {e}")
+                with self._cond:
+                    self._counters['failed'] += len(symbols)
+            finally:
+                with self._cond:
+                    self._counters['batches'] += 1
+                    self._in_flight.difference_update(batch)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._counters)
+            stats['queue_depth'] = len(self._queue)
+            stats['in_flight'] = len(self._in_flight)
+            stats['workers'] = len([t for t in self._threads if t.is_alive()])
+            stats['max_queue'] = self.max_queue
+            return stats
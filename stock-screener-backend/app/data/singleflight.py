@@ -0,0 +1,228 @@
+import os
+import time
+import uuid
+import threading
+import logging
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# how long a Redis fetch lock outlives its holder (the holder renews it
+# every third of that while it works), and how long followers wait at most
+SINGLEFLIGHT_LOCK_MS = int(os.getenv('SINGLEFLIGHT_LOCK_MS', 30000))
+SINGLEFLIGHT_WAIT = float(os.getenv('SINGLEFLIGHT_WAIT', 900))
+# followers poll the lock keys, starting at POLL seconds and backing off to MAX_POLL
+SINGLEFLIGHT_POLL = float(os.getenv('SINGLEFLIGHT_POLL', 0.25))
+SINGLEFLIGHT_MAX_POLL = float(os.getenv('SINGLEFLIGHT_MAX_POLL', 5))
+
+# delete the lock only if we still own it
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# push the lock's expiry out, again only if we still own it
+_EXTEND_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent fetches of the same (symbol, period, interval).
+
+    Inside the process the first caller for a key becomes its leader and
+    later callers wait on the leader's Future. Across processes the leader
+    also takes a Redis lock (SET NX PX) and renews it for as long as the
+    fetch runs, so a slow, rate-limited fetch keeps it. A process that
+    finds the lock held polls the lock keys (with backoff) until they go
+    away, then reads the holder's result from the cache once (load_cached)
+    and only fetches itself what isn't there, or everything left when the
+    wait times out. Without Redis only the in-process layer applies.
+    """
+
+    def __init__(self, client=None, lock_ms=SINGLEFLIGHT_LOCK_MS, wait=SINGLEFLIGHT_WAIT, poll=SINGLEFLIGHT_POLL,
+                 max_poll=SINGLEFLIGHT_MAX_POLL):
+        self._client = client
+        self.lock_ms = lock_ms
+        self.wait = wait
+        self.poll = poll
+        self.max_poll = max_poll
+        self._lock = threading.Lock()
+        self._calls = {}  # (symbol, period, interval) -> Future
+        self._counters = {'led': 0, 'followed': 0, 'waited_remote': 0, 'took_over': 0}
+
+    def _redis(self):
+        if self._client is None:
+            from app.data.redis_cache import redis_client
+            self._client = redis_client
+        return self._client
+
+    @staticmethod
+    def _lock_key(symbol, period, interval):
+        return f"singleflight:{symbol}:{period}:{interval}"
+
+    def _count(self, name, n):
+        with self._lock:
+            self._counters[name] += n
+
+    # symbols we got the Redis lock for, or all of them when Redis is unavailable
+    def _acquire(self, symbols, period, interval, token):
+        try:
+            pipe = self._redis().pipeline(transaction=False)
+            for symbol in symbols:
+                pipe.set(self._lock_key(symbol, period, interval), token, nx=True, px=self.lock_ms)
+            acquired = pipe.execute()
+            return [symbol for symbol, ok in zip(symbols, acquired) if ok]
+        except Exception as e:
+            logger.debug(f"Singleflight lock unavailable, coalescing in-process only: {e}")
+            return list(symbols)
+
+    def _release(self, symbols, period, interval, token):
+        if not symbols:
+            return
+        try:
+            pipe = self._redis().pipeline(transaction=False)
+            for symbol in symbols:
+                pipe.eval(_RELEASE_SCRIPT, 1, self._lock_key(symbol, period, interval), token)
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"Could not release singleflight locks: {e}")
+
+    # renew our locks every third of their lifetime until `stop` is set
+    def _keep_alive(self, symbols, period, interval, token, stop):
+        while not stop.wait(self.lock_ms / 3000):
+            try:
+                pipe = self._redis().pipeline(transaction=False)
+                for symbol in symbols:
+                    pipe.eval(_EXTEND_SCRIPT, 1, self._lock_key(symbol, period, interval), token, self.lock_ms)
+                pipe.execute()
+            except Exception as e:
+                logger.debug(f"Could not renew singleflight locks: {e}")
+
+    def _locked(self, symbols, period, interval):
+        try:
+            pipe = self._redis().pipeline(transaction=False)
+            for symbol in symbols:
+                pipe.exists(self._lock_key(symbol, period, interval))
+            return {symbol for symbol, held in zip(symbols, pipe.execute()) if held}
+        except Exception:
+            return set()
+
+    def _fetch(self, fetch, symbols):
+        if not symbols:
+            return {}
+        try:
+            return fetch(symbols) or {}
+        except Exception as e:
+            logger.error(f"Fetch failed for {len(symbols)} symbols: {e}")
+            return {}
+
+    # wait for other processes to publish the symbols they are fetching.
+    # Only the lock keys are polled; a symbol's cache entry is read once,
+    # after its lock is gone (or the wait timed out)
+    def _wait_remote(self, symbols, period, interval, fetch, load_cached):
+        self._count('waited_remote', len(symbols))
+        since = time.time()
+        deadline = since + self.wait
+        delay = self.poll
+        result = {}
+        remaining = list(symbols)
+        while remaining:
+            held = self._locked(remaining, period, interval) if load_cached is not None else set()
+            if time.time() >= deadline:
+                held = set()
+            done = [symbol for symbol in remaining if symbol not in held]
+            if not done:
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_poll)
+                continue
+
+            if load_cached is not None:
+                try:
+                    result.update(load_cached(done, since) or {})
+                except Exception as e:
+                    logger.debug(f"load_cached failed after waiting: {e}")
+            # lock gone without a result (holder failed) or waited long enough -> do it ourselves
+            orphaned = [symbol for symbol in done if symbol not in result]
+            if orphaned:
+                self._count('took_over', len(orphaned))
+                result.update(self._fetch(fetch, orphaned))
+            remaining = [symbol for symbol in remaining if symbol not in done]
+        return result
+
+    def run(self, symbols, period, interval, fetch, load_cached=None):
+        """
+        fetch(symbols) -> {symbol: data} does the real work (and should
+        write the cache before returning, other processes read it from
+        there). load_cached(symbols, since) -> {symbol: data} returns cache
+        entries written after `since`. Returns {symbol: data} for the
+        symbols that could be fetched.
+        """
+        mine = {}
+        following = {}
+        with self._lock:
+            for symbol in symbols:
+                key = (symbol, period, interval)
+                if key in self._calls:
+                    following[symbol] = self._calls[key]
+                else:
+                    future = Future()
+                    self._calls[key] = future
+                    mine[symbol] = future
+            self._counters['followed'] += len(following)
+
+        result = {}
+        token = uuid.uuid4().hex
+        resolved = set()
+
+        def resolve(batch):
+            with self._lock:
+                for symbol in batch:
+                    self._calls.pop((symbol, period, interval), None)
+            for symbol in batch:
+                mine[symbol].set_result(result.get(symbol))
+                resolved.add(symbol)
+
+        try:
+            leading = self._acquire(list(mine), period, interval, token) if mine else []
+            self._count('led', len(leading))
+            stop = threading.Event()
+            if leading:
+                threading.Thread(target=self._keep_alive, args=(leading, period, interval, token, stop),
+                                 name="singleflight-renew", daemon=True).start()
+            try:
+                result.update(self._fetch(fetch, leading))
+            finally:
+                stop.set()
+                self._release(leading, period, interval, token)
+            # followers of what we fetched can go before we wait on anyone else
+            resolve(leading)
+
+            remote = [symbol for symbol in mine if symbol not in resolved]
+            if remote:
+                result.update(self._wait_remote(remote, period, interval, fetch, load_cached))
+        finally:
+            resolve([symbol for symbol in mine if symbol not in resolved])
+
+        for symbol, future in following.items():
+            try:
+                data = future.result(timeout=self.wait)
+            except Exception as e:
+                logger.debug(f"Gave up waiting for {symbol}: {e}")
+                data = None
+            if data:
+                result[symbol] = data
+
+        return {symbol: result[symbol] for symbol in symbols if result.get(symbol)}
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['in_flight'] = len(self._calls)
+            return stats
@@ -1,29 +1,6 @@
-import pandas as pd
-import logging
-
-logger = logging.getLogger(__name__)
+from app.data.constituents import get_constituents, get_symbol_indexes, UnknownIndexError
 
 # default to be sp500, get a list ofstock symbpl 
+# (cached, see app/data/constituents.py, falls back to the bundled snapshot offline)
 def get_stock_symbols(index="sp500"):
-    try:
-        if index == "sp500":
-            table = pd.read_html('https://en.wikipedia.org/wiki/List_of_S%26P_500_companies')
-            df = table[0]
-            symbols = df['Symbol'].str.replace('.', '-').tolist()
-            return symbols
-        elif index == "nasdaq100":
-            table = pd.read_html('https://en.wikipedia.org/wiki/Nasdaq-100')
-            df = table[4]
-            symbols = df['Ticker'].tolist()
-            return symbols
-        elif index == "dow30":
-            table = pd.read_html('https://en.wikipedia.org/wiki/Dow_Jones_Industrial_Average')
-            df = table[2]
-            symbols = df['Symbol'].tolist()
-            return symbols
-        else:
-            logger.error(f"Unknown index: {index}, try sp500/dow30/nasdaq100")
-            return []
-    except Exception as e:
-        logger.error(f"Error fetching symbols for {index}: {e}")
-        raise  
\ No newline at end of file
+    return get_constituents(index)
@@ -0,0 +1,162 @@
+import os
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app.data.symbols import get_stock_symbols
+
+logger = logging.getLogger(__name__)
+
+WARMUP_INDEXES = [index.strip() for index in os.getenv('WARMUP_INDEXES', 'sp500,nasdaq100,dow30').split(',') if index.strip()]
+WARMUP_PERIOD = os.getenv('WARMUP_PERIOD', '1y')
+WARMUP_INTERVAL = os.getenv('WARMUP_INTERVAL', '1d')
+WARMUP_WORKERS = int(os.getenv('WARMUP_WORKERS', 4))
+WARMUP_CHUNK = int(os.getenv('WARMUP_CHUNK', 50))
+# report ready after this long even if the warm-up is still going (slow provider)
+WARMUP_MAX_WAIT = float(os.getenv('WARMUP_MAX_WAIT', 600))
+
+IDLE, WARMING, DONE, FAILED = 'idle', 'warming', 'done', 'failed'
+
+
+# under the debug reloader (app.main --mode api sets WARMUP_RELOADER) the app
+# is created twice: in the parent, which only watches files, and in the child
+# that serves (WERKZEUG_RUN_MAIN). Only the child warms up
+def warmup_enabled():
+    if os.getenv('WARMUP_ON_START', '').lower() not in ('1', 'true', 'yes'):
+        return False
+    return not (os.getenv('WARMUP_RELOADER') and os.getenv('WERKZEUG_RUN_MAIN') != 'true')
+
+
+class CacheWarmer:
+    """
+    Preloads the symbols of the configured indexes before traffic arrives.
+
+    The index lists are resolved first (which fills the in-process
+    constituent cache), the symbols are de-duplicated across indexes and
+    handed to load(symbols) in chunks on a thread pool. load is expected to
+    go through the normal fetch path (StockScreener.preload), so DB rows are
+    promoted into Redis and misses are fetched from the provider.
+
+    progress() is what /api/v1/ready reports. A worker that never started a
+    warm-up is ready; one that is warming becomes ready when it finishes
+    (even with symbols missing) or after max_wait seconds.
+    """
+
+    def __init__(self, indexes=None, period=WARMUP_PERIOD, interval=WARMUP_INTERVAL,
+                 workers=WARMUP_WORKERS, chunk_size=WARMUP_CHUNK, max_wait=WARMUP_MAX_WAIT):
+        self.indexes = list(indexes or WARMUP_INDEXES)
+        self.period = period
+        self.interval = interval
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_wait = max_wait
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._reset(IDLE)
+
+    def _reset(self, state):
+        self.state = state
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self._counts = {'total': 0, 'done': 0, 'loaded': 0, 'missing': 0, 'failed': 0}
+        self._index_sizes = {}
+
+    def _resolve_symbols(self):
+        symbols = {}
+        for index in self.indexes:
+            members = get_stock_symbols(index=index)
+            with self._lock:
+                self._index_sizes[index] = len(members)
+            for symbol in members:
+                symbols.setdefault(symbol, None)
+        return list(symbols)
+
+    def _finish_chunk(self, chunk, loaded):
+        with self._lock:
+            self._counts['done'] += len(chunk)
+            if loaded is None:
+                self._counts['failed'] += len(chunk)
+            else:
+                self._counts['loaded'] += len(loaded)
+                self._counts['missing'] += len(chunk) - len(loaded)
+
+    def run(self, load, report=None):
+        """Warm up synchronously, report(progress) is called after every chunk."""
+        with self._lock:
+            self._reset(WARMING)
+            self.started_at = time.time()
+
+        try:
+            symbols = self._resolve_symbols()
+            with self._lock:
+                self._counts['total'] = len(symbols)
+            logger.info(f"Warming up {len(symbols)} symbols from {', '.join(self.indexes)}")
+
+            chunks = [symbols[i:i + self.chunk_size] for i in range(0, len(symbols), self.chunk_size)]
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="warmup") as pool:
+                futures = {pool.submit(load, chunk, self.period, self.interval): chunk for chunk in chunks}
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    try:
+                        loaded = future.result() or {}
+                    except Exception as e:
+                        logger.error(f"Warm-up failed for {len(chunk)} symbols: {e}")
+                        loaded = None
+                    self._finish_chunk(chunk, loaded)
+                    if report:
+                        report(self.progress())
+
+            with self._lock:
+                self.state = DONE
+        except Exception as e:
+            logger.error(f"Warm-up failed: {e}")
+            with self._lock:
+                self.state = FAILED
+                self.error = str(e)
+        finally:
+            with self._lock:
+                self.finished_at = time.time()
+
+        progress = self.progress()
+        logger.info(f"Warm-up {progress['state']}: {progress['loaded']}/{progress['total']} symbols in {progress['elapsed']}s")
+        return progress
+
+    def start(self, load):
+        """Warm up in a background thread, unless one is already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self._thread
+            # counts as warming from here on, not only once the thread runs
+            self._reset(WARMING)
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self.run, args=(load,), name="cache-warmup", daemon=True)
+            self._thread.start()
+            return self._thread
+
+    @property
+    def ready(self):
+        with self._lock:
+            if self.state != WARMING:
+                return True
+            return time.time() - self.started_at >= self.max_wait
+
+    def progress(self):
+        ready = self.ready
+        with self._lock:
+            counts = dict(self._counts)
+            end = self.finished_at or time.time()
+            return {
+                'state': self.state,
+                'ready': ready,
+                'indexes': dict(self._index_sizes),
+                **counts,
+                'percent': round(100.0 * counts['done'] / counts['total'], 1) if counts['total'] else (100.0 if self.state == DONE else 0.0),
+                'elapsed': round(end - self.started_at, 1) if self.started_at else None,
+                'error': self.error,
+            }
+
+
+warmer = CacheWarmer()
@@ -1,39 +1,38 @@
-import pandas as pd
-import yfinance as yf
 import logging
+import os
 import time
+from collections import namedtuple
 from datetime import datetime
-from app.data.redis_cache import get_stock_data, set_stock_data
-import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.data.redis_cache import (
+    get_stock_data_many, set_stock_data, set_stock_data_many, due_components, freshness_state, claim_revalidation,
+    DATA_COMPONENTS, EXPIRED, FULL,
+)
+from app.data.periods import period_covers, slice_period, covered_period
+from app.data.refresh_queue import RefreshService
+from app.data.price_cube import price_cube
+from app.data.singleflight import SingleFlight
+from app.data.providers import get_provider
+from app.data.rate_limit import get_limiter, call_with_retry, is_rate_limit_error, AdaptiveBatchSizer
+from app.data.db_utils import DatabaseWriteError
+import pandas as pd
 import traceback
 
 logger = logging.getLogger(__name__)
 
-# --------------------------------------------------------------------
-# Helper: run in background thread to refresh cache from Yahoo
-# --------------------------------------------------------------------
-def refresh_cache_async(symbols, period, interval, save_to_db):
-    fresh_data = _fetch_fresh_data(symbols, period, interval)
-    for symbol, data in fresh_data.items():
-        if save_to_db:
-            try:
-                save_to_db(symbol, data)
-            except Exception as e:
-                logger.warn(f"save_to_db failed for {symbol}: {e}")
-        try:
-            set_stock_data(symbol, data)
-        except Exception as e:
-            logger.warn(f"set_stock_data failed for {symbol}: {e}")
+# concurrent provider metadata/financials requests in _fetch_fresh_data
+METADATA_WORKERS = int(os.getenv('METADATA_WORKERS', 8))
 
+# symbols per download request, shrinks when the provider starts failing or throttling
+batch_sizer = AdaptiveBatchSizer(
+    initial=int(os.getenv('FETCH_BATCH_SIZE', 20)),
+    maximum=int(os.getenv('FETCH_BATCH_MAX', 50)),
+)
 
 # --------------------------------------------------------------------
-# High-level: fetch data, using Redis/DB caches before Yahoo
+# Helper: normalize input -> list of unique Yahoo-ready symbols
 # --------------------------------------------------------------------
-def fetch_yfinance_data(symbols, period="1y", interval="1d", reload=False, load_from_db=None, save_to_db=None):
-    result = {}
-    symbols_to_fetch = []
-
-    # Normalize input -> list of unique Yahoo-ready symbols
+def normalize_symbols(symbols):
     if isinstance(symbols, str):
         symbols = [symbols]
     elif symbols is None:
@@ -51,7 +50,260 @@ def fetch_yfinance_data(symbols, period="1y", interval="1d", reload=False, load_
         if sym not in seen:
             seen.add(sym)
             cleaned.append(sym)
-    symbols = cleaned
+    return cleaned
+
+
+# the caller's DB callbacks, handed to the refresh queue as one value so
+# queued symbols with the same storage can share a download
+Storage = namedtuple("Storage", ["save_to_db", "latest_dates_from_db", "load_many_from_db", "save_many_to_db"], defaults=[None])
+
+
+# {symbol: data} -> DB: one bulk write when the caller has one, else symbol
+# by symbol; None when there is nowhere to save
+def _db_writer(save_to_db, save_many_to_db=None):
+    if save_many_to_db:
+        def save_all(entries):
+            try:
+                save_many_to_db(entries)
+            except DatabaseWriteError as e:
+                logger.warning(f"save_many_to_db saved {len(entries) - len(e.symbols)}/{len(entries)} symbols, failed: {', '.join(e.symbols)}")
+            except Exception as e:
+                logger.warning(f"save_many_to_db failed for {len(entries)} symbols: {e}")
+        return save_all
+    if save_to_db:
+        def save_each(entries):
+            for symbol, data in entries.items():
+                try:
+                    save_to_db(symbol, data)
+                except Exception as e:
+                    logger.warning(f"save_to_db failed for {symbol}: {e}")
+        return save_each
+    return None
+
+
+# daily bars also go into the on-disk price cube (see price_cube), tails
+# from incremental refreshes included, the cube merges by date
+def _update_price_cube(entries, interval):
+    if interval != "1d" or not price_cube.enabled:
+        return
+    frames = {symbol: data["historical"] for symbol, data in entries.items() if isinstance(data.get("historical"), pd.DataFrame)}
+    if frames:
+        try:
+            price_cube.update(frames)
+        except Exception as e:
+            logger.warning(f"Price cube update failed for {len(frames)} symbols: {e}")
+
+
+# --------------------------------------------------------------------
+# Helper: fetch only the bars after each symbol's last stored date
+# --------------------------------------------------------------------
+def _fetch_incremental(symbols, period, interval, latest_dates_from_db, include_info=True):
+    try:
+        latest = latest_dates_from_db(symbols) or {}
+    except Exception as e:
+        logger.debug(f"latest_dates_from_db failed for {len(symbols)} symbols: {e}")
+        latest = {}
+
+    # symbols usually share their last date, so this is one or two downloads;
+    # the last stored day is fetched again in case it was still in progress
+    by_start = {}
+    full = []
+    for symbol in symbols:
+        if symbol in latest:
+            by_start.setdefault(latest[symbol], []).append(symbol)
+        else:
+            full.append(symbol)
+
+    result = {}
+    for start, group in by_start.items():
+        result.update(_fetch_fresh_data(group, period, interval, include_info=include_info, start=start))
+    if full:
+        result.update(_fetch_fresh_data(full, period, interval, include_info=include_info))
+
+    logger.info(f"Incremental refresh: {len(symbols) - len(full)} symbols from their last stored date, {len(full)} in full")
+    return result, set(symbols) - set(full)
+
+
+# --------------------------------------------------------------------
+# Helper: run in background thread to refresh cache from Yahoo
+# --------------------------------------------------------------------
+def refresh_cache_async(symbols, period, interval, storage=None):
+    storage = storage or Storage(None, None, None)
+
+    # bars, info and financials each have their own cadence, only fetch what is due
+    try:
+        due = due_components(symbols, interval=interval)
+    except Exception as e:
+        logger.debug(f"due_components failed for {len(symbols)} symbols: {e}")
+        due = {symbol: set(DATA_COMPONENTS) for symbol in symbols}
+
+    bar_symbols = [symbol for symbol in symbols if "bars" in due[symbol]]
+    wanted = {
+        symbol: ("info" in due[symbol], "financials" in due[symbol])
+        for symbol in symbols if due[symbol] & {"info", "financials"}
+    }
+    if not bar_symbols and not wanted:
+        return
+    logger.info(f"Refreshing {len(bar_symbols)} bars, {sum(w[0] for w in wanted.values())} info, "
+                f"{sum(w[1] for w in wanted.values())} financials")
+
+    # metadata runs alongside the bar download
+    metadata_pool, metadata_futures = _start_metadata(wanted)
+
+    # daily bars with a DB behind them only need the missing tail,
+    # anything else is re-downloaded in full
+    incremental = set()
+    fresh_data = {}
+    saves = storage.save_to_db or storage.save_many_to_db
+    if bar_symbols and interval == "1d" and saves and storage.latest_dates_from_db and storage.load_many_from_db:
+        fresh_data, incremental = _fetch_incremental(bar_symbols, period, interval, storage.latest_dates_from_db, include_info=False)
+    elif bar_symbols:
+        fresh_data = _fetch_fresh_data(bar_symbols, period, interval, include_info=False)
+
+    for symbol, (info, financials) in _collect_metadata(metadata_pool, metadata_futures).items():
+        entry = fresh_data.setdefault(symbol, {})
+        if info is not None:
+            entry["info"] = info
+        if financials is not None:
+            entry["financials"] = financials
+
+    save = _db_writer(storage.save_to_db, storage.save_many_to_db)
+    if save and fresh_data:
+        save(fresh_data)
+    _update_price_cube(fresh_data, interval)
+
+    # the cache holds the whole period, so read the merged rows back for the
+    # symbols a tail was actually downloaded for. The DB may hold far more
+    # history than the period, only the period goes back to the cache
+    merged = [symbol for symbol, data in fresh_data.items() if symbol in incremental and data.get("historical") is not None]
+    if merged:
+        try:
+            stored = storage.load_many_from_db(merged) or {}
+        except Exception as e:
+            logger.warn(f"load_many_from_db failed for {len(merged)} symbols: {e}")
+            stored = {}
+        for symbol in merged:
+            historical = (stored.get(symbol) or {}).get("historical")
+            if historical is not None:
+                fresh_data[symbol]["historical"] = slice_period(historical, period)
+            else:
+                # only the tail is in hand, don't overwrite the cached bars with it
+                fresh_data[symbol].pop("historical", None)
+
+    for symbol, data in fresh_data.items():
+        try:
+            set_stock_data(symbol, data, period=period, interval=interval)
+        except Exception as e:
+            logger.warn(f"set_stock_data failed for {symbol}: {e}")
+
+
+# one shared, bounded and de-duplicated queue for all background refreshes
+refresh_service = RefreshService(refresh_cache_async)
+
+# concurrent foreground fetches of the same symbols share one download
+singleflight = SingleFlight()
+
+# an entry can't be served once one of these has expired, financials never block
+SERVING_COMPONENTS = ("bars", "info")
+
+# seconds during which other processes won't revalidate the same symbol again
+REVALIDATE_GUARD = int(os.getenv('REVALIDATE_GUARD', 300))
+
+
+# -> (expired symbols, symbols to revalidate in the background) for cached entries
+def _classify(entries):
+    now = time.time()
+    freshness = {symbol: data.get("fetched_at") or {} for symbol, data in entries.items()}
+    due = due_components(list(entries), now=now, freshness=freshness)
+    expired = {
+        symbol for symbol in entries
+        if any(freshness_state(kind, freshness[symbol].get(kind), now) == EXPIRED for kind in SERVING_COMPONENTS)
+    }
+    revalidate = [symbol for symbol in entries if due[symbol] and symbol not in expired]
+    return expired, revalidate
+
+
+# the period to (re)fetch a symbol with: a longer cached series is refetched
+# whole, so a short request does not shrink what other callers rely on
+def _fetch_period(entry, period):
+    cached_period = (entry or {}).get("cached_period")
+    return cached_period if period_covers(cached_period, period) else period
+
+
+# stale entries are served now and refreshed once in the background
+def _schedule_revalidation(symbols, period, interval, storage, entries=None):
+    if not symbols:
+        return
+    try:
+        symbols = claim_revalidation(symbols, interval, ttl=REVALIDATE_GUARD)
+    except Exception as e:
+        logger.debug(f"claim_revalidation failed, relying on the local queue: {e}")
+
+    by_period = {}
+    for symbol in symbols:
+        by_period.setdefault(_fetch_period((entries or {}).get(symbol), period), []).append(symbol)
+    for fetch_period, group in by_period.items():
+        refresh_service.submit(group, fetch_period, interval, storage)
+
+
+# fetch, then store in the DB and Redis before returning, so other
+# processes waiting on the singleflight lock find the result in the cache.
+# save is a _db_writer
+def _fetch_and_store(symbols, period, interval, save):
+    fresh_data = _fetch_fresh_data(symbols, period, interval)
+    result = {symbol: data for symbol, data in fresh_data.items() if data}
+    if save and result:
+        save(result)
+    _update_price_cube(result, interval)
+    for symbol, data in result.items():
+        try:
+            set_stock_data(symbol, data, period=period, interval=interval)
+        except Exception as e:
+            logger.debug(f"set_stock_data failed for {symbol}: {e}")
+    return result
+
+
+# cache entries whose bars were written after `since`, i.e. by the fetch we waited on
+def _load_cached_since(symbols, since, period="1y", interval="1d"):
+    return {
+        symbol: data for symbol, data in get_stock_data_many(symbols, period, interval).items()
+        if (data.get("fetched_at") or {}).get("bars", 0) >= since - 1
+    }
+
+
+# fresh entries whose info fetch failed (already stored without it) get the
+# expired cached info or a stub, callers expect an info dict
+def _fill_missing_info(result, fallback=None):
+    for symbol, data in result.items():
+        if data.get("info") is None:
+            data["info"] = ((fallback or {}).get(symbol) or {}).get("info") or {"symbol": symbol}
+    return result
+
+
+def _fetch_coalesced(symbols, period, interval, save):
+    return singleflight.run(
+        symbols, period, interval,
+        fetch=lambda batch: _fetch_and_store(batch, period, interval, save),
+        load_cached=lambda batch, since: _load_cached_since(batch, since, period, interval),
+    )
+
+
+# --------------------------------------------------------------------
+# High-level: fetch data, using Redis/DB caches before Yahoo
+# --------------------------------------------------------------------
+# projection limits what is read from Redis (see redis_cache.Projection);
+# entries from the DB or the provider come back whole
+def fetch_yfinance_data(symbols, period="1y", interval="1d", reload=False, load_from_db=None, save_to_db=None, load_many_from_db=None, latest_dates_from_db=None, projection=FULL, save_many_to_db=None):
+    result = {}
+    symbols_to_fetch = []
+
+    # the database only holds daily bars, other resolutions live in Redis alone
+    if interval != "1d":
+        load_from_db = save_to_db = load_many_from_db = latest_dates_from_db = save_many_to_db = None
+    storage = Storage(save_to_db, latest_dates_from_db, load_many_from_db, save_many_to_db)
+    save = _db_writer(save_to_db, save_many_to_db)
+
+    symbols = normalize_symbols(symbols)
 
     if not symbols:
         return result
@@ -59,38 +311,67 @@ def fetch_yfinance_data(symbols, period="1y", interval="1d", reload=False, load_
     # If reload -> fetch everything fresh
     if reload:
         logger.info(f"Reload=True, fetching {len(symbols)} symbols fresh.")
-        fresh_data = _fetch_fresh_data(symbols, period, interval)
-        for symbol, data in fresh_data.items():
-            if not data:
-                continue
-            result[symbol] = data
-            if save_to_db:
-                try:
-                    save_to_db(symbol, data)
-                except Exception as e:
-                    logger.debug(f"save_to_db failed for {symbol}: {e}")
+        return _fill_missing_info(_fetch_coalesced(symbols, period, interval, save))
+
+    # Otherwise, check caches first
+    # 1) Redis cache, read in bulk; any cached series of this interval
+    #    covering the period is a hit, sliced down to the period
+    try:
+        cached = get_stock_data_many(symbols, period, interval, projection)
+    except Exception as e:
+        logger.debug(f"get_stock_data_many failed for {len(symbols)} symbols: {e}")
+        cached = {}
+
+    # expired entries are refetched, but kept in case the provider fails
+    fallback = {}
+    expired, revalidate = _classify(cached)
+    for symbol in expired:
+        fallback[symbol] = cached.pop(symbol)
+
+    # 2) DB cache in bulk for the Redis misses, when the caller supports it
+    db_cached = {}
+    if load_many_from_db:
+        misses = [symbol for symbol in symbols if not cached.get(symbol)]
+        if misses:
             try:
-                set_stock_data(symbol, data)
+                db_cached = {symbol: data for symbol, data in (load_many_from_db(misses) or {}).items() if data}
             except Exception as e:
-                logger.debug(f"set_stock_data failed for {symbol}: {e}")
-        return result
+                logger.debug(f"load_many_from_db failed for {len(misses)} symbols: {e}")
+
+        # stored history shorter than the period is only a fallback
+        for symbol in list(db_cached):
+            historical = db_cached[symbol].get("historical")
+            db_cached[symbol]["cached_period"] = covered_period(historical if isinstance(historical, pd.DataFrame) else None)
+            if not period_covers(db_cached[symbol]["cached_period"], period):
+                fallback.setdefault(symbol, db_cached.pop(symbol))
+
+        db_expired, db_revalidate = _classify(db_cached)
+        for symbol in db_expired:
+            fallback.setdefault(symbol, db_cached.pop(symbol))
+        revalidate += db_revalidate
+
+        # usable DB rows go back into Redis with their original fetch times
+        if db_cached:
+            try:
+                set_stock_data_many(db_cached, interval=interval)
+            except Exception as e:
+                logger.debug(f"Could not promote {len(db_cached)} DB entries to Redis: {e}")
 
-    # Otherwise, check caches first
-    for symbol in symbols:
-        # 1) Try Redis cache
-        try:
-            cached_data = get_stock_data(symbol)
-        except Exception as e:
-            logger.debug(f"get_stock_data failed for {symbol}: {e}")
-            cached_data = None
+    _schedule_revalidation(revalidate, period, interval, storage, {**db_cached, **cached})
 
+    for symbol in symbols:
+        cached_data = cached.get(symbol)
         if cached_data:
             result[symbol] = cached_data
             continue
 
-        # 2) Try DB cache
+        if db_cached.get(symbol):
+            result[symbol] = db_cached[symbol]
+            continue
+
+        # 2) Try DB cache (single-symbol loader, no freshness info -> revalidate)
         db_data = None
-        if load_from_db:
+        if load_from_db and not load_many_from_db and symbol not in fallback:
             try:
                 db_data = load_from_db(symbol)
             except Exception as e:
@@ -98,11 +379,7 @@ def fetch_yfinance_data(symbols, period="1y", interval="1d", reload=False, load_
 
         if db_data:
             result[symbol] = db_data
-            threading.Thread(
-                target=refresh_cache_async,
-                args=([symbol], period, interval, save_to_db),
-                daemon=True
-            ).start()
+            _schedule_revalidation([symbol], period, interval, storage)
             continue
 
         # 3) Need fresh data
@@ -110,151 +387,159 @@ def fetch_yfinance_data(symbols, period="1y", interval="1d", reload=False, load_
 
     if symbols_to_fetch:
         logger.info(f"Fetching fresh data for {len(symbols_to_fetch)} symbols: {symbols_to_fetch}")
-        fresh_data = _fetch_fresh_data(symbols_to_fetch, period, interval)
-        for symbol, data in fresh_data.items():
-            if not data:
-                continue
-            result[symbol] = data
-            if save_to_db:
-                try:
-                    save_to_db(symbol, data)
-                except Exception as e:
-                    logger.debug(f"save_to_db failed for {symbol}: {e}")
-            try:
-                set_stock_data(symbol, data)
-            except Exception as e:
-                logger.debug(f"set_stock_data failed for {symbol}: {e}")
+        by_period = {}
+        for symbol in symbols_to_fetch:
+            by_period.setdefault(_fetch_period(fallback.get(symbol), period), []).append(symbol)
+        for fetch_period, group in by_period.items():
+            result.update(_fill_missing_info(_fetch_coalesced(group, fetch_period, interval, save), fallback))
+
+        # provider down: an expired copy beats no data at all
+        served_expired = [symbol for symbol in symbols_to_fetch if symbol not in result and symbol in fallback]
+        if served_expired:
+            logger.warning(f"Serving expired cache for {len(served_expired)} symbols: {served_expired}")
+            for symbol in served_expired:
+                result[symbol] = fallback[symbol]
+
+    # DB rows and refetched longer series come back as the requested period
+    for data in result.values():
+        if isinstance(data.get("historical"), pd.DataFrame):
+            data["historical"] = slice_period(data["historical"], period)
 
     return result
 
 
 # --------------------------------------------------------------------
-# Low-level: always fetch fresh data from Yahoo Finance
+# Metadata stage: info & financials for one symbol, best-effort
 # --------------------------------------------------------------------
-def _fetch_fresh_data(symbols, period="1y", interval="1d"):
-    result = {}
+def _fetch_metadata(symbol, include_info=True, include_financials=True):
+    provider = get_provider()
+    limiter = get_limiter()
+    info = None
+    financials = None
+
+    # info stays None when the fetch fails, so a refresh keeps the cached copy
+    if include_info:
+        try:
+            info = {"symbol": symbol}
+            info.update(call_with_retry(provider.get_info, symbol, limiter=limiter, attempts=2))
+        except Exception as e:
+            info = None
+            logger.debug(f"info fetch failed for {symbol}: {e}\n{traceback.format_exc()}")
 
-    if isinstance(symbols, str):
-        symbols = [symbols]
+    # financials (best-effort)
+    if include_financials:
+        financials = {}
+        try:
+            financials = call_with_retry(provider.get_financials, symbol, limiter=limiter, attempts=2)
+        except Exception as e:
+            logger.debug(f"financials fetch failed for {symbol}: {e}\n{traceback.format_exc()}")
+
+    return info, financials
 
-    # Normalize and de-dupe safely
-    cleaned = []
-    seen = set()
-    for s in symbols:
-        if not isinstance(s, str):
-            continue
-        sym = s.strip().upper().replace(".", "-")
-        if sym and sym not in seen:
-            seen.add(sym)
-            cleaned.append(sym)
-    symbols = cleaned
 
-    batch_size = 20
-    batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+# start metadata requests on their own pool, wanted = {symbol: (info?, financials?)}
+def _start_metadata(wanted):
+    if not wanted:
+        return None, {}
+    pool = ThreadPoolExecutor(max_workers=METADATA_WORKERS, thread_name_prefix="metadata")
+    futures = {symbol: pool.submit(_fetch_metadata, symbol, *flags) for symbol, flags in wanted.items()}
+    return pool, futures
 
-    for batch in batches:
-        logger.info(f"Fetching batch of {len(batch)} symbols from Yahoo: {batch}")
+
+# {symbol: (info, financials)}, symbols outside keep are cancelled
+def _collect_metadata(pool, futures, keep=None):
+    result = {}
+    if pool is None:
+        return result
+    if keep is not None:
+        for symbol, future in futures.items():
+            if symbol not in keep:
+                future.cancel()
+    for symbol, future in futures.items():
+        if keep is not None and symbol not in keep:
+            continue
         try:
-            tickers_arg = batch[0] if len(batch) == 1 else batch
-
-            data = yf.download(
-                tickers=tickers_arg,
-                period=period,
-                interval=interval,
-                group_by="ticker",
-                auto_adjust=True,
-                prepost=False,
-                threads=True,
-                progress=False,
-            )
-
-            if data is None:
-                logger.warning(f"yfinance returned None for batch: {batch}")
-                continue
+            result[symbol] = future.result()
+        except Exception as e:
+            logger.debug(f"metadata fetch failed for {symbol}: {e}")
+    pool.shutdown(wait=False, cancel_futures=True)
+    return result
 
-            single = len(batch) == 1
-            logger.warning("getting stock info from yfinance=======")
 
-            for symbol in batch:
-                try:
-                    symbol_df = data if single else data.get(symbol)
-                    if symbol_df is None or not hasattr(symbol_df, "empty") or symbol_df.empty:
-                        logger.warning(f"No data available for {symbol}")
-                        continue
-
-                    symbol_df = symbol_df.dropna()
-                    if symbol_df.empty:
-                        logger.warning(f"No valid data for {symbol} after dropna()")
-                        continue
-
-                    # Flatten MultiIndex -> "AAPL_Close" then strip "AAPL_"
-                    if isinstance(symbol_df.columns, pd.MultiIndex):
-                        symbol_df.columns = [
-                            "_".join(col).strip() if isinstance(col, tuple) else col
-                            for col in symbol_df.columns.values
-                        ]
-                        prefix = f"{symbol}_"
-                        rename_map = {c: c[len(prefix):] for c in symbol_df.columns if c.startswith(prefix)}
-                        if rename_map:
-                            symbol_df = symbol_df.rename(columns=rename_map)
-
-                    # Expected OHLCV columns
-                    expected_cols = {"Open", "High", "Low", "Close", "Volume"}
-                    have_cols = set(symbol_df.columns)
-                    if not expected_cols.issubset(have_cols):
-                        logger.warning(f"Column mismatch for {symbol}: have {list(have_cols)}, expected {list(expected_cols)}")
-
-                    # Keep only standard OHLCV if present
-                    wanted_cols = [c for c in expected_cols if c in symbol_df.columns]
-                    if wanted_cols:
-                        symbol_df = symbol_df[wanted_cols]
-
-                    entry = {
-                        "historical": symbol_df,
-                        "last_updated": datetime.now().isoformat(),
-                        "info": {"symbol": symbol},
-                        "financials": {},
-                    }
-
-                    # Best-effort metadata & financials
-                    try:
-                        t = yf.Ticker(symbol)
-
-                        # fast_info (lightweight)
-                        try:
-                            fi = getattr(t, "fast_info", None)
-                            if fi:
-                                entry["info"].update(dict(fi))
-                        except Exception:
-                            pass
-
-                        # info (heavier / flaky)
-                        try:
-                            info = t.info
-                            if isinstance(info, dict) and info:
-                                entry["info"].update(info)
-                        except Exception as e:
-                            logger.debug(f"ticker.info failed for {symbol}: {e}\n{traceback.format_exc()}")
-
-                        # financials (best-effort)
-                        try:
-                            entry["financials"] = {
-                                "income_statement": t.income_stmt,
-                                "balance_sheet": t.balance_sheet,
-                                "cash_flow": t.cashflow,
-                            }
-                        except Exception as e:
-                            logger.debug(f"financials fetch failed for {symbol}: {e}\n{traceback.format_exc()}")
-
-                    except Exception as e:
-                        logger.debug(f"yf.Ticker init failed for {symbol}: {e}\n{traceback.format_exc()}")
-
-                    result[symbol] = entry
+# --------------------------------------------------------------------
+# Low-level: always fetch fresh data from the market data provider
+# --------------------------------------------------------------------
+def _fetch_fresh_data(symbols, period="1y", interval="1d", include_info=True, start=None, include_financials=None):
+    result = {}
 
-                except Exception as e:
-                    logger.error(f"Error processing data for {symbol}: {e}\n{traceback.format_exc()}")
+    symbols = normalize_symbols(symbols)
+    if not symbols:
+        return result
 
+    started = time.time()
+    if include_financials is None:
+        include_financials = include_info
+
+    # metadata runs on its own pool while the bars download below,
+    # callers that only need bars (price worker) skip it entirely
+    wanted = {}
+    if include_info or include_financials:
+        wanted = {symbol: (include_info, include_financials) for symbol in symbols}
+    metadata_pool, metadata_futures = _start_metadata(wanted)
+
+    provider = get_provider()
+    limiter = get_limiter()
+    remaining = list(symbols)
+    while remaining:
+        batch = remaining[:batch_sizer.size]
+        remaining = remaining[len(batch):]
+        logger.info(f"Fetching batch of {len(batch)} symbols from {provider.name}: {batch}")
+
+        throttled = False
+        try:
+            bars = call_with_retry(provider.download_bars, batch, period=period, interval=interval, start=start, limiter=limiter)
         except Exception as e:
+            throttled = is_rate_limit_error(e)
             logger.error(f"Error fetching data for batch {batch}: {e}\n{traceback.format_exc()}")
+            bars = {}
 
+        # a failed batch should not take all its members down with it,
+        # retry whatever is missing one symbol at a time
+        missing = [symbol for symbol in batch if bars.get(symbol) is None or bars[symbol].empty]
+        if len(batch) > 1:
+            for symbol in missing:
+                try:
+                    bars.update(call_with_retry(provider.download_bars, [symbol], period=period, interval=interval,
+                                                start=start, limiter=limiter, attempts=2))
+                except Exception as e:
+                    throttled = throttled or is_rate_limit_error(e)
+                    logger.warning(f"Retry failed for {symbol}: {e}")
+        batch_sizer.record(len(batch), len(missing), throttled)
+
+        for symbol in batch:
+            symbol_df = bars.get(symbol)
+            if symbol_df is None or symbol_df.empty:
+                continue
+            result[symbol] = {
+                "historical": symbol_df,
+                "last_updated": datetime.now().isoformat(),
+            }
+
+    bars_elapsed = time.time() - started
+
+    metadata_elapsed = 0.0
+    if wanted:
+        # no bars -> no entry, so their metadata is not needed
+        for symbol, (info, financials) in _collect_metadata(metadata_pool, metadata_futures, keep=result).items():
+            # a failed info fetch stays None, so the writes keep the stored info
+            if include_info:
+                result[symbol]["info"] = info
+            if financials is not None:
+                result[symbol]["financials"] = financials
+        metadata_elapsed = time.time() - started
+
+    logger.info(
+        f"Fetched {len(result)}/{len(symbols)} symbols in {time.time() - started:.1f}s "
+        f"(bars {bars_elapsed:.1f}s, metadata {metadata_elapsed:.1f}s overlapped)"
+    )
     return result
@@ -1,7 +1,7 @@
 
 
 from .connection import get_db, get_db_session, engine, SessionLocal, test_connection
-from .models import Base, Stock, HistoricalPrice, ScreeningResult
+from .models import Base, Stock, HistoricalPrice, ScreeningResult, IndexConstituent
 from .setup import setup_database, validate_database
 from .utils import (
     reset_database,
@@ -26,6 +26,7 @@ __all__ = [
     'Stock',
     'HistoricalPrice',
     'ScreeningResult',
+    'IndexConstituent',
 
     # Setup
     'setup_database',
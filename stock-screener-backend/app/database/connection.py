@@ -18,9 +18,12 @@ def get_database_url():
         return "sqlite:///./stock_screener.db"
 
 # Configuration 
+database_url = get_database_url()
 engine = create_engine(
-    get_database_url(),
+    database_url,
     echo=False, # true for debugging 
+    # timestamps are stored naive, in UTC like SQLite's CURRENT_TIMESTAMP
+    connect_args={'options': '-c timezone=utc'} if database_url.startswith('postgresql') else {},
     poolclass=QueuePool,
     pool_size=10,
     max_overflow=20,
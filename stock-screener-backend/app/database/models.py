@@ -53,6 +53,22 @@ class HistoricalPrice(Base):
     def __repr__(self):
         return f"<HistoricalPrice(symbol='{self.symbol}', date='{self.date}', close={self.close})>"
 
+# which index a symbol belongs to, refreshed daily from the market data provider
+class IndexConstituent(Base):
+    __tablename__ = 'index_constituents'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    index_name = Column(String(20), nullable=False, index=True)
+    symbol = Column(String(10), nullable=False, index=True)
+    updated_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('index_name', 'symbol', name='uq_index_symbol'),
+    )
+
+    def __repr__(self):
+        return f"<IndexConstituent(index='{self.index_name}', symbol='{self.symbol}')>"
+
 class ScreeningResult(Base):
     __tablename__ = 'screening_results'
     
@@ -10,7 +10,7 @@ import argparse
 import logging
 from app.database.setup import setup_database
 import threading
-from app.data.price_worker import fetch_and_cache_prices, REFRESH_INTERVAL
+from app.data.price_worker import fetch_and_cache_prices, add_price_listener, REFRESH_INTERVAL
 
 
 logging.basicConfig(
@@ -42,14 +42,33 @@ def main():
 
     parser = argparse.ArgumentParser(description='Stock Screener')
    
-    parser.add_argument('--mode', choices=['cli', 'api'], default='cli',
-                        help='Running mode (cli or api)')
+    parser.add_argument('--mode', choices=['cli', 'api', 'warmup', 'load'], default='cli',
+                        help='Running mode (cli, api, warmup to fill the caches and exit, or load to bulk-load the database and exit)')
+    parser.add_argument('--warmup', action='store_true',
+                        help='API mode: warm the caches in the background, see /api/v1/ready')
     
   
     args, remaining = parser.parse_known_args()
 
-    # start the background task to fetch price 
+    # mode 0: fill Redis from the DB (or provider) for the configured indexes, then exit
+    if args.mode == 'warmup':
+        from app.screener import StockScreener
+        from app.data.warmup import warmer
+        report = lambda p: print(f"Warm-up {p['done']}/{p['total']} symbols ({p['percent']}%), {p['loaded']} loaded")
+        progress = warmer.run(StockScreener().preload, report=report)
+        print(f"✅ Warm-up {progress['state']}: {progress['loaded']}/{progress['total']} symbols in {progress['elapsed']}s")
+        sys.exit(0 if progress['state'] == 'done' else 1)
 
+    # mode 0b: bulk-load the DB (and Redis) for the configured indexes, then exit
+    if args.mode == 'load':
+        from app.screener.screener import setup_initial_database_load
+        summary = setup_initial_database_load()
+        sys.exit(0 if summary['loaded'] else 1)
+
+    # start the background task to fetch price, every cycle also moves the
+    # standing watchlist screens served by /api/v1/watchlists/<id>/changes
+    from app.services.watchlist_monitor import standing_watchlists
+    add_price_listener(standing_watchlists.on_prices)
     worker_thread = threading.Thread(target=start_price_worker, daemon=True)
     worker_thread.start()
     
@@ -64,6 +83,10 @@ def main():
     # mode 2: API 
     elif args.mode == 'api':
         logger.info("Starting in API mode")
+        if args.warmup:
+            os.environ['WARMUP_ON_START'] = '1'
+        # debug=True runs a reloader parent, only its child should warm up
+        os.environ['WARMUP_RELOADER'] = '1'
         from app.api import app 
         app.run(debug=True, host='0.0.0.0', port=5000) 
         
@@ -2,3 +2,7 @@ from .fundamental import screen_stocks
 from .screener import StockScreener
 from .technical import screen_by_technical
 from .combined import create_combined_screen
+from .batch import screen_many
+from .projection import screen_projection
+from .cache import cached_screen
+from .standing import StandingScreen
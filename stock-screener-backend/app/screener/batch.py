@@ -0,0 +1,77 @@
+from typing import Dict, Any, List
+import logging
+from app.data.redis_cache import get_prices
+from .fundamental import apply_criteria, result_row
+from .technical import _as_dataframe, IndicatorValues, technical_match, technical_row
+from .derived import apply_live_prices
+
+logger = logging.getLogger(__name__)
+
+'''
+example:
+screens = [
+    {'fundamental_criteria': {'sector': 'Technology'}, 'limit': 10},
+    {'technical_criteria': {'rsi': ('<', 30)}},
+    {'fundamental_criteria': {'pe_ratio': ('<', 20)}, 'technical_criteria': {'ma': ('>', 100)}},
+]
+'''
+def screen_many(stock_data: Dict[str, Any], indicators, screens: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Evaluate several screens over the same universe in one pass.
+
+    Live prices are read and applied once, and every indicator is computed
+    at most once per symbol no matter how many screens use it. Returns one
+    result list per screen, shaped like the single-screen functions
+    (screen_stocks for fundamental-only screens, screen_by_technical
+    otherwise).
+    """
+    try:
+        prices = get_prices(stock_data.keys())
+    except Exception as e:
+        logger.warning(f"Live prices unavailable, screening on snapshot prices: {e}")
+        prices = {}
+    apply_live_prices(stock_data, prices)
+
+    fundamentals = [screen.get('fundamental_criteria') or {} for screen in screens]
+    technicals = [screen.get('technical_criteria') or {} for screen in screens]
+    matches = [[] for _ in screens]
+
+    for symbol, data in stock_data.items():
+        info = data['info']
+        if info.get('currentPrice') is None:
+            info['currentPrice'] = 0
+
+        values = None
+        for i in range(len(screens)):
+            if not apply_criteria(info, fundamentals[i]):
+                continue
+
+            if technicals[i]:
+                # history is decoded lazily, only once a screen needs it
+                if values is None:
+                    hist = _as_dataframe(data.get('historical'))
+                    if hist is None or hist.empty:
+                        values = False
+                    else:
+                        values = IndicatorValues(symbol, hist, indicators)
+                if not values or not technical_match(values, technicals[i]):
+                    continue
+
+            matches[i].append(symbol)
+
+    results = []
+    for i, screen in enumerate(screens):
+        if technicals[i]:
+            rows = [technical_row(symbol, stock_data[symbol]['info'], prices.get(symbol)) for symbol in matches[i]]
+            if fundamentals[i]:
+                rows.sort(key=lambda x: x.get('market_cap') or 0, reverse=True)
+        else:
+            rows = [result_row(symbol, stock_data[symbol]['info']) for symbol in matches[i]]
+            rows.sort(key=lambda x: x['market_cap'] or 0, reverse=True)
+
+        limit = screen.get('limit')
+        if limit:
+            rows = rows[:limit]
+        results.append(rows)
+
+    return results
@@ -0,0 +1,185 @@
+from typing import Dict, Any, List, Callable, Optional
+from datetime import datetime, timedelta
+import hashlib
+import json
+import logging
+import time
+from app.database import SessionLocal
+from app.database.models import ScreeningResult
+from app.data.redis_cache import redis_client, get_data_version
+
+logger = logging.getLogger(__name__)
+
+# results are keyed on the data version, so the TTL only bounds how long
+# unused entries stick around
+SCREEN_CACHE_TTL = 3600
+
+
+def _screen_key(screen_hash, data_version):
+    return f"screen:{screen_hash}:{data_version}"
+
+
+def _to_builtin(obj):
+    # numpy scalars -> python scalars
+    if hasattr(obj, 'item'):
+        return obj.item()
+    return str(obj)
+
+
+'''
+example:
+{'pe_ratio': ('<', 15), 'sector': ' Technology'}
+-> {'pe_ratio': ['<', 15.0], 'sector': 'Technology'}
+so that "pe_ratio<15" and "pe_ratio<15.0" share one cache entry
+'''
+def normalize_criteria(criteria: Dict[str, Any]) -> Dict[str, Any]:
+    normalized = {}
+    for field, condition in (criteria or {}).items():
+        field = str(field).strip()
+        if isinstance(condition, (tuple, list)) and len(condition) == 2:
+            op_symbol, threshold = condition
+            if isinstance(threshold, (int, float)) and not isinstance(threshold, bool):
+                threshold = float(threshold)
+            elif isinstance(threshold, str):
+                threshold = threshold.strip()
+            normalized[field] = [str(op_symbol).strip(), threshold]
+        elif isinstance(condition, dict):
+            normalized[field] = normalize_criteria(condition)
+        elif isinstance(condition, str):
+            normalized[field] = condition.strip()
+        else:
+            normalized[field] = condition
+    return normalized
+
+
+# identifies a screen; with data_version=None the same screen over any data
+def make_criteria_hash(kind: str, criteria: Dict[str, Any], index: str, period: str, interval: str, data_version: Optional[int] = None) -> str:
+    payload = {
+        'kind': kind,
+        'criteria': normalize_criteria(criteria),
+        'index': index,
+        'period': period,
+        'interval': interval,
+        'data_version': data_version,
+    }
+    raw = json.dumps(payload, sort_keys=True, default=_to_builtin)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+# results of a screen computed over `data_version`, None when there are none
+def get_cached_screen(screen_hash: str, data_version: int) -> Optional[List[Dict[str, Any]]]:
+    # 1) Redis
+    try:
+        value = redis_client.get(_screen_key(screen_hash, data_version))
+        if value is not None:
+            return json.loads(value)
+    except Exception as e:
+        logger.debug(f"Redis screen cache read failed for {screen_hash}: {e}")
+
+    # 2) screening_results table, one row per screen holding its latest results
+    session = SessionLocal()
+    try:
+        entry = (
+            session.query(ScreeningResult)
+            .filter(ScreeningResult.criteria_hash == screen_hash,
+                    ScreeningResult.expires_at > datetime.now())
+            .first()
+        )
+        if entry is None or (entry.criteria or {}).get('data_version') != data_version:
+            return None
+
+        # promote back into Redis for the next caller
+        try:
+            ttl = max(int((entry.expires_at - datetime.now()).total_seconds()), 1)
+            redis_client.setex(_screen_key(screen_hash, data_version), ttl, json.dumps(entry.results, default=_to_builtin))
+        except Exception as e:
+            logger.debug(f"Redis screen cache write failed for {screen_hash}: {e}")
+        return entry.results
+    except Exception as e:
+        logger.error(f"Error reading screening cache {screen_hash}: {e}")
+        return None
+    finally:
+        session.close()
+
+
+# the row of a screen is replaced on every store and expired rows are
+# pruned, so the table holds at most one live row per screen
+def store_screen(screen_hash: str, data_version: int, criteria: Dict[str, Any], results: List[Dict[str, Any]], index: str, execution_time: float, ttl: int = SCREEN_CACHE_TTL) -> None:
+    # round-trip through json so the DB JSON column only sees builtins
+    results = json.loads(json.dumps(results, default=_to_builtin))
+
+    try:
+        redis_client.setex(_screen_key(screen_hash, data_version), ttl, json.dumps(results))
+    except Exception as e:
+        logger.debug(f"Redis screen cache write failed for {screen_hash}: {e}")
+
+    session = SessionLocal()
+    try:
+        now = datetime.now()
+        session.query(ScreeningResult).filter(ScreeningResult.expires_at <= now,
+                                              ScreeningResult.criteria_hash != screen_hash).delete(synchronize_session=False)
+        entry = session.query(ScreeningResult).filter(ScreeningResult.criteria_hash == screen_hash).first()
+        if entry is None:
+            entry = ScreeningResult(criteria_hash=screen_hash)
+            session.add(entry)
+        entry.criteria = dict(criteria, data_version=data_version)
+        entry.results = results
+        entry.index_used = index
+        entry.execution_time = execution_time
+        entry.expires_at = now + timedelta(seconds=ttl)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Error saving screening cache {screen_hash}: {e}")
+    finally:
+        session.close()
+
+
+def cached_screen(kind: str, criteria: Dict[str, Any], index: str, period: str, interval: str,
+                  compute: Callable[[], List[Dict[str, Any]]], reload: bool = False,
+                  ttl: int = SCREEN_CACHE_TTL) -> List[Dict[str, Any]]:
+    """
+    Return the results of compute(), reusing an earlier identical screen when
+    the underlying stock data has not changed since.
+
+    compute should return the full (unlimited) result list, callers apply
+    their own limit so one entry serves every limit.
+    """
+    try:
+        data_version = get_data_version()
+    except Exception as e:
+        # without a data version we cannot tell stale entries apart
+        logger.debug(f"Data version unavailable, screening uncached: {e}")
+        return compute()
+
+    screen_hash = make_criteria_hash(kind, criteria, index, period, interval)
+
+    if not reload:
+        cached = get_cached_screen(screen_hash, data_version)
+        if cached is not None:
+            logger.info(f"Screen cache hit for {kind} screen on {index}")
+            return cached
+
+    start = time.time()
+    results = compute()
+    execution_time = time.time() - start
+
+    # the data moved while computing (new prices, or compute() itself filling
+    # the caches): the results may mix old and new data, so don't store them
+    try:
+        current_version = get_data_version()
+    except Exception as e:
+        logger.debug(f"Data version unavailable, screen results not stored: {e}")
+        return results
+    if current_version != data_version:
+        logger.debug(f"Data version moved {data_version} -> {current_version} during {kind} screen, results not stored")
+        return results
+
+    stored_criteria = {
+        'kind': kind,
+        'criteria': normalize_criteria(criteria),
+        'period': period,
+        'interval': interval,
+    }
+    store_screen(screen_hash, data_version, stored_criteria, results, index, execution_time, ttl)
+    return results
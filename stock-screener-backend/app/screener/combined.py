@@ -1,25 +1,28 @@
 from typing import Dict, Any, List
 from .fundamental import screen_stocks
 from .technical import screen_by_technical
+from .projection import screen_projection
 
-def create_combined_screen(screener, fundamental_criteria: Dict[str, Any], technical_criteria: Dict[str, Any], limit: int = 50) -> List[Dict[str, Any]]:
-    
+def create_combined_screen(screener, fundamental_criteria: Dict[str, Any], technical_criteria: Dict[str, Any], limit: int = 50,
+                           period: str = "1y", interval: str = "1d") -> List[Dict[str, Any]]:
+
+    # fundamentals only need the info dicts, so run them first
     fundamental_results = screen_stocks(screener.stock_data, fundamental_criteria)
     fundamental_symbols = [stock['symbol'] for stock in fundamental_results]
 
-    filtered_data = {symbol: screener.stock_data[symbol] for symbol in fundamental_symbols if symbol in screener.stock_data}
+    # and pull price history just for the survivors (screener.load_info leaves it out)
+    if hasattr(screener, 'ensure_history'):
+        filtered_data = screener.ensure_history(fundamental_symbols, projection=screen_projection([{'technical_criteria': technical_criteria}]),
+                                                period=period, interval=interval)
+    else:
+        filtered_data = {symbol: screener.stock_data[symbol] for symbol in fundamental_symbols if symbol in screener.stock_data}
 
-    # Create a temporary screener-like object to pass to screen_by_technical
-    class TempScreener:
-        pass
+    if not filtered_data:
+        return []
 
-    temp = TempScreener()
-    temp.stock_data = filtered_data
-    temp.indicators = screener.indicators
+    technical_results = screen_by_technical(filtered_data, screener.indicators, technical_criteria)
+    technical_results.sort(key=lambda x: x.get('market_cap') or 0, reverse=True)
 
-    technical_results = screen_by_technical(temp.stock_data, temp.indicators, technical_criteria)
-    technical_results.sort(key=lambda x: x.get('market_cap', 0), reverse=True)
-    
     if limit:
         return technical_results[:limit]
-    return technical_results 
\ No newline at end of file
+    return technical_results
@@ -0,0 +1,80 @@
+from typing import Dict, Any
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# info fields recomputed from the live price, and the criteria fields that read them
+DERIVED_FIELDS = {
+    'trailingPE': 'pe_ratio',
+    'priceToBook': 'price_to_book',
+    'marketCap': 'market_cap',
+    'dividendYield': 'dividend_yield',
+}
+
+# per-share fundamentals from Yahoo's info dict, these do not move with the price
+PER_SHARE_FIELDS = {
+    'eps': 'trailingEps',
+    'book_value': 'bookValue',
+    'shares': 'sharesOutstanding',
+    'dividend_rate': 'dividendRate',
+}
+
+
+def _column(infos, field):
+    return pd.to_numeric(pd.Series([info.get(field) for info in infos], dtype=object), errors='coerce').to_numpy(dtype=float)
+
+
+def apply_live_prices(stock_data: Dict[str, Any], prices: Dict[str, float]) -> pd.DataFrame:
+    """
+    Set currentPrice from the live prices and recompute the price-dependent
+    valuation fields (DERIVED_FIELDS) of every info dict in one vectorized pass.
+
+    Symbols without a live price keep their snapshot values. The info dicts
+    are updated in place; the derived values are also returned as a frame
+    indexed by symbol.
+    """
+    symbols = list(stock_data)
+    if not symbols:
+        return pd.DataFrame(columns=['currentPrice'] + list(DERIVED_FIELDS))
+
+    infos = []
+    for symbol in symbols:
+        data = stock_data[symbol]
+        if data.get('info') is None:
+            data['info'] = {}
+        infos.append(data['info'])
+
+    live = np.array([prices.get(symbol, np.nan) for symbol in symbols], dtype=float)
+    snapshot = _column(infos, 'currentPrice')
+    has_live = ~np.isnan(live)
+    price = np.where(has_live, live, snapshot)
+
+    eps = _column(infos, PER_SHARE_FIELDS['eps'])
+    book_value = _column(infos, PER_SHARE_FIELDS['book_value'])
+    shares = _column(infos, PER_SHARE_FIELDS['shares'])
+    dividend_rate = _column(infos, PER_SHARE_FIELDS['dividend_rate'])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        derived = pd.DataFrame({
+            'currentPrice': price,
+            # negative earnings have no meaningful P/E, Yahoo leaves it out too
+            'trailingPE': np.where(eps > 0, price / eps, np.nan),
+            'priceToBook': np.where(book_value > 0, price / book_value, np.nan),
+            'marketCap': np.where(shares > 0, price * shares, np.nan),
+            # Yahoo reports dividendYield in percent
+            'dividendYield': np.where(price > 0, 100 * dividend_rate / price, np.nan),
+        }, index=symbols)
+
+    # only symbols with a live price get rewritten, and only where we could
+    # derive a value, otherwise the snapshot stays as it was
+    values = derived.to_numpy()
+    fields = list(derived.columns)
+    for i in np.flatnonzero(has_live):
+        info = infos[i]
+        for j, field in enumerate(fields):
+            if not np.isnan(values[i, j]):
+                info[field] = float(values[i, j])
+
+    return derived
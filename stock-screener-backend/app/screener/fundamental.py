@@ -1,7 +1,8 @@
 from typing import Dict, Any, Tuple, Optional, List
 import logging
 import operator
-from app.data.redis_cache import get_price
+from app.data.redis_cache import get_prices
+from .derived import apply_live_prices, DERIVED_FIELDS
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +39,9 @@ FIELD_MAPPING = {
 
 EXACT_MATCH_FIELDS = ['sector', 'industry', 'country']
 
+# criteria fields whose outcome can change when only the live price moves
+PRICE_DEPENDENT_FIELDS = ['price'] + list(DERIVED_FIELDS.values())
+
 '''
 example:
 criteria = {
@@ -46,47 +50,62 @@ criteria = {
     'sector': 'Technology'           # Exact sector match
 }
 '''
+def evaluate_predicate(stock_info: Dict[str, Any], field: str, condition: Any) -> bool:
+    if field in EXACT_MATCH_FIELDS:
+        return stock_info.get(field, '') == condition
+
+    if isinstance(condition, tuple) and len(condition) == 2:
+        op_symbol, threshold = condition
+        info_field = FIELD_MAPPING.get(field, field)
+        actual_value = stock_info.get(info_field)
+
+        if actual_value is None:
+            return False
+
+        op_func = OPERATORS.get(op_symbol)
+        if op_func is None or not op_func(actual_value, threshold):
+            return False
+    return True
+
+
 def apply_criteria(stock_info: Dict[str, Any], criteria: Dict[str, Any]) -> bool:
 
     for field, condition in criteria.items():
-        if field in EXACT_MATCH_FIELDS:
-            if stock_info.get(field, '') != condition:
-                return False
-            continue
-
-        if isinstance(condition, tuple) and len(condition) == 2:
-            op_symbol, threshold = condition
-            info_field = FIELD_MAPPING.get(field, field)
-            actual_value = stock_info.get(info_field)
-
-            if actual_value is None:
-                return False
-            
-            op_func = OPERATORS.get(op_symbol)
-            if op_func is None or not op_func(actual_value, threshold):
-                return False
+        if not evaluate_predicate(stock_info, field, condition):
+            return False
     return True
 
+
+def result_row(symbol: str, info: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'symbol': symbol,
+        'name': info.get('shortName', 'Unknown'),
+        'sector': info.get('sector', 'Unknown'),
+        'market_cap': info.get('marketCap', 0),
+        'price': info.get('currentPrice', 0),
+        'pe_ratio': info.get('trailingPE', 0)
+    }
+
 # NEW TASK: enable sorting based on user input
 # NEW TASK: User could decide what field they want to get 
 def screen_stocks(stock_data: Dict[str, Any], criteria: Dict[str, Any], limit: Optional[int] = None) -> List[Dict[str, Any]]:
     
     results = []
 
+    # real-time prices from Redis, and the valuation fields that follow from them
+    try:
+        prices = get_prices(stock_data.keys())
+    except Exception as e:
+        logger.warning(f"Live prices unavailable, screening on snapshot prices: {e}")
+        prices = {}
+    apply_live_prices(stock_data, prices)
+
     for symbol, data in stock_data.items():
-        info = data.get('info') or {}
-        # Fetch real-time price from Redis
-        price = get_price(symbol)
-        info['currentPrice'] = price if price is not None else info.get('currentPrice', 0)
+        info = data['info']
+        if info.get('currentPrice') is None:
+            info['currentPrice'] = 0
         if apply_criteria(info, criteria):
-            results.append({
-                'symbol': symbol,
-                'name': info.get('shortName', 'Unknown'),
-                'sector': info.get('sector', 'Unknown'),
-                'market_cap': info.get('marketCap', 0),
-                'price': info['currentPrice'],
-                'pe_ratio': info.get('trailingPE', 0)
-            })
+            results.append(result_row(symbol, info))
 
     results.sort(key=lambda x: x['market_cap'], reverse=True)
     if limit is not None:
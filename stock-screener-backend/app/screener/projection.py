@@ -0,0 +1,23 @@
+from typing import Dict, Any, Iterable
+from app.data.redis_cache import Projection, CORE_INFO_FIELDS, OHLCV
+from .fundamental import FIELD_MAPPING
+from .technical import INDICATOR_COLUMNS
+
+
+def screen_projection(screens: Iterable[Dict[str, Any]]) -> Projection:
+    """
+    What a set of screens needs from the cache: the core info fields unless
+    a fundamental criterion names a field outside them (then Yahoo's whole
+    info dict), and only the bar columns the technical criteria read (no
+    bars at all for fundamental-only screens). Financials are never needed.
+    """
+    fields = set()
+    columns = set()
+    for screen in screens:
+        for field in screen.get('fundamental_criteria') or {}:
+            fields.add(FIELD_MAPPING.get(field, field))
+        for indicator in screen.get('technical_criteria') or {}:
+            columns.update(INDICATOR_COLUMNS.get(indicator, ('Close',)))
+
+    info = 'core' if fields <= set(CORE_INFO_FIELDS) else 'full'
+    return Projection(tuple(column for column in OHLCV if column in columns), info, False)
@@ -3,27 +3,47 @@ import pandas as pd
 import numpy as np
 import logging
 import operator
-from app.data import get_stock_symbols, fetch_yfinance_data, load_from_database, save_to_database
+from app.data import get_stock_symbols, fetch_yfinance_data, normalize_symbols, load_from_database, load_many_from_database, load_info_from_database, save_to_database, save_many_to_database, get_latest_dates
+from app.data.bulk_load import initial_load
+from app.data.redis_cache import get_stock_data_many, FULL, TECHNICAL, FUNDAMENTAL, OHLCV, CACHE_POLICIES
+from app.data.price_cube import price_cube
 from app.database import SessionLocal
 from app.indicators.indicators import TechnicalIndicators
 from .fundamental import screen_stocks as fundamental_screen_stocks, apply_criteria
 from .technical import screen_by_technical
 from .combined import create_combined_screen
+from .batch import screen_many
+from .projection import screen_projection
 
 # logging leven is Error! 
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
-def setup_initial_database_load(indexes=("dow30","sp500", "nasdaq100")):
-    for index in indexes:
-        symbols = get_stock_symbols(index=index)
-        print(f"Fetching and saving data for {len(symbols)} symbols in {index}...")
-        data = fetch_yfinance_data(symbols, reload=True) 
-        
-        for symbol, stock_data in data.items():
-            save_to_database(symbol, stock_data, SessionLocal)
-    
-    print("✅ Initial database load complete.")
+def setup_initial_database_load(indexes=None):
+    report = lambda p: print(f"Loaded {p['loaded'] + p['failed']}/{p['symbols']} symbols, {p['rows']} bars")
+    summary = initial_load(SessionLocal, indexes=indexes, report=report)
+    print(f"✅ Initial database load complete: {summary['loaded']}/{summary['symbols']} symbols, "
+          f"{summary['rows']} bars via {summary['method']} in {summary['elapsed']}s")
+    return summary
+
+
+# module-level so every fetch hands the refresh queue the same callbacks
+# and queued symbols can be refreshed together
+def _load_one(symbol):
+    return load_from_database(symbol, SessionLocal)
+
+def _save_one(symbol, data):
+    save_to_database(symbol, data, SessionLocal)
+
+def _save_many(entries):
+    save_many_to_database(entries, SessionLocal)
+
+def _load_many(symbols):
+    return load_many_from_database(symbols, SessionLocal)
+
+def _latest_dates(symbols):
+    return get_latest_dates(symbols, SessionLocal)
+
 
 class StockScreener:
 
@@ -43,21 +63,92 @@ class StockScreener:
         if auto_setup_db:
             setup_initial_database_load()
 
-    def load_data(self, symbols=None, reload=False, period="1y", interval="1d"):
-        if symbols is None:
-            symbols = get_stock_symbols(index="sp500") # defalt value 
-
-        self.stock_data = fetch_yfinance_data(
+    # period and interval travel as arguments, one screener is shared by
+    # concurrent requests
+    def _fetch_cached(self, symbols, reload=False, period="1y", interval="1d", projection=FULL):
+        return fetch_yfinance_data(
             symbols,
             period=period,
             interval=interval,
             reload=reload,
-            load_from_db=lambda symbol: load_from_database(symbol, SessionLocal),
-            save_to_db=lambda symbol, data: save_to_database(symbol, data, SessionLocal)
+            load_from_db=_load_one,
+            save_to_db=_save_one,
+            load_many_from_db=_load_many,
+            latest_dates_from_db=_latest_dates,
+            projection=projection,
+            save_many_to_db=_save_many
         )
+
+    # daily OHLCV comes straight off the memory-mapped price cube when it
+    # holds the symbol, not yet expired; the caches are only asked for the
+    # rest (info, and the bars of symbols the cube can't answer)
+    def _fetch(self, symbols, reload=False, period="1y", interval="1d", projection=FULL):
+        symbols = normalize_symbols(symbols)
+
+        bars = {}
+        if not reload and interval == "1d" and projection.columns and set(projection.columns) <= set(OHLCV):
+            bars = price_cube.frames(symbols, period, max_age=CACHE_POLICIES['bars']['stale'])
+        if not bars:
+            return self._fetch_cached(symbols, reload, period, interval, projection)
+
+        rest = [symbol for symbol in symbols if symbol not in bars]
+        result = self._fetch_cached(list(bars), period=period, interval=interval, projection=projection._replace(columns=()))
+        for symbol, data in result.items():
+            if symbol in bars:
+                data['historical'] = bars[symbol]
+        if rest:
+            result.update(self._fetch_cached(rest, period=period, interval=interval, projection=projection))
+        return {symbol: result[symbol] for symbol in symbols if symbol in result}
+
+    # projection: what the caller needs from the Redis cache, see screen_projection
+    def load_data(self, symbols=None, reload=False, period="1y", interval="1d", projection=FULL):
+        if symbols is None:
+            symbols = get_stock_symbols(index="sp500") # defalt value 
+
+        self.stock_data = self._fetch(symbols, reload=reload, period=period, interval=interval, projection=projection)
         return self.stock_data
+
+    # load only the info dicts, price history is pulled later by ensure_history
+    # for the symbols that are still in play (see create_combined_screen).
+    # Redis answers with just the info the projection asks for, the DB the rest
+    def load_info(self, symbols=None, period="1y", interval="1d", projection=FUNDAMENTAL):
+        if symbols is None:
+            symbols = get_stock_symbols(index="sp500")
+
+        symbols = normalize_symbols(symbols)
+
+        try:
+            cached = get_stock_data_many(symbols, period, interval, projection._replace(columns=(), financials=False))
+        except Exception as e:
+            logger.debug(f"Cached info unavailable for {len(symbols)} symbols: {e}")
+            cached = {}
+        infos = {symbol: data['info'] for symbol, data in cached.items() if data.get('info') is not None}
+        uncached = [symbol for symbol in symbols if symbol not in infos]
+        if uncached:
+            infos.update(load_info_from_database(uncached, SessionLocal))
+        self.stock_data = {symbol: {'info': infos[symbol]} for symbol in symbols if symbol in infos}
+
+        # nothing usable in the DB -> these need a full fetch anyway
+        missing = [symbol for symbol in symbols if symbol not in infos]
+        if missing:
+            logger.info(f"No stored info for {len(missing)} symbols, loading them in full")
+            self.stock_data.update(self._fetch(missing, period=period, interval=interval))
+        return self.stock_data
+
+    def ensure_history(self, symbols, reload=False, projection=TECHNICAL, period="1y", interval="1d"):
+        symbols = [symbol for symbol in normalize_symbols(symbols) if symbol in self.stock_data]
+        missing = [symbol for symbol in symbols if self.stock_data[symbol].get('historical') is None]
+        if missing or reload:
+            self.stock_data.update(self._fetch(symbols if reload else missing, reload=reload, period=period,
+                                               interval=interval, projection=projection))
+        return {symbol: self.stock_data[symbol] for symbol in symbols}
     
 
+    # pull symbols through the DB/Redis caches without touching stock_data,
+    # so it is safe next to requests (used by the startup warm-up)
+    def preload(self, symbols, period="1y", interval="1d"):
+        return self._fetch(symbols, period=period, interval=interval)
+
     def screen_stocks(self, criteria, limit=None):
         return fundamental_screen_stocks(self.stock_data, criteria, limit)
     
@@ -66,8 +157,13 @@ class StockScreener:
         return screen_by_technical(self.stock_data, self.indicators, criteria)
     
 
-    def create_combined_screen(self, fundamental_criteria, technical_criteria, limit=50):
-        return create_combined_screen(self, fundamental_criteria, technical_criteria, limit)
+    def create_combined_screen(self, fundamental_criteria, technical_criteria, limit=50, period="1y", interval="1d"):
+        return create_combined_screen(self, fundamental_criteria, technical_criteria, limit, period, interval)
+
+    # several screens against one universe: load once, evaluate in a single pass
+    def screen_many(self, screens, symbols=None, reload=False, period="1y", interval="1d"):
+        self.load_data(symbols=symbols, reload=reload, period=period, interval=interval, projection=screen_projection(screens))
+        return screen_many(self.stock_data, self.indicators, screens)
 
  
 # Example Usage 
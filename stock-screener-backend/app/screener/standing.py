@@ -0,0 +1,99 @@
+from typing import Dict, Any, List, Optional
+import logging
+from .fundamental import evaluate_predicate, result_row, PRICE_DEPENDENT_FIELDS
+from .derived import apply_live_prices
+
+logger = logging.getLogger(__name__)
+
+
+class StandingScreen:
+    """
+    A fundamental screen that stays loaded between live price updates.
+
+    evaluate() runs the full screen once and remembers every symbol's
+    outcome per predicate. update_prices() then only re-checks the
+    price-dependent predicates (PRICE_DEPENDENT_FIELDS) of the symbols
+    whose price actually changed and reports which symbols entered or
+    left the result set.
+    """
+
+    def __init__(self, criteria: Dict[str, Any]):
+        self.criteria = dict(criteria)
+        self.price_fields = [field for field in self.criteria if field in PRICE_DEPENDENT_FIELDS]
+        self.infos = {}     # symbol -> info dict the outcomes were computed from
+        self.outcomes = {}  # symbol -> {field: bool}
+        self.prices = {}    # symbol -> last price seen
+        self.matches = set()
+
+    def _refresh_prices(self, prices: Dict[str, float]) -> None:
+        # one vectorized pass for the price and the valuation fields derived from it
+        apply_live_prices({symbol: {'info': self.infos[symbol]} for symbol in prices}, prices)
+        for symbol in prices:
+            self.prices[symbol] = prices[symbol]
+
+    def _matches(self, symbol: str) -> bool:
+        return all(self.outcomes[symbol].values())
+
+    def evaluate(self, stock_data: Dict[str, Any], prices: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+        prices = prices or {}
+        self.infos = {}
+        self.outcomes = {}
+        self.prices = {}
+        self.matches = set()
+
+        for symbol, data in stock_data.items():
+            self.infos[symbol] = dict(data.get('info') or {})
+        self._refresh_prices({symbol: price for symbol, price in prices.items() if symbol in self.infos and price is not None})
+
+        for symbol, info in self.infos.items():
+            if info.get('currentPrice') is None:
+                info['currentPrice'] = 0
+            self.prices.setdefault(symbol, info['currentPrice'])
+            self.outcomes[symbol] = {
+                field: evaluate_predicate(info, field, condition)
+                for field, condition in self.criteria.items()
+            }
+            if self._matches(symbol):
+                self.matches.add(symbol)
+
+        return self.results()
+
+    def update_prices(self, prices: Dict[str, float]) -> Dict[str, List[Dict[str, Any]]]:
+        entered = []
+        exited = []
+
+        changed = {
+            symbol: price for symbol, price in prices.items()
+            if symbol in self.infos and price is not None and self.prices.get(symbol) != price
+        }
+        if not changed:
+            return {'entered': entered, 'exited': exited}
+
+        self._refresh_prices(changed)
+        if not self.price_fields:
+            return {'entered': entered, 'exited': exited}
+
+        for symbol in changed:
+            outcomes = self.outcomes[symbol]
+            for field in self.price_fields:
+                outcomes[field] = evaluate_predicate(self.infos[symbol], field, self.criteria[field])
+
+            was_match = symbol in self.matches
+            is_match = self._matches(symbol)
+            if is_match and not was_match:
+                self.matches.add(symbol)
+                entered.append(result_row(symbol, self.infos[symbol]))
+            elif was_match and not is_match:
+                self.matches.discard(symbol)
+                exited.append(result_row(symbol, self.infos[symbol]))
+
+        if entered or exited:
+            logger.info(f"Standing screen update: {len(entered)} entered, {len(exited)} exited")
+        return {'entered': entered, 'exited': exited}
+
+    def results(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        results = [result_row(symbol, self.infos[symbol]) for symbol in self.matches]
+        results.sort(key=lambda x: x['market_cap'] or 0, reverse=True)
+        if limit is not None:
+            results = results[:limit]
+        return results
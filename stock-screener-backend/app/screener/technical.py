@@ -3,7 +3,7 @@ import logging
 import operator
 import pandas as pd
 import numpy as np
-from app.data.redis_cache import get_price
+from app.data.redis_cache import get_prices
 from io import StringIO
 
 logger = logging.getLogger(__name__)
@@ -36,11 +36,94 @@ def _as_dataframe(x):
     return None
 
 
+def _last(series):
+    if series is None or series.empty or pd.isna(series.iloc[-1]):
+        return None
+    return series.iloc[-1]
+
+
+def _band_distance(band, hist):
+    # distance of the last close from the band, None when the band is not defined yet
+    last_band = _last(band)
+    if last_band is None:
+        return None
+    return hist['Close'].iloc[-1] - last_band
+
+
+# indicator name -> f(hist, indicators) giving the latest value (None if not available)
+INDICATOR_FUNCTIONS = {
+    'ma': lambda hist, ind: _last(ind.moving_average(hist['Close'])),
+    'ema': lambda hist, ind: _last(ind.exponential_moving_average(hist['Close'])),
+    'rsi': lambda hist, ind: _last(ind.relative_strength_index(hist['Close'])),
+    'macd_hist': lambda hist, ind: _last(ind.macd(hist['Close'])[2]),
+    'boll_upper': lambda hist, ind: _band_distance(ind.bollinger_bands(hist['Close'])[0], hist),
+    'boll_lower': lambda hist, ind: _band_distance(ind.bollinger_bands(hist['Close'])[2], hist),
+    'atr': lambda hist, ind: _last(ind.average_true_range(hist['High'], hist['Low'], hist['Close'])),
+    'obv': lambda hist, ind: _last(ind.on_balance_volume(hist['Close'], hist['Volume'])),
+    'stoch_k': lambda hist, ind: _last(ind.stochastic_oscillator(hist['High'], hist['Low'], hist['Close'])[0]),
+    'stoch_d': lambda hist, ind: _last(ind.stochastic_oscillator(hist['High'], hist['Low'], hist['Close'])[1]),
+    'roc': lambda hist, ind: _last(ind.rate_of_change(hist['Close'])),
+}
+
+# bar columns each indicator reads, see screen_projection
+INDICATOR_COLUMNS = {
+    'atr': ('High', 'Low', 'Close'),
+    'obv': ('Close', 'Volume'),
+    'stoch_k': ('High', 'Low', 'Close'),
+    'stoch_d': ('High', 'Low', 'Close'),
+}
+
+
+class IndicatorValues:
+    """Latest indicator values of one symbol, computed on first use and memoized."""
+
+    def __init__(self, symbol: str, hist: pd.DataFrame, indicators):
+        self.symbol = symbol
+        self.hist = hist
+        self.indicators = indicators
+        self._values = {}
+
+    def get(self, indicator: str):
+        if indicator not in self._values:
+            try:
+                self._values[indicator] = INDICATOR_FUNCTIONS[indicator](self.hist, self.indicators)
+            except Exception as e:
+                logger.warning(f"Error calculating {indicator} for {self.symbol}: {e}")
+                self._values[indicator] = None
+        return self._values[indicator]
+
+
+def technical_match(values: IndicatorValues, criteria: Dict[str, Any]) -> bool:
+    for indicator, condition in criteria.items():
+        # unknown indicators do not filter anything
+        if indicator not in INDICATOR_FUNCTIONS:
+            continue
+        op_symbol, threshold = condition
+        op_func = OPERATORS.get(op_symbol)
+        if op_func is None:
+            return False
+        value = values.get(indicator)
+        if value is None or not op_func(value, threshold):
+            return False
+    return True
+
+
+def technical_row(symbol: str, info: Dict[str, Any], price) -> Dict[str, Any]:
+    return {
+        'symbol': symbol,
+        'name': info.get('shortName', 'Unknown'),
+        'sector': info.get('sector', 'Unknown'),
+        'price': price,
+        'market_cap': info.get('marketCap'),
+        'pe_ratio': info.get('trailingPE')
+    }
+
+
 def screen_by_technical(stock_data: Dict[str, Any], indicators, criteria: Dict[str, Any]) -> List[Dict[str, Any]]:
     if not stock_data:
         raise ValueError("No stock data loaded. Call load_data first.")
 
-    results = []
+    matched = []
 
     for symbol, data in stock_data.items():
         hist_raw = data.get('historical')
@@ -50,140 +133,13 @@ def screen_by_technical(stock_data: Dict[str, Any], indicators, criteria: Dict[s
             logger.warning(f"No usable historical data for {symbol} (type={type(hist_raw).__name__})")
             continue
 
-        meets_criteria = True
-
-        for indicator, condition in criteria.items():
-            op_symbol, threshold = condition
-            op_func = OPERATORS.get(op_symbol)
+        if technical_match(IndicatorValues(symbol, hist, indicators), criteria):
+            matched.append(symbol)
 
-            try:
-                if indicator == 'ma':
-                    ma = indicators.moving_average(hist['Close'])
-                    if ma is None or ma.empty or pd.isna(ma.iloc[-1]):
-                        meets_criteria = False
-                        break
-                    value = ma.iloc[-1]
-                    if not op_func(value, threshold):
-                        meets_criteria = False
-                        break
-
-                elif indicator == 'ema':
-                    ema = indicators.exponential_moving_average(hist['Close'])
-                    if ema is None or ema.empty or pd.isna(ema.iloc[-1]):
-                        meets_criteria = False
-                        break
-                    value = ema.iloc[-1]
-                    if not op_func(value, threshold):
-                        meets_criteria = False
-                        break
-
-                elif indicator == 'rsi':
-                    rsi = indicators.relative_strength_index(hist['Close'])
-                    if rsi is None or rsi.empty or pd.isna(rsi.iloc[-1]):
-                        meets_criteria = False
-                        break
-                    value = rsi.iloc[-1]
-                    if not op_func(value, threshold):
-                        meets_criteria = False
-                        break
-
-                elif indicator == 'macd_hist':
-                    macd_line, signal_line, histogram = indicators.macd(hist['Close'])
-                    if histogram is None or histogram.empty or pd.isna(histogram.iloc[-1]):
-                        meets_criteria = False
-                        break
-                    value = histogram.iloc[-1]
-                    if not op_func(value, threshold):
-                        meets_criteria = False
-                        break
-
-                elif indicator == 'boll_upper':
-                    upper, middle, lower = indicators.bollinger_bands(hist['Close'])
-                    if upper is None or upper.empty or pd.isna(upper.iloc[-1]):
-                        meets_criteria = False
-                        break
-                    price = hist['Close'].iloc[-1]
-                    value = price - upper.iloc[-1]
-                    if not op_func(value, threshold):
-                        meets_criteria = False
-                        break
-
-                elif indicator == 'boll_lower':
-                    upper, middle, lower = indicators.bollinger_bands(hist['Close'])
-                    if lower is None or lower.empty or pd.isna(lower.iloc[-1]):
-                        meets_criteria = False
-                        break
-                    price = hist['Close'].iloc[-1]
-                    value = price - lower.iloc[-1]
-                    if not op_func(value, threshold):
-                        meets_criteria = False
-                        break
-
-                elif indicator == 'atr':
-                    atr = indicators.average_true_range(hist['High'], hist['Low'], hist['Close'])
-                    if atr is None or atr.empty or pd.isna(atr.iloc[-1]):
-                        meets_criteria = False
-                        break
-                    value = atr.iloc[-1]
-                    if not op_func(value, threshold):
-                        meets_criteria = False
-                        break
-
-                elif indicator == 'obv':
-                    obv = indicators.on_balance_volume(hist['Close'], hist['Volume'])
-                    if obv is None or obv.empty or pd.isna(obv.iloc[-1]):
-                        meets_criteria = False
-                        break
-                    value = obv.iloc[-1]
-                    if not op_func(value, threshold):
-                        meets_criteria = False
-                        break
-
-                elif indicator == 'stoch_k':
-                    k, d = indicators.stochastic_oscillator(hist['High'], hist['Low'], hist['Close'])
-                    if k is None or k.empty or pd.isna(k.iloc[-1]):
-                        meets_criteria = False
-                        break
-                    value = k.iloc[-1]
-                    if not op_func(value, threshold):
-                        meets_criteria = False
-                        break
-
-                elif indicator == 'stoch_d':
-                    k, d = indicators.stochastic_oscillator(hist['High'], hist['Low'], hist['Close'])
-                    if d is None or d.empty or pd.isna(d.iloc[-1]):
-                        meets_criteria = False
-                        break
-                    value = d.iloc[-1]
-                    if not op_func(value, threshold):
-                        meets_criteria = False
-                        break
-
-                elif indicator == 'roc':
-                    roc = indicators.rate_of_change(hist['Close'])
-                    if roc is None or roc.empty or pd.isna(roc.iloc[-1]):
-                        meets_criteria = False
-                        break
-                    value = roc.iloc[-1]
-                    if not op_func(value, threshold):
-                        meets_criteria = False
-                        break
+    try:
+        prices = get_prices(matched)
+    except Exception as e:
+        logger.warning(f"Live prices unavailable for technical results: {e}")
+        prices = {}
 
-            except Exception as e:
-                logger.warning(f"Error calculating {indicator} for {symbol}: {e}")
-                meets_criteria = False
-                break
-
-        if meets_criteria:
-            info = data.get('info', {})
-            price = get_price(symbol)
-            results.append({
-                'symbol': symbol,
-                'name': info.get('shortName', 'Unknown'),
-                'sector': info.get('sector', 'Unknown'),
-                'price': price,
-                'market_cap': info.get('marketCap'),
-                'pe_ratio': info.get('trailingPE')
-            })
-
-    return results 
\ No newline at end of file
+    return [technical_row(symbol, stock_data[symbol].get('info', {}), prices.get(symbol)) for symbol in matched]
@@ -2,15 +2,100 @@ import schedule
 import time
 import json
 import logging
+import threading
+from collections import deque
 from datetime import datetime, timedelta
 from app.database import SessionLocal
 from app.database.models import Watchlist, User, WatchlistMatch, Stock
-from app.screener import StockScreener, screen_stocks, screen_by_technical
+from app.screener import StockScreener, StandingScreen, screen_stocks, screen_by_technical, cached_screen
 from app.data import get_stock_symbols
+from app.data.redis_cache import CACHE_POLICIES
 from app.services.email_service import send_watchlist_alert
 
 logger = logging.getLogger(__name__)
 
+# price moves kept per watchlist for /api/watchlists/<id>/changes
+CHANGE_HISTORY = 100
+
+
+def criteria_to_dict(criteria_list):
+    """Convert frontend criteria format to screener format"""
+    criteria_dict = {}
+    for criterion in criteria_list:
+        if criterion.get('field') and criterion.get('operator') and criterion.get('value'):
+            field = criterion['field']
+            operator = criterion['operator']
+            try:
+                value = float(criterion['value'])
+                criteria_dict[field] = (operator, value)
+            except (ValueError, TypeError):
+                # Handle non-numeric values (like sector names)
+                criteria_dict[field] = criterion['value']
+    return criteria_dict
+
+
+class StandingWatchlists:
+    """
+    A StandingScreen per watchlist over its fundamental criteria, kept
+    between live price updates. on_prices is registered with the price
+    worker, each cycle re-checks only the price-dependent predicates and
+    records which symbols entered or left a watchlist.
+
+    A screen is rebuilt from the stock data when the criteria or index
+    change, or once the fundamentals it was built from are no longer fresh.
+    """
+
+    def __init__(self, history=CHANGE_HISTORY, max_age=CACHE_POLICIES['info']['fresh']):
+        self.history = history
+        self.max_age = max_age
+        self.screens = {}  # watchlist id -> (criteria, index, built at, StandingScreen)
+        self.changes = {}  # watchlist id -> deque of {'at', 'entered', 'exited'}
+        self._lock = threading.Lock()
+
+    def watch(self, watchlist_id, criteria, index, load):
+        """
+        The standing screen of a watchlist, built with load() (the stock
+        data of index) when there is no usable one. None without criteria.
+        """
+        if not criteria:
+            self.forget(watchlist_id)
+            return None
+        with self._lock:
+            entry = self.screens.get(watchlist_id)
+        if entry is not None and entry[:2] == (criteria, index) and time.time() - entry[2] < self.max_age:
+            return entry[3]
+
+        screen = StandingScreen(criteria)
+        screen.evaluate(load())
+        with self._lock:
+            self.screens[watchlist_id] = (dict(criteria), index, time.time(), screen)
+            self.changes.setdefault(watchlist_id, deque(maxlen=self.history))
+        logger.info(f"Standing screen for watchlist {watchlist_id}: {len(screen.matches)} matches")
+        return screen
+
+    def on_prices(self, prices):
+        with self._lock:
+            for watchlist_id, (_, _, _, screen) in self.screens.items():
+                delta = screen.update_prices(prices)
+                if delta['entered'] or delta['exited']:
+                    self.changes[watchlist_id].append(dict(delta, at=datetime.utcnow().isoformat()))
+
+    def snapshot(self, watchlist_id, limit=None):
+        """Current matches and the recorded changes, oldest first"""
+        with self._lock:
+            entry = self.screens.get(watchlist_id)
+            if entry is None:
+                return {'matches': [], 'changes': []}
+            return {'matches': entry[3].results(limit), 'changes': list(self.changes[watchlist_id])}
+
+    def forget(self, watchlist_id):
+        with self._lock:
+            self.screens.pop(watchlist_id, None)
+            self.changes.pop(watchlist_id, None)
+
+
+standing_watchlists = StandingWatchlists()
+
 class WatchlistMonitor:
     def __init__(self):
         self.screener = StockScreener()
@@ -27,17 +112,25 @@ class WatchlistMonitor:
             fundamental_criteria_dict = self._convert_criteria_to_dict(fundamental_criteria)
             technical_criteria_dict = self._convert_criteria_to_dict(technical_criteria)
             
-            # Get stock symbols
             index = criteria.get('index', 'sp500')
-            symbols = get_stock_symbols(index=index)
-      
-            self.screener.load_data(symbols=symbols, reload=False, period='1y', interval='1d')
+            loaded = []
+
+            # only touch the symbol list and stock data on a screen cache miss
+            def ensure_loaded():
+                if not loaded:
+                    symbols = get_stock_symbols(index=index)
+                    self.screener.load_data(symbols=symbols, reload=False, period='1y', interval='1d')
+                    loaded.append(True)
+                return self.screener.stock_data
             
             results = []
             
             if fundamental_criteria_dict:
                 try:
-                    fundamental_results = screen_stocks(self.screener.stock_data, fundamental_criteria_dict)
+                    fundamental_results = cached_screen(
+                        'fundamental', fundamental_criteria_dict, index, '1y', '1d',
+                        lambda: screen_stocks(ensure_loaded(), fundamental_criteria_dict)
+                    )
                     results.extend(fundamental_results)
                     logger.info(f"Fundamental screening found {len(fundamental_results)} results")
                 except Exception as e:
@@ -45,7 +138,10 @@ class WatchlistMonitor:
             
             if technical_criteria_dict:
                 try:
-                    technical_results = screen_by_technical(self.screener.stock_data, self.screener.indicators, technical_criteria_dict)
+                    technical_results = cached_screen(
+                        'technical', technical_criteria_dict, index, '1y', '1d',
+                        lambda: screen_by_technical(ensure_loaded(), self.screener.indicators, technical_criteria_dict)
+                    )
                     results.extend(technical_results)
                     logger.info(f"Technical screening found {len(technical_results)} results")
                 except Exception as e:
@@ -124,18 +220,7 @@ class WatchlistMonitor:
     
     def _convert_criteria_to_dict(self, criteria_list):
         """Convert frontend criteria format to screener format"""
-        criteria_dict = {}
-        for criterion in criteria_list:
-            if criterion.get('field') and criterion.get('operator') and criterion.get('value'):
-                field = criterion['field']
-                operator = criterion['operator']
-                try:
-                    value = float(criterion['value'])
-                    criteria_dict[field] = (operator, value)
-                except (ValueError, TypeError):
-                    # Handle non-numeric values (like sector names)
-                    criteria_dict[field] = criterion['value']
-        return criteria_dict
+        return criteria_to_dict(criteria_list)
     
     def check_all_watchlists(self):
         """Check all active and monitoring watchlists"""
@@ -0,0 +1,83 @@
+"""
+Payload size and encode/decode time of cached bar frames, the old JSON
+format against the binary bar codec, at S&P 500 scale.
+
+    python benchmarks/bench_bar_codec.py --symbols 503 --period 1y
+    python benchmarks/bench_bar_codec.py --period 5d --interval 5m
+
+Bars come from the synthetic provider, so no network is needed.
+"""
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import argparse
+import json
+import time
+from io import StringIO
+
+import pandas as pd
+
+from app.data.bar_codec import encode_bars, decode_bars, available_codecs
+from app.data.providers import SyntheticProvider
+
+
+# what redis_cache stored before the binary codec: to_json text inside json.dumps
+def json_encode(df):
+    return json.dumps(df.to_json(orient="split", date_format="iso")).encode("utf-8")
+
+
+def json_decode(blob):
+    return pd.read_json(StringIO(json.loads(blob)), orient="split")
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def run(frames, repeat):
+    formats = [("json", json_encode, json_decode)]
+    for codec in available_codecs():
+        formats.append((f"binary/{codec}", lambda df, codec=codec: encode_bars(df, codec=codec), decode_bars))
+
+    rows = []
+    for name, encode, decode in formats:
+        encode_time, blobs = _best(lambda: [encode(df) for df in frames], repeat)
+        decode_time, _ = _best(lambda: [decode(blob) for blob in blobs], repeat)
+        rows.append((name, sum(len(blob) for blob in blobs), encode_time, decode_time))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cached bar serialization")
+    parser.add_argument("--symbols", type=int, default=503)
+    parser.add_argument("--period", default="1y")
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    provider = SyntheticProvider(seed=42, universe_size=max(args.symbols, 600), as_of="2024-06-14")
+    symbols = provider.get_index_constituents("all")[:args.symbols]
+    bars = provider.download_bars(symbols, period=args.period, interval=args.interval)
+    frames = [bars[symbol] for symbol in symbols]
+    n_rows = sum(len(df) for df in frames)
+    print(f"{len(frames)} symbols, {n_rows} bars ({args.period} {args.interval}), best of {args.repeat}\n")
+
+    rows = run(frames, args.repeat)
+    base_size, base_encode, base_decode = rows[0][1:]
+    print(f"{'format':<14}{'size':>12}{'vs json':>9}{'encode':>11}{'decode':>11}{'decode x':>10}")
+    for name, size, encode_time, decode_time in rows:
+        print(f"{name:<14}{size / 1e6:>10.2f}MB{size / base_size:>9.2f}"
+              f"{encode_time * 1000:>9.0f}ms{decode_time * 1000:>9.0f}ms{base_decode / decode_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Time to get the daily bars of a whole universe into DataFrames: decoding
+the cached column blobs (what a Redis read does, network excluded) against
+opening the memory-mapped price cube in a fresh process and reading it warm.
+
+    python benchmarks/bench_price_cube.py --symbols 600 --period 1y
+
+Bars come from the synthetic provider, so no network is needed.
+"""
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import argparse
+import tempfile
+import time
+
+from app.data.bar_codec import split_bars, join_bars
+from app.data.price_cube import PriceCube
+from app.data.providers import SyntheticProvider
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark universe loading from the price cube")
+    parser.add_argument("--symbols", type=int, default=600)
+    parser.add_argument("--period", default="1y")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    provider = SyntheticProvider(seed=42, universe_size=max(args.symbols, 600), as_of="2024-06-14")
+    symbols = provider.get_index_constituents("all")[:args.symbols]
+    bars = provider.download_bars(symbols, period=args.period, interval="1d")
+    print(f"{len(symbols)} symbols, {sum(len(df) for df in bars.values())} bars ({args.period} 1d), best of {args.repeat}\n")
+
+    blobs = {symbol: split_bars(bars[symbol]) for symbol in symbols}
+    decode_time, _ = _best(lambda: {symbol: join_bars(*blobs[symbol]) for symbol in symbols}, args.repeat)
+
+    with tempfile.TemporaryDirectory() as path:
+        build_time, _ = _best(lambda: PriceCube(path).update(bars), 1)
+        # a new PriceCube per run is what a starting worker sees: index parse + mmap
+        cold_time, _ = _best(lambda: PriceCube(path).frames(symbols, args.period), args.repeat)
+        cube = PriceCube(path)
+        cube.frames(symbols, args.period)
+        warm_time, frames = _best(lambda: cube.frames(symbols, args.period), args.repeat)
+        assert len(frames) == len(symbols)
+
+    print(f"{'source':<22}{'time':>10}{'vs decode':>11}")
+    for name, elapsed in (("codec decode", decode_time), ("cube, fresh process", cold_time), ("cube, warm", warm_time)):
+        print(f"{name:<22}{elapsed * 1000:>8.0f}ms{decode_time / elapsed:>10.1f}x")
+    print(f"\nbuilding the cube: {build_time * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
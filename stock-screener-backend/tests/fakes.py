@@ -0,0 +1,100 @@
+class FakeRedis:
+    """
+    Strings and hashes in dicts, enough of redis-py for the caches, locks
+    and invalidations under test. Pipelines queue calls and run them on
+    execute(); TTLs are accepted and ignored.
+    """
+
+    def __init__(self):
+        self.strings = {}
+        self.store = self.strings
+        self.hashes = {}
+        self.published = []
+        self.renewed = []
+        self.mget_calls = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def get(self, key):
+        return self.strings.get(key)
+
+    def set(self, key, value, nx=False, px=None, ex=None):
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = value
+        return True
+
+    def setex(self, key, ttl, value):
+        self.strings[key] = value
+        return True
+
+    def mget(self, keys):
+        self.mget_calls += 1
+        return [self.strings.get(key) for key in keys]
+
+    def incr(self, key):
+        self.strings[key] = int(self.strings.get(key, 0)) + 1
+        return self.strings[key]
+
+    def exists(self, key):
+        return int(key in self.strings or key in self.hashes)
+
+    def delete(self, key):
+        return int(self.strings.pop(key, None) is not None or self.hashes.pop(key, None) is not None)
+
+    def expire(self, key, ttl):
+        return int(key in self.strings or key in self.hashes)
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        mapping = mapping if mapping is not None else {field: value}
+        self.hashes.setdefault(key, {}).update({k: v if isinstance(v, bytes) else str(v) for k, v in mapping.items()})
+        return len(mapping)
+
+    def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(field) for field in fields]
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 1
+
+    # the owner-checked lock scripts of singleflight: renew or release
+    def eval(self, script, numkeys, key, token, *args):
+        owned = self.strings.get(key) == token
+        if 'PEXPIRE' in script:
+            self.renewed.append(key)
+            return int(owned)
+        if owned:
+            del self.strings[key]
+        return int(owned)
+
+
+class FakePipeline:
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+
+        def queue(*args, **kwargs):
+            self.calls.append((method, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        calls, self.calls = self.calls, []
+        return [method(*args, **kwargs) for method, args, kwargs in calls]
+
+
+class NoRedis:
+    """Every call fails like a Redis that is down."""
+
+    def __getattr__(self, name):
+        def unavailable(*args, **kwargs):
+            raise ConnectionError("no redis")
+        return unavailable
@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from app.data.bar_codec import encode_bars, decode_bars, is_encoded_bars, available_codecs, split_bars, join_bars
+
+
+def _bars(n=300, tz=None):
+    index = pd.date_range("2024-01-02 09:30", periods=n, freq="min", tz=tz, name="Date")
+    rng = np.random.default_rng(1)
+    close = 100 + rng.normal(0, 1, n).cumsum()
+    return pd.DataFrame({
+        "Open": close + 0.1, "High": close + 0.5, "Low": close - 0.5, "Close": close,
+        "Volume": rng.integers(0, 10_000, n),
+    }, index=index)
+
+
+class TestBarCodec(unittest.TestCase):
+
+    def test_round_trip_every_codec(self):
+        bars = _bars()
+        for codec in available_codecs():
+            blob = encode_bars(bars, codec=codec)
+            self.assertTrue(is_encoded_bars(blob))
+            decoded = decode_bars(blob)
+            pd.testing.assert_frame_equal(decoded, bars, check_freq=False)
+            self.assertEqual(decoded["Volume"].dtype, np.int64)
+
+    def test_timezone_nan_and_empty(self):
+        bars = _bars(tz="America/New_York")
+        bars.iloc[3, 0] = np.nan
+        pd.testing.assert_frame_equal(decode_bars(encode_bars(bars)), bars, check_freq=False)
+
+        empty = bars.iloc[:0]
+        pd.testing.assert_frame_equal(decode_bars(encode_bars(empty)), empty, check_freq=False)
+
+    def test_compressed_is_smaller(self):
+        bars = _bars(2000)
+        self.assertLess(len(encode_bars(bars, codec="zlib")), len(encode_bars(bars, codec="none")))
+
+    def test_columns_split_and_join(self):
+        bars = _bars(tz="America/New_York")
+        index, columns = split_bars(bars)
+        self.assertEqual(list(columns), list(bars.columns))
+        pd.testing.assert_frame_equal(join_bars(index, columns), bars, check_freq=False)
+
+        close = join_bars(index, {"Close": columns["Close"], "Volume": columns["Volume"]})
+        pd.testing.assert_frame_equal(close, bars[["Close", "Volume"]], check_freq=False)
+
+        with self.assertRaises(ValueError):
+            join_bars(split_bars(bars.iloc[:10])[0], {"Close": columns["Close"]})
+
+    def test_unsupported_frames_are_rejected(self):
+        with self.assertRaises(TypeError):
+            encode_bars(pd.DataFrame({"Close": [1.0]}))
+        with self.assertRaises(TypeError):
+            encode_bars(pd.DataFrame({"Note": ["x"]}, index=pd.to_datetime(["2024-01-02"])))
+        self.assertFalse(is_encoded_bars('{"columns": []}'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import copy
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from flask import Flask
+
+from app.api import routes
+from app.data import UnknownIndexError
+from app.indicators.indicators import TechnicalIndicators
+from app.screener import screener as screener_module
+from app.screener import StockScreener
+from app.screener.batch import screen_many
+from app.screener.fundamental import screen_stocks
+from app.screener.technical import screen_by_technical
+from app.screener.projection import screen_projection
+
+
+def _history(start, step, days=60):
+    dates = pd.date_range('2024-01-01', periods=days, freq='B')
+    close = start + step * np.arange(days, dtype=float)
+    return pd.DataFrame({
+        'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+        'Volume': np.full(days, 1000),
+    }, index=dates)
+
+
+class TestScreenMany(unittest.TestCase):
+
+    def setUp(self):
+        self.indicators = TechnicalIndicators()
+        self.stock_data = {
+            'UPP': {'info': {'shortName': 'Up', 'sector': 'Technology', 'marketCap': 3e9, 'currentPrice': 160.0, 'trailingPE': 15.0},
+                    'historical': _history(100, 1.0)},
+            'DWN': {'info': {'shortName': 'Down', 'sector': 'Technology', 'marketCap': 2e9, 'currentPrice': 41.0, 'trailingPE': 30.0},
+                    'historical': _history(100, -1.0)},
+            'FLT': {'info': {'shortName': 'Flat', 'sector': 'Energy', 'marketCap': 1e9, 'currentPrice': 50.0, 'trailingPE': 10.0},
+                    'historical': _history(50, 0.0).to_json(orient='split')},
+        }
+
+    def test_matches_single_screens(self):
+        fundamental = {'sector': 'Technology'}
+        technical = {'ma': ('>', 100)}
+        screens = [
+            {'fundamental_criteria': fundamental},
+            {'technical_criteria': technical},
+            {'fundamental_criteria': {'pe_ratio': ('<', 20)}, 'technical_criteria': {'rsi': ('>', 50)}},
+        ]
+
+        batch = screen_many(copy.deepcopy(self.stock_data), self.indicators, screens)
+
+        self.assertEqual(batch[0], screen_stocks(copy.deepcopy(self.stock_data), fundamental))
+        self.assertEqual(batch[1], screen_by_technical(copy.deepcopy(self.stock_data), self.indicators, technical))
+        self.assertEqual([r['symbol'] for r in batch[2]], ['UPP'])
+
+    def test_limits_apply_per_screen(self):
+        screens = [
+            {'fundamental_criteria': {'market_cap': ('>', 0)}, 'limit': 1},
+            {'fundamental_criteria': {'market_cap': ('>', 0)}},
+        ]
+        batch = screen_many(self.stock_data, self.indicators, screens)
+        self.assertEqual([r['symbol'] for r in batch[0]], ['UPP'])
+        self.assertEqual([r['symbol'] for r in batch[1]], ['UPP', 'DWN', 'FLT'])
+
+
+class TestScreenProjection(unittest.TestCase):
+
+    def test_reads_only_what_the_criteria_use(self):
+        fundamental = screen_projection([{'fundamental_criteria': {'pe_ratio': ('<', 20), 'sector': 'Technology'}}])
+        self.assertEqual(fundamental, ((), 'core', False))
+
+        batch = screen_projection([
+            {'technical_criteria': {'rsi': ('<', 30)}},
+            {'fundamental_criteria': {'fullTimeEmployees': ('>', 1000)}, 'technical_criteria': {'obv': ('>', 0)}},
+        ])
+        self.assertEqual(batch, (('Close', 'Volume'), 'full', False))
+
+
+class TestSharedScreener(unittest.TestCase):
+
+    def test_combined_screen_fetches_history_for_its_own_period(self):
+        cached = {'AAA': {'info': {'shortName': 'Alpha', 'sector': 'Technology', 'marketCap': 3e9}}}
+        fetch = mock.Mock(side_effect=lambda symbols, **kwargs: {s: {'historical': _history(100, 1)} for s in symbols})
+        with mock.patch.object(screener_module, 'get_stock_data_many', return_value=cached), \
+                mock.patch.object(screener_module, 'fetch_yfinance_data', fetch):
+            screener = StockScreener()
+            screener.load_info(['AAA'], period='6mo', interval='1wk')
+            results = screener.create_combined_screen({'sector': 'Technology'}, {'rsi': ('>', 0)}, period='6mo', interval='1wk')
+
+        self.assertEqual([r['symbol'] for r in results], ['AAA'])
+        self.assertEqual((fetch.call_args.kwargs['period'], fetch.call_args.kwargs['interval']), ('6mo', '1wk'))
+        self.assertFalse(hasattr(screener, 'period'))
+
+
+class TestBatchRoute(unittest.TestCase):
+
+    def setUp(self):
+        app = Flask(__name__)
+        routes.register_routes(app)
+        self.client = app.test_client()
+
+    def _post(self, screens):
+        return self.client.post('/api/v1/screen/batch', json={'index': 'dow30', 'screens': screens})
+
+    def test_bad_specs_are_rejected_with_their_index(self):
+        for screens, bad in (
+            ([{'fundamental_criteria': 'pe_ratio<20'}, 'rsi<30'], 1),
+            ([None], 0),
+            ([{'technical_criteria': 'rsi<30'}, {'fundamental_criteria': 'pe_ratio<20'}, {'technical_criteria': 30}], 2),
+            ([{'limit': 5}], 0),
+        ):
+            response = self._post(screens)
+            self.assertEqual(response.status_code, 400, screens)
+            self.assertEqual(response.get_json()['screen'], bad)
+
+    def test_unknown_index_is_a_bad_request(self):
+        with mock.patch.object(routes, 'get_stock_symbols', side_effect=UnknownIndexError('nope')):
+            self.assertEqual(self.client.get('/api/v1/symbols/nope').status_code, 400)
+            response = self._post([{'fundamental_criteria': 'pe_ratio<20'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unknown index: nope', response.get_json()['error'])
+
+    def test_valid_specs_are_screened(self):
+        with mock.patch.object(routes, 'get_stock_symbols', return_value=['AAA']), \
+                mock.patch.object(routes.screener, 'screen_many', return_value=[[{'symbol': 'AAA'}]]) as screen_many:
+            response = self._post([{'fundamental_criteria': 'pe_ratio<20', 'limit': 5}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['results'][0]['count'], 1)
+        self.assertEqual(screen_many.call_args[0][0][0]['limit'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine, select, func
+from sqlalchemy.orm import sessionmaker
+
+from app.data import bulk_load
+from app.data.bulk_load import initial_load, CopyWriter
+from app.data.providers import SyntheticProvider
+from app.database.models import Base, Stock, HistoricalPrice
+
+
+INDEXES = {'dow30': ['AAPL', 'MSFT', 'JPM'], 'nasdaq100': ['AAPL', 'MSFT', 'NVDA', 'BAD1', 'BAD2']}
+
+
+class TestInitialLoad(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(bulk_load, 'get_stock_symbols', side_effect=lambda index: list(INDEXES[index]))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        self.sessions = sessionmaker(bind=engine)
+        self.provider = SyntheticProvider(seed=7, as_of="2024-06-14")
+        self.calls = []
+
+    def _fetch(self, symbols, period):
+        self.calls.append(list(symbols))
+        if 'BAD1' in symbols:
+            raise ConnectionError("provider down")
+        bars = self.provider.download_bars(symbols, period=period, interval='1d')
+        return {symbol: {'info': {'shortName': symbol}, 'historical': bars[symbol]} for symbol in symbols}
+
+    def _count(self, model):
+        with self.sessions() as session:
+            return session.execute(select(func.count()).select_from(model)).scalar()
+
+    def test_symbols_are_loaded_once_in_one_transaction(self):
+        reports = []
+        summary = initial_load(self.sessions, indexes=['dow30', 'nasdaq100'], period='3mo',
+                               workers=2, chunk_size=2, fetch=self._fetch, report=reports.append)
+
+        fetched = sorted(symbol for chunk in self.calls for symbol in chunk)
+        self.assertEqual(fetched, ['AAPL', 'BAD1', 'BAD2', 'JPM', 'MSFT', 'NVDA'])
+        self.assertEqual(len(reports), 3)
+
+        self.assertEqual(summary['method'], 'executemany')
+        self.assertEqual(summary['indexes'], {'dow30': 3, 'nasdaq100': 5})
+        self.assertEqual(summary['symbols'], 6)
+        self.assertEqual((summary['loaded'], summary['failed']), (4, 2))
+        self.assertEqual(self._count(Stock), 4)
+        self.assertEqual(self._count(HistoricalPrice), summary['rows'])
+        self.assertGreater(summary['rows'], 4 * 50)
+
+        # loading again replaces the bars instead of adding to them
+        again = initial_load(self.sessions, indexes=['dow30'], period='3mo', fetch=self._fetch)
+        self.assertEqual(self._count(HistoricalPrice), summary['rows'])
+        self.assertEqual(again['loaded'], 3)
+
+    def test_nothing_is_written_when_the_load_fails(self):
+        def broken_write(self, entries):
+            raise RuntimeError("disk full")
+
+        with mock.patch.object(bulk_load.ExecutemanyWriter, 'write', broken_write):
+            with self.assertRaises(RuntimeError):
+                initial_load(self.sessions, indexes=['dow30'], period='3mo', fetch=self._fetch)
+        self.assertEqual(self._count(Stock), 0)
+        self.assertEqual(self._count(HistoricalPrice), 0)
+
+
+class TestCopyWriter(unittest.TestCase):
+
+    def test_bars_are_copied_to_staging_then_merged(self):
+        conn = mock.MagicMock()
+        copied = []
+        cursor = conn.connection.cursor.return_value
+        cursor.copy_expert.side_effect = lambda sql, buffer: copied.append((sql, buffer.read()))
+
+        bars = SyntheticProvider(seed=7, as_of="2024-06-14").download_bars(['AAPL'], period='5d', interval='1d')['AAPL']
+        with mock.patch.object(bulk_load, '_write_stocks') as write_stocks:
+            writer = CopyWriter(conn)
+            rows = writer.write({'AAPL': {'info': {}, 'historical': bars}})
+            writer.finish()
+
+        write_stocks.assert_called_once()
+        self.assertEqual(rows, len(bars))
+        sql, csv = copied[0]
+        self.assertIn("COPY historical_prices_staging (symbol, date, open, high, low, close, volume) FROM STDIN", sql)
+        lines = csv.splitlines()
+        self.assertEqual(len(lines), len(bars))
+        self.assertTrue(lines[0].startswith(f"AAPL,{bars.index[0].date()},"))
+
+        statements = [str(call.args[0]) for call in conn.execute.call_args_list]
+        self.assertIn("CREATE TEMP TABLE historical_prices_staging", statements[0])
+        self.assertIn("ON COMMIT DROP", statements[0])
+        self.assertIn("INSERT INTO historical_prices", statements[-1])
+        self.assertIn("ON CONFLICT (symbol, date) DO UPDATE", statements[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
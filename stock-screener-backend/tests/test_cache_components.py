@@ -0,0 +1,202 @@
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from app.data import redis_cache
+from app.data.redis_cache import (
+    due_components, set_stock_data, get_stock_data_many, CACHE_POLICIES,
+    Projection, FUNDAMENTAL, TECHNICAL, CORE_INFO_FIELDS,
+)
+from app.data.periods import period_covers, slice_period, covered_period
+from tests.fakes import FakeRedis
+
+
+class TestDueComponents(unittest.TestCase):
+
+    def test_each_component_has_its_own_cadence(self):
+        now = 10_000_000.0
+        day = 86400
+        freshness = {
+            "NEW": {},
+            "WARM": {"bars": now - 60, "info": now - 60, "financials": now - 60},
+            "DAY_OLD": {"bars": now - day, "info": now - 2 * 3600, "financials": now - 2 * day},
+            "WEEK_OLD": {"bars": now - 60, "info": now - 60, "financials": now - 8 * day},
+        }
+        due = due_components(list(freshness), now=now, freshness=freshness)
+
+        self.assertEqual(due["NEW"], {"bars", "info", "financials"})
+        self.assertEqual(due["WARM"], set())
+        self.assertEqual(due["DAY_OLD"], {"bars"})
+        self.assertEqual(due["WEEK_OLD"], {"financials"})
+
+    def test_earnings_make_financials_due(self):
+        now = 10_000_000.0
+        freshness = {
+            "REPORTED": {"bars": now, "info": now, "financials": now - 3600, "earnings_at": now - 60},
+            "UPCOMING": {"bars": now, "info": now, "financials": now - 3600, "earnings_at": now + 3600},
+        }
+        due = due_components(list(freshness), now=now, freshness=freshness)
+        self.assertEqual(due["REPORTED"], {"financials"})
+        self.assertEqual(due["UPCOMING"], set())
+
+
+class TestSetStockData(unittest.TestCase):
+
+    def test_components_are_written_separately(self):
+        pipe = mock.MagicMock()
+        client = mock.MagicMock()
+        client.pipeline.return_value = pipe
+
+        hist = pd.DataFrame({"Close": [1.0]}, index=pd.to_datetime(["2024-01-02"]))
+        with mock.patch.object(redis_cache, "redis_client", client):
+            set_stock_data("aapl", {"historical": hist, "info": {"symbol": "AAPL", "earningsTimestamp": 5}}, fetched_at=100.0, period="1y")
+
+        written = {call.args[0]: call.args[1] for call in pipe.setex.call_args_list}
+        self.assertEqual(written, {
+            "stockdata:AAPL:info": CACHE_POLICIES["info"]["ttl"],
+            "stockdata:AAPL:core": CACHE_POLICIES["info"]["ttl"],
+        })
+        pipe.delete.assert_called_once_with("stockdata:AAPL:columns:1d")
+        pipe.expire.assert_any_call("stockdata:AAPL:columns:1d", CACHE_POLICIES["bars"]["ttl"])
+        bars, meta = pipe.hset.call_args_list
+        self.assertEqual(bars.args[0], "stockdata:AAPL:columns:1d")
+        self.assertEqual(set(bars.kwargs["mapping"]), {"_index", "_columns", "Close"})
+        self.assertEqual(meta, mock.call("stockdata:AAPL:meta", mapping={
+            "bars:1d": 100.0, "info": 100.0, "last_bar:1d": "2024-01-02 00:00:00", "period:1d": "1y", "earnings_at": 5,
+        }))
+
+
+def _daily(start, end):
+    index = pd.bdate_range(start, end, name="Date")
+    return pd.DataFrame({"Close": range(len(index))}, index=index, dtype=float)
+
+
+def _ohlcv(start, end):
+    index = pd.bdate_range(start, end, name="Date")
+    close = pd.Series(range(len(index)), index=index, dtype=float) + 100
+    return pd.DataFrame({"Open": close - 1, "High": close + 1, "Low": close - 2, "Close": close,
+                         "Volume": pd.Series(range(len(index)), index=index, dtype="int64") * 1000})
+
+
+class TestPeriods(unittest.TestCase):
+
+    def test_covers(self):
+        self.assertTrue(period_covers("5y", "1y"))
+        self.assertTrue(period_covers("max", "10y"))
+        self.assertTrue(period_covers("1mo", "5d"))
+        self.assertFalse(period_covers("1y", "5y"))
+        self.assertFalse(period_covers(None, "1y"))
+        self.assertFalse(period_covers("1y", "bogus"))
+
+    def test_slice_and_covered_period(self):
+        bars = _daily("2019-06-03", "2024-06-14")
+        self.assertEqual(covered_period(bars), "5y")
+        year = slice_period(bars, "1y")
+        self.assertEqual(year.index[0], pd.Timestamp("2023-06-15"))
+        self.assertEqual(covered_period(year), "1y")
+        self.assertEqual(len(slice_period(bars, "5d")), 5)
+        self.assertEqual(slice_period(bars, "ytd").index[0], pd.Timestamp("2024-01-01"))
+
+        sessions = [pd.date_range(f"2024-06-{day} 09:30", periods=390, freq="min") for day in (12, 13, 14)]
+        minutes = pd.DataFrame({"Close": 1.0}, index=sessions[0].append(sessions[1:]))
+        self.assertEqual(slice_period(minutes, "1d").index[0], pd.Timestamp("2024-06-14 09:30"))
+        self.assertEqual(len(slice_period(minutes, "5d")), 3 * 390)
+
+
+class TestResolutionKeys(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeRedis()
+        for name in ("redis_client", "redis_binary"):
+            patcher = mock.patch.object(redis_cache, name, self.client)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_intervals_do_not_overwrite_each_other(self):
+        info = {"symbol": "AAPL"}
+        set_stock_data("AAPL", {"historical": _daily("2019-06-03", "2024-06-14"), "info": info}, period="5y", interval="1d")
+        minutes = pd.DataFrame({"Close": 1.0}, index=pd.date_range("2024-06-14 09:30", periods=390, freq="min", name="Date"))
+        set_stock_data("AAPL", {"historical": minutes, "info": info}, period="1d", interval="1m")
+
+        daily = get_stock_data_many(["AAPL"], period="1y", interval="1d")["AAPL"]
+        self.assertEqual(daily["historical"].index[0], pd.Timestamp("2023-06-15"))
+        self.assertEqual(daily["cached_period"], "5y")
+        self.assertEqual(daily["last_bar"], "2024-06-14 00:00:00")
+
+        intraday = get_stock_data_many(["AAPL"], period="1d", interval="1m")["AAPL"]
+        self.assertEqual(len(intraday["historical"]), 390)
+        self.assertEqual(intraday["last_bar"], str(minutes.index[-1]))
+
+        # nothing cached covers 10y of daily bars or a week of minutes
+        self.assertEqual(get_stock_data_many(["AAPL"], period="10y", interval="1d"), {})
+        self.assertEqual(get_stock_data_many(["AAPL"], period="5d", interval="1m"), {})
+
+    def test_bars_are_stored_by_column(self):
+        bars = _ohlcv("2023-06-01", "2024-06-14")
+        set_stock_data("AAPL", {"historical": bars, "info": {"symbol": "AAPL"}}, period="1y")
+        stored = self.client.hashes["stockdata:AAPL:columns:1d"]
+        self.assertTrue(stored["_index"].startswith(b"SSB1"))
+        self.assertTrue(stored["Close"].startswith(b"SSC1"))
+        self.assertTrue(get_stock_data_many(["AAPL"])["AAPL"]["historical"].equals(slice_period(bars, "1y")))
+
+        # frames the codec can't hold are kept whole as JSON
+        odd = bars.assign(Note="x")
+        set_stock_data("AAPL", {"historical": odd}, period="1y")
+        self.assertEqual(set(self.client.hashes["stockdata:AAPL:columns:1d"]), {"_json"})
+        self.assertEqual(list(get_stock_data_many(["AAPL"])["AAPL"]["historical"].columns), list(odd.columns))
+        close = get_stock_data_many(["AAPL"], projection=Projection(("Close",), "core", False))["AAPL"]["historical"]
+        self.assertEqual(list(close.columns), ["Close"])
+
+
+class TestProjections(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeRedis()
+        for name in ("redis_client", "redis_binary"):
+            patcher = mock.patch.object(redis_cache, name, self.client)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.info = {"symbol": "AAPL", "shortName": "Apple", "marketCap": 3e12, "longBusinessSummary": "x" * 2000}
+        self.bars = _ohlcv("2023-06-01", "2024-06-14")
+        set_stock_data("AAPL", {"historical": self.bars, "info": self.info, "financials": {"income": {"a": 1}}}, period="1y")
+
+    def test_reads_only_the_projected_parts(self):
+        full = get_stock_data_many(["AAPL"])["AAPL"]
+        self.assertEqual(full["info"], self.info)
+        self.assertEqual(list(full["historical"].columns), list(self.bars.columns))
+        self.assertIn("financials", full)
+
+        fundamental = get_stock_data_many(["AAPL"], projection=FUNDAMENTAL)["AAPL"]
+        self.assertEqual(fundamental["info"], {"symbol": "AAPL", "shortName": "Apple", "marketCap": 3e12})
+        self.assertNotIn("historical", fundamental)
+        self.assertNotIn("financials", fundamental)
+        self.assertEqual(fundamental["cached_period"], "1y")
+
+        technical = get_stock_data_many(["AAPL"], projection=TECHNICAL)["AAPL"]
+        self.assertEqual(list(technical["historical"].columns), ["Open", "High", "Low", "Close", "Volume"])
+        self.assertTrue(technical["historical"]["Volume"].equals(slice_period(self.bars, "1y")["Volume"]))
+
+        close = get_stock_data_many(["AAPL"], projection=Projection(["Close"], None, False))["AAPL"]
+        self.assertEqual(list(close["historical"].columns), ["Close"])
+        self.assertNotIn("info", close)
+
+    def test_missing_parts_are_misses(self):
+        self.assertEqual(get_stock_data_many(["AAPL"], projection=Projection(("Adj Close",), "core", False)), {})
+        self.assertEqual(get_stock_data_many(["AAPL"], period="5y", projection=TECHNICAL), {})
+        # no bars asked for, so their period does not matter
+        self.assertIn("AAPL", get_stock_data_many(["AAPL"], period="5y", projection=FUNDAMENTAL))
+
+        del self.client.strings["stockdata:AAPL:core"]
+        self.assertEqual(get_stock_data_many(["AAPL"], projection=FUNDAMENTAL), {})
+        self.assertIn("AAPL", get_stock_data_many(["AAPL"]))
+
+    def test_core_fields_cover_the_screens(self):
+        from app.screener.fundamental import FIELD_MAPPING, EXACT_MATCH_FIELDS
+        from app.screener.derived import DERIVED_FIELDS, PER_SHARE_FIELDS
+        needed = set(FIELD_MAPPING.values()) | set(EXACT_MATCH_FIELDS) | set(DERIVED_FIELDS) | set(PER_SHARE_FIELDS.values())
+        self.assertLessEqual(needed, set(CORE_INFO_FIELDS))
+
+
+if __name__ == '__main__':
+    unittest.main()
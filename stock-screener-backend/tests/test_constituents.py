@@ -0,0 +1,125 @@
+import threading
+import time
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.models import Base
+from app.data.constituents import ConstituentCache, UnknownIndexError, normalize_constituents
+from app.data.index_snapshot import INDEX_SNAPSHOT
+from app.data.providers import SyntheticProvider
+from tests.fakes import FakeRedis
+
+
+class _CountingProvider(SyntheticProvider):
+    name = "counting"
+    cache_constituents = True
+
+    def __init__(self, lists=None, fail=False):
+        super().__init__(latency_ms=0, latency_per_symbol_ms=0, throttle_rate=0)
+        self.lists = lists or {'dow30': ['AAPL', 'BRK.B', 'msft'], 'sp500': ['AAPL', 'MSFT', 'XOM']}
+        self.fail = fail
+        self.calls = 0
+
+    def get_index_constituents(self, index):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("no network")
+        return list(self.lists.get(index, []))
+
+
+def _wait_for_refreshes():
+    for thread in threading.enumerate():
+        if thread.name.startswith('constituents-'):
+            thread.join(5)
+
+
+class TestConstituentCache(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        self.sessions = sessionmaker(bind=engine)
+        self.redis = FakeRedis()
+
+    def _cache(self, provider, **kwargs):
+        return ConstituentCache(client=self.redis, session_factory=self.sessions, provider=provider, **kwargs)
+
+    def test_normalize(self):
+        self.assertEqual(normalize_constituents([' brk.b', 'AAPL', 'aapl', None, '']), ['BRK-B', 'AAPL'])
+
+    def test_provider_read_once_then_served_from_memory_redis_and_db(self):
+        provider = _CountingProvider()
+        cache = self._cache(provider)
+
+        self.assertEqual(cache.get('dow30'), ['AAPL', 'BRK-B', 'MSFT'])
+        self.assertEqual(cache.get('dow30'), ['AAPL', 'BRK-B', 'MSFT'])
+        self.assertEqual(provider.calls, 1)
+        self.assertEqual(cache.stats()['memory'], 1)
+
+        # a second process finds it in Redis
+        other = self._cache(provider)
+        self.assertEqual(other.get('dow30'), ['AAPL', 'BRK-B', 'MSFT'])
+        self.assertEqual(other.stats()['redis'], 1)
+
+        # and after Redis was flushed, in the database
+        self.redis.store.clear()
+        third = self._cache(provider)
+        self.assertEqual(third.get('dow30'), ['AAPL', 'BRK-B', 'MSFT'])
+        self.assertEqual(third.stats()['database'], 1)
+        self.assertIn('constituents:dow30', self.redis.store)
+        self.assertEqual(provider.calls, 1)
+
+    def test_refresh_replaces_stored_list(self):
+        provider = _CountingProvider()
+        cache = self._cache(provider)
+        cache.get('dow30')
+
+        provider.lists['dow30'] = ['AAPL', 'IBM']
+        cache.refresh('dow30')
+        self.redis.store.clear()
+        self.assertEqual(self._cache(provider).get('dow30'), ['AAPL', 'IBM'])
+
+    def test_stale_list_is_served_and_refreshed_in_background(self):
+        provider = _CountingProvider()
+        cache = self._cache(provider, refresh_after=0.05, retry_after=0)
+        cache.get('dow30')
+        time.sleep(0.1)
+
+        provider.lists['dow30'] = ['AAPL', 'IBM']
+        self.assertEqual(cache.get('dow30'), ['AAPL', 'BRK-B', 'MSFT'])
+        _wait_for_refreshes()
+        self.assertEqual(cache.get('dow30'), ['AAPL', 'IBM'])
+
+    def test_snapshot_when_everything_is_down(self):
+        provider = _CountingProvider(fail=True)
+        cache = self._cache(provider, retry_after=3600)
+
+        symbols = cache.get('sp500')
+        self.assertEqual(len(symbols), len(INDEX_SNAPSHOT['sp500']))
+        self.assertIn('BRK-B', symbols)
+        cache.get('sp500')
+        _wait_for_refreshes()
+        # the failed read is not retried on every call
+        self.assertEqual(provider.calls, 1)
+        self.assertEqual(cache.stats()['indexes']['sp500']['source'], 'snapshot')
+        with self.assertRaises(UnknownIndexError):
+            cache.get('nope')
+
+    def test_reverse_map(self):
+        cache = self._cache(_CountingProvider(lists={'dow30': ['AAPL', 'BRK.B'], 'sp500': ['AAPL', 'BRK.B', 'XOM'],
+                                                     'nasdaq100': ['AAPL']}))
+        self.assertEqual(cache.indexes_for('aapl'), ['dow30', 'nasdaq100', 'sp500'])
+        self.assertEqual(cache.indexes_for('BRK.B'), ['dow30', 'sp500'])
+        self.assertEqual(cache.indexes_for('XYZ'), [])
+
+    def test_generated_universe_stays_out_of_shared_caches(self):
+        cache = self._cache(SyntheticProvider(seed=7, universe_size=50))
+        self.assertEqual(len(cache.get('dow30')), 30)
+        self.assertEqual(self.redis.store, {})
+        self.assertIsNone(cache._read_database('dow30'))
+
+
+if __name__ == "__main__":
+    unittest.main()
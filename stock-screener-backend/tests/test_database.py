@@ -1,6 +1,8 @@
 import unittest
+from unittest import mock
 import os
 import json
+import time
 from datetime import datetime, timedelta
 
 # --- Updated Imports for the new database structure ---
@@ -14,6 +16,9 @@ from app.database import (
     restore_database
 )
 from app.database.connection import SessionLocal, engine
+from app.data import db_utils
+from app.data.db_utils import load_from_database, load_many_from_database, load_info_from_database, save_to_database, save_many_to_database, get_latest_dates, DatabaseWriteError
+import pandas as pd
 
 class TestDatabase(unittest.TestCase):
     
@@ -170,6 +175,145 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(retrieved_entry.criteria["sector"], "Healthcare")
         self.assertEqual(retrieved_entry.results[0]["symbol"], "TEST2")
 
+    def test_load_many_from_database(self):
+        """Bulk loader returns one DataFrame per fresh symbol and skips unknown ones."""
+        loaded = load_many_from_database([self.test_symbol, "MISSING"], SessionLocal, chunk_size=1)
+
+        self.assertEqual(list(loaded.keys()), [self.test_symbol])
+        hist = loaded[self.test_symbol]["historical"]
+        self.assertEqual(list(hist.columns), ["Open", "High", "Low", "Close", "Volume"])
+        self.assertEqual(len(hist), 5)
+        self.assertTrue(hist.index.is_monotonic_increasing)
+        self.assertEqual(hist["Close"].iloc[-1], 102)
+        self.assertEqual(loaded[self.test_symbol]["info"]["shortName"], "Test Company Inc.")
+        self.assertEqual(loaded[self.test_symbol]["info"]["note"], "This is a complete test object.")
+        # freshness metadata for stale-while-revalidate
+        self.assertEqual(loaded[self.test_symbol]["last_bar"], str(hist.index[-1]))
+        self.assertIn("bars", loaded[self.test_symbol]["fetched_at"])
+        self.assertIn("info", loaded[self.test_symbol]["fetched_at"])
+
+    def test_fetched_at_reads_db_timestamps_as_utc(self):
+        """The naive created_at/updated_at columns hold UTC whatever the local zone is."""
+        with mock.patch.dict(os.environ, {"TZ": "America/New_York"}):
+            time.tzset()
+            self.addCleanup(time.tzset)
+            fetched_at = load_many_from_database([self.test_symbol], SessionLocal)[self.test_symbol]["fetched_at"]
+        self.assertAlmostEqual(fetched_at["bars"], time.time(), delta=60)
+        self.assertAlmostEqual(fetched_at["info"], time.time(), delta=60)
+
+    def test_info_cutoff_is_in_utc(self):
+        """A stock updated just inside max_age_days stays loadable east of UTC."""
+        stock = self.session.query(Stock).filter_by(symbol=self.test_symbol).first()
+        stock.updated_at = db_utils.db_now() - timedelta(days=7) + timedelta(hours=2)
+        self.session.commit()
+        with mock.patch.dict(os.environ, {"TZ": "Pacific/Kiritimati"}):
+            time.tzset()
+            self.addCleanup(time.tzset)
+            infos = load_info_from_database([self.test_symbol], SessionLocal)
+        self.assertEqual(list(infos), [self.test_symbol])
+
+    def test_load_from_database_returns_frames(self):
+        """Single-symbol loader hands back typed DataFrames, no JSON in between."""
+        loaded = load_from_database(self.test_symbol, SessionLocal)
+        hist = loaded["historical"]
+        self.assertNotIn("historical_json", loaded)
+        self.assertIsInstance(hist.index, pd.DatetimeIndex)
+        self.assertEqual(hist["Close"].dtype, "float64")
+        self.assertEqual(hist["Volume"].dtype, "int64")
+        self.assertEqual(hist["Volume"].iloc[-1], 1000000)
+        self.assertIsNone(load_from_database("MISSING", SessionLocal))
+
+        infos = load_info_from_database([self.test_symbol, "MISSING"], SessionLocal)
+        self.assertEqual(list(infos), [self.test_symbol])
+        self.assertEqual(infos[self.test_symbol]["marketCap"], 1234567890.0)
+        self.assertEqual(infos[self.test_symbol]["note"], "This is a complete test object.")
+
+    def test_save_to_database_only_replaces_incoming_dates(self):
+        """Saving a short tail keeps older history and overwrites overlapping days."""
+        today = datetime.now().date()
+        tail = pd.DataFrame({
+            "Open": [1.0, 2.0], "High": [1.0, 2.0], "Low": [1.0, 2.0],
+            "Close": [1.0, 2.0], "Volume": [10, 20],
+        }, index=pd.to_datetime([today, today + timedelta(days=1)]))
+        tail.index.name = "Date"
+
+        save_to_database(self.test_symbol, {"historical": tail, "info": {"shortName": "Test Company Inc."}}, SessionLocal)
+
+        self.session.expire_all()
+        closes = {
+            p.date: p.close for p in
+            self.session.query(HistoricalPrice).filter_by(symbol=self.test_symbol).all()
+        }
+        self.assertEqual(len(closes), 6)
+        self.assertEqual(closes[today], 1.0)
+        self.assertEqual(closes[today - timedelta(days=4)], 106)
+        self.assertEqual(get_latest_dates([self.test_symbol, "MISSING"], SessionLocal),
+                         {self.test_symbol: today + timedelta(days=1)})
+
+    def test_save_many_to_database_upserts_in_one_go(self):
+        """Bulk writer: many symbols at once, bars-only entries keep the stored info."""
+        other = "TEST_STOCK2"
+        def cleanup():
+            self.session.query(HistoricalPrice).filter_by(symbol=other).delete()
+            self.session.query(Stock).filter_by(symbol=other).delete()
+            self.session.commit()
+        self.addCleanup(cleanup)
+
+        today = datetime.now().date()
+        days = pd.to_datetime([today - timedelta(days=1), today, today + timedelta(days=1)])
+        bars = pd.DataFrame({
+            "Open": [1.0, 2.0, float("nan")], "High": [1.0, 2.0, 3.0], "Low": [1.0, 2.0, 3.0],
+            "Close": [1.0, 2.0, 3.0], "Volume": [10.0, float("nan"), 30.0],
+        }, index=days)
+
+        written = save_many_to_database({
+            self.test_symbol: {"historical": bars},
+            other: {"historical": bars, "info": {"shortName": "Other Co", "sector": "Energy"}},
+        }, SessionLocal, chunk_size=2)
+        self.assertEqual(written, 4)
+
+        self.session.expire_all()
+        stock = self.session.get(Stock, self.test_symbol)
+        self.assertEqual(stock.name, "Test Company Inc.")
+        self.assertEqual(stock.info["note"], "This is a complete test object.")
+        self.assertEqual(self.session.get(Stock, other).sector, "Energy")
+
+        prices = {p.date: p for p in self.session.query(HistoricalPrice).filter_by(symbol=self.test_symbol)}
+        self.assertEqual(len(prices), 5)
+        self.assertEqual(prices[today].close, 2.0)
+        self.assertEqual(prices[today].volume, 0)
+        self.assertNotIn(today + timedelta(days=1), prices)
+        self.assertEqual(self.session.query(HistoricalPrice).filter_by(symbol=other).count(), 2)
+
+    def test_one_bad_symbol_does_not_lose_the_batch(self):
+        """A failing symbol is retried alone and reported, the rest is committed."""
+        others = ["TEST_STOCK2", "TEST_STOCK3"]
+        def cleanup():
+            self.session.query(HistoricalPrice).filter(HistoricalPrice.symbol.in_(others)).delete()
+            self.session.query(Stock).filter(Stock.symbol.in_(others)).delete()
+            self.session.commit()
+        self.addCleanup(cleanup)
+
+        write_prices = db_utils._write_prices
+        def failing(conn, rows, chunk_size):
+            if any(row["symbol"] == "TEST_STOCK3" for row in rows):
+                raise ValueError("bad row")
+            write_prices(conn, rows, chunk_size)
+
+        today = datetime.now().date()
+        bars = pd.DataFrame({"Open": [1.0], "High": [1.0], "Low": [1.0], "Close": [1.0], "Volume": [10]},
+                            index=pd.to_datetime([today + timedelta(days=1)]))
+        with mock.patch.object(db_utils, "_write_prices", failing):
+            with self.assertRaises(DatabaseWriteError) as raised:
+                save_many_to_database({symbol: {"historical": bars} for symbol in [self.test_symbol] + others}, SessionLocal)
+        self.assertEqual(raised.exception.symbols, ["TEST_STOCK3"])
+        self.assertEqual(raised.exception.rows, 2)
+
+        self.session.expire_all()
+        self.assertEqual(self.session.query(HistoricalPrice).filter_by(symbol="TEST_STOCK2").count(), 1)
+        self.assertEqual(self.session.query(HistoricalPrice).filter_by(symbol=self.test_symbol).count(), 6)
+        self.assertIsNone(self.session.get(Stock, "TEST_STOCK3"))
+
     def test_backup_and_restore_database(self):
         """Test the full cycle of database backup and restore utilities."""
         # 1. Create a backup of the current state (1 stock, 5 prices)
@@ -0,0 +1,54 @@
+import unittest
+
+from app.screener.derived import apply_live_prices
+from app.screener.standing import StandingScreen
+
+
+class TestLivePriceDerivedFields(unittest.TestCase):
+
+    def setUp(self):
+        self.stock_data = {
+            'AAA': {'info': {
+                'currentPrice': 100.0, 'trailingPE': 20.0, 'priceToBook': 4.0,
+                'marketCap': 1e9, 'dividendYield': 2.0,
+                'trailingEps': 5.0, 'bookValue': 25.0, 'sharesOutstanding': 1e7, 'dividendRate': 2.0,
+            }},
+            'BBB': {'info': {'currentPrice': 50.0, 'trailingPE': 10.0, 'trailingEps': -1.0}},
+            'CCC': {'info': {'currentPrice': 30.0, 'trailingPE': 15.0, 'trailingEps': 2.0}},
+        }
+
+    def test_recomputes_from_per_share_fundamentals(self):
+        apply_live_prices(self.stock_data, {'AAA': 120.0})
+        info = self.stock_data['AAA']['info']
+        self.assertEqual(info['currentPrice'], 120.0)
+        self.assertAlmostEqual(info['trailingPE'], 24.0)
+        self.assertAlmostEqual(info['priceToBook'], 4.8)
+        self.assertAlmostEqual(info['marketCap'], 1.2e9)
+        self.assertAlmostEqual(info['dividendYield'], 100 * 2.0 / 120.0)
+
+    def test_symbols_without_live_price_keep_snapshot(self):
+        apply_live_prices(self.stock_data, {'AAA': 120.0})
+        self.assertEqual(self.stock_data['CCC']['info']['trailingPE'], 15.0)
+        self.assertEqual(self.stock_data['CCC']['info']['currentPrice'], 30.0)
+
+    def test_underivable_fields_are_left_alone(self):
+        apply_live_prices(self.stock_data, {'BBB': 60.0})
+        info = self.stock_data['BBB']['info']
+        self.assertEqual(info['currentPrice'], 60.0)
+        self.assertEqual(info['trailingPE'], 10.0)  # negative EPS
+        self.assertNotIn('marketCap', info)
+
+    def test_standing_screen_tracks_derived_ratios(self):
+        del self.stock_data['BBB']
+        screen = StandingScreen({'pe_ratio': ('<', 20)})
+        self.assertEqual([r['symbol'] for r in screen.evaluate(self.stock_data)], ['CCC'])
+
+        delta = screen.update_prices({'AAA': 90.0, 'CCC': 45.0})
+        self.assertEqual([r['symbol'] for r in delta['entered']], ['AAA'])
+        self.assertEqual([r['symbol'] for r in delta['exited']], ['CCC'])
+        # the caller's stock data is not touched by the standing screen
+        self.assertEqual(self.stock_data['AAA']['info']['currentPrice'], 100.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+import pandas as pd
+
+from app.data import yfinance_fetcher
+from app.data.yfinance_fetcher import refresh_cache_async, Storage
+from app.data.price_cube import PriceCube
+
+
+def _bars(days):
+    index = pd.to_datetime(days)
+    index.name = "Date"
+    return pd.DataFrame({"Open": 1.0, "High": 1.0, "Low": 1.0, "Close": 1.0, "Volume": 1}, index=index)
+
+
+class TestIncrementalRefresh(unittest.TestCase):
+
+    def setUp(self):
+        self.downloads = []
+        self.saved = {}
+        self.cached = {}
+        self.no_bars = set()
+        self.not_stored = set()
+
+        def fake_fetch(symbols, period="1y", interval="1d", include_info=True, start=None):
+            self.downloads.append((sorted(symbols), start))
+            days = ["2024-01-02", "2024-01-03"] if start else ["2023-06-01", "2024-01-03"]
+            return {symbol: {"historical": _bars(days)} for symbol in symbols if symbol not in self.no_bars}
+
+        self.stored_days = ["2023-12-29", "2024-01-02", "2024-01-03"]
+
+        def load_many(symbols):
+            return {symbol: {"historical": _bars(self.stored_days)} for symbol in symbols if symbol not in self.not_stored}
+
+        self.storage = Storage(
+            save_to_db=lambda symbol, data: self.saved.__setitem__(symbol, dict(data)),
+            latest_dates_from_db=lambda symbols: {"AAA": date(2024, 1, 2), "BBB": date(2024, 1, 2)},
+            load_many_from_db=load_many,
+        )
+
+        self.due = None
+
+        cube_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cube_dir.cleanup)
+        self.cube = PriceCube(cube_dir.name)
+
+        def fake_due(symbols, **kwargs):
+            if self.due is None:
+                raise ConnectionError("no redis")
+            return {symbol: set(self.due.get(symbol, ())) for symbol in symbols}
+
+        patches = [
+            mock.patch.object(yfinance_fetcher, "_fetch_fresh_data", side_effect=fake_fetch),
+            mock.patch.object(yfinance_fetcher, "_fetch_metadata", side_effect=lambda symbol, info=True, fin=True: (
+                {"symbol": symbol, "sector": "Tech"} if info else None, {"cash_flow": None} if fin else None)),
+            mock.patch.object(yfinance_fetcher, "due_components", side_effect=fake_due),
+            mock.patch.object(yfinance_fetcher, "set_stock_data", side_effect=lambda symbol, data, **kwargs: self.cached.__setitem__(symbol, data)),
+            mock.patch.object(yfinance_fetcher, "price_cube", self.cube),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_daily_refresh_fetches_from_last_stored_date(self):
+        refresh_cache_async(["AAA", "BBB", "NEW"], "1y", "1d", self.storage)
+
+        self.assertEqual(self.downloads, [(["AAA", "BBB"], date(2024, 1, 2)), (["NEW"], None)])
+        # only the tail goes to the DB, the cache gets the merged history back
+        self.assertEqual(len(self.saved["AAA"]["historical"]), 2)
+        self.assertEqual(len(self.cached["AAA"]["historical"]), 3)
+        self.assertEqual(self.cached["AAA"]["info"], {"symbol": "AAA", "sector": "Tech"})
+        self.assertEqual(self.cached["NEW"]["historical"].index[0], pd.Timestamp("2023-06-01"))
+        # the price cube takes the tails as they are and merges them by date
+        symbols, dates, closes = self.cube.panel("Close")
+        self.assertEqual(symbols, ["AAA", "BBB", "NEW"])
+        self.assertEqual(list(dates), list(pd.to_datetime(["2023-06-01", "2024-01-02", "2024-01-03"])))
+
+    def test_only_due_components_are_refreshed(self):
+        self.due = {"AAA": {"info"}, "BBB": {"bars", "financials"}}
+        refresh_cache_async(["AAA", "BBB", "CCC"], "1y", "1d", self.storage)
+
+        self.assertEqual(self.downloads, [(["BBB"], date(2024, 1, 2))])
+        self.assertEqual(sorted(self.cached["AAA"]), ["info"])
+        self.assertEqual(sorted(self.cached["BBB"]), ["financials", "historical"])
+        self.assertNotIn("CCC", self.cached)
+        # the DB gets the info-only update without touching its bars
+        self.assertEqual(sorted(self.saved["AAA"]), ["info"])
+
+    def test_symbols_without_bars_or_stored_rows_dont_stop_the_batch(self):
+        self.due = {"AAA": {"bars", "info"}, "BBB": {"bars", "info"}}
+        self.no_bars = {"AAA"}
+        self.not_stored = {"BBB"}
+        refresh_cache_async(["AAA", "BBB"], "1y", "1d", self.storage)
+
+        # AAA only got its info, BBB keeps its cached bars rather than just the tail
+        self.assertEqual(sorted(self.cached["AAA"]), ["info"])
+        self.assertEqual(sorted(self.cached["BBB"]), ["info"])
+        self.assertEqual(len(self.saved["BBB"]["historical"]), 2)
+
+    def test_merged_history_is_cut_to_the_period(self):
+        self.stored_days = ["2019-03-01", "2023-06-01", "2023-12-29", "2024-01-02", "2024-01-03"]
+        refresh_cache_async(["AAA"], "1mo", "1d", self.storage)
+        self.assertEqual(list(self.cached["AAA"]["historical"].index),
+                         list(pd.to_datetime(["2023-12-29", "2024-01-02", "2024-01-03"])))
+
+        refresh_cache_async(["BBB"], "1y", "1d", self.storage)
+        self.assertEqual(self.cached["BBB"]["historical"].index[0], pd.Timestamp("2023-06-01"))
+
+    def test_intraday_and_db_less_refreshes_stay_full(self):
+        refresh_cache_async(["AAA"], "5d", "1m", self.storage)
+        refresh_cache_async(["AAA"], "1y", "1d")
+        self.assertEqual(self.downloads, [(["AAA"], None), (["AAA"], None)])
+        self.assertEqual(len(self.cached["AAA"]["historical"]), 2)
+        self.assertEqual(self.cube.panel("Close")[0], ["AAA"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+from unittest import mock
+
+from app.data import redis_cache
+from app.data.local_cache import LocalCache
+from tests.fakes import FakeRedis
+from tests.test_cache_components import _daily
+
+
+def _listening_cache(**kwargs):
+    cache = LocalCache(**kwargs)
+    cache._listening = True
+    return cache
+
+
+class TestLocalCache(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(LocalCache, "_ensure_listening")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        cache = _listening_cache(max_bytes=2400)
+        for symbol in "ABCDEFGH":
+            cache.put(("price", symbol), 1.0, 300)
+        cache.get(("price", "A"))
+        cache.put(("data", "I", "1y", "1d"), {}, 300)
+
+        self.assertIsNone(cache.get(("price", "B")))
+        self.assertEqual(cache.get(("price", "A")), 1.0)
+        self.assertEqual(cache.stats()["bytes"], 2400)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        # too big for the budget, not worth caching
+        cache.put(("data", "J", "1y", "1d"), {}, 301)
+        self.assertIsNone(cache.get(("data", "J", "1y", "1d")))
+
+    def test_ttl_and_invalidation(self):
+        cache = _listening_cache(max_bytes=10_000, ttl=0)
+        cache.put(("price", "A"), 1.0, 100)
+        self.assertIsNone(cache.get(("price", "A")))
+
+        cache = _listening_cache(max_bytes=10_000)
+        cache.put(("data", "AAPL", "1y", "1d"), {}, 100)
+        cache.put(("data", "AAPL", "5d", "1m"), {}, 100)
+        cache.put(("price", "AAPL"), 1.0, 100)
+        cache.handle_message(b"data:AAPL,MSFT")
+        self.assertIsNone(cache.get(("data", "AAPL", "1y", "1d")))
+        self.assertIsNone(cache.get(("data", "AAPL", "5d", "1m")))
+        self.assertEqual(cache.get(("price", "AAPL")), 1.0)
+
+    def test_reads_started_before_an_invalidation_are_not_cached(self):
+        cache = _listening_cache(max_bytes=10_000)
+        token = cache.token("price", "aapl")
+        cache.invalidate("price", ["AAPL"])
+        cache.put(("price", "AAPL"), 1.0, 100, token)
+        self.assertIsNone(cache.get(("price", "AAPL")))
+
+        token = cache.token("price", "AAPL")
+        cache.clear()
+        cache.put(("price", "AAPL"), 1.0, 100, token)
+        self.assertIsNone(cache.get(("price", "AAPL")))
+
+    def test_not_used_without_a_subscription(self):
+        cache = LocalCache(max_bytes=10_000)
+        self.assertFalse(cache.usable)
+        self.assertFalse(_listening_cache(max_bytes=0).usable)
+
+
+class TestRedisCacheWithLocalTier(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeRedis()
+        self.cache = _listening_cache(max_bytes=64 * 1024 * 1024)
+        patches = [
+            mock.patch.object(LocalCache, "_ensure_listening"),
+            mock.patch.object(redis_cache, "redis_client", self.client),
+            mock.patch.object(redis_cache, "redis_binary", self.client),
+            mock.patch.object(redis_cache, "local_cache", self.cache),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_hot_data_skips_redis_until_written_again(self):
+        bars = _daily("2023-06-01", "2024-06-14")
+        redis_cache.set_stock_data("AAPL", {"historical": bars, "info": {"symbol": "AAPL"}}, period="1y")
+
+        first = redis_cache.get_stock_data_many(["AAPL"])["AAPL"]
+        first["info"]["currentPrice"] = 123
+        second = redis_cache.get_stock_data_many(["AAPL"])["AAPL"]
+        self.assertEqual(self.client.mget_calls, 1)
+        self.assertNotIn("currentPrice", second["info"])
+        self.assertIs(first["historical"], second["historical"])
+
+        redis_cache.set_stock_data("AAPL", {"info": {"symbol": "AAPL", "sector": "Tech"}})
+        self.assertIn(("cache:invalidate", "data:AAPL"), self.client.published)
+        self.assertEqual(redis_cache.get_stock_data_many(["AAPL"])["AAPL"]["info"]["sector"], "Tech")
+        self.assertEqual(self.client.mget_calls, 2)
+
+    def test_prices(self):
+        self.client.mget = mock.Mock(side_effect=lambda keys: ["101.5" if key == "price:AAPL" else None for key in keys])
+        self.assertEqual(redis_cache.get_prices(["AAPL", "MSFT"]), {"AAPL": 101.5})
+        self.assertEqual(redis_cache.get_price("AAPL"), 101.5)
+        # only the miss goes back to Redis
+        self.assertEqual(redis_cache.get_prices(["AAPL", "MSFT"]), {"AAPL": 101.5})
+        self.assertEqual(self.client.mget.call_args.args[0], ["price:MSFT"])
+
+        redis_cache.set_prices({"AAPL": 102.0})
+        self.assertIn(("cache:invalidate", "price:AAPL"), self.client.published)
+        self.assertIsNone(self.cache.get(("price", "AAPL")))
+
+
+if __name__ == "__main__":
+    unittest.main()
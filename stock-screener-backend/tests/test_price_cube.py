@@ -0,0 +1,145 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from app.data.periods import slice_period
+from app.data.price_cube import PriceCube
+from app.data.providers import SyntheticProvider
+from app.data.redis_cache import TECHNICAL, FULL
+from app.screener import screener as screener_module
+from app.screener import StockScreener
+
+
+SYMBOLS = ['AAA', 'BBB', 'CCC']
+
+
+class TestPriceCube(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+        self.cube = PriceCube(self.path)
+        provider = SyntheticProvider(seed=11, universe_size=10, as_of="2024-06-14")
+        symbols = provider.get_index_constituents('all')[:3]
+        bars = provider.download_bars(symbols, period='2y', interval='1d')
+        self.bars = {name: bars[symbol] for name, symbol in zip(SYMBOLS, symbols)}
+
+    def _same(self, frame, expected):
+        self.assertEqual(list(frame.index), list(expected.index))
+        np.testing.assert_allclose(frame.to_numpy(), expected[list(frame.columns)].to_numpy(dtype=float))
+
+    def test_frames_are_views_of_the_mapped_file(self):
+        self.assertEqual(self.cube.update(self.bars), 3)
+
+        for period in ('5d', '1mo', 'ytd', '1y', '2y'):
+            frames = self.cube.frames(SYMBOLS, period)
+            self.assertEqual(sorted(frames), SYMBOLS)
+            self._same(frames['BBB'], slice_period(self.bars['BBB'], period))
+
+        frame = self.cube.frames(['aaa'], '1y')['aaa']
+        self.assertTrue(np.shares_memory(frame.to_numpy(), self.cube._view().bars))
+        with self.assertRaises(ValueError):
+            frame.to_numpy()[0, 0] = 1.0
+
+        # more history than the cube holds is left to the caches
+        self.assertEqual(self.cube.frames(SYMBOLS, '5y'), {})
+        self.assertEqual(self.cube.frames(['ZZZ'], '1y'), {})
+
+    def test_updates_merge_by_date(self):
+        self.cube.update(self.bars)
+        self.assertEqual(self.cube.stats()['rebuilds'], 1)
+
+        # a re-sent last day and a new one land in place
+        last = self.bars['AAA'].index[-1]
+        tail = self.bars['AAA'].iloc[[-1, -1]].copy()
+        tail.index = [last, last + pd.Timedelta(days=3)]
+        tail['Close'] = [1.0, 2.0]
+        self.cube.update({'AAA': tail})
+        self.assertEqual(self.cube.stats()['rebuilds'], 1)
+
+        other = PriceCube(self.path)
+        merged = pd.concat([self.bars['AAA'].iloc[:-1], tail])
+        self._same(other.frames(['AAA'], '2y')['AAA'], slice_period(merged, '2y'))
+        # BBB didn't trade on the new days: it still ends where it did
+        self._same(other.frames(['BBB'], '1y')['BBB'], slice_period(self.bars['BBB'], '1y'))
+
+        # older dates need a new data file, frames read before stay valid
+        before = other.frames(['CCC'], '1y')['CCC'].copy()
+        held = other.frames(['CCC'], '1y')['CCC']
+        older = self.bars['CCC'].copy()
+        older.index = older.index - pd.Timedelta(weeks=104)
+        self.cube.update({'DDD': older})
+        self.assertEqual(self.cube.stats()['rebuilds'], 2)
+        pd.testing.assert_frame_equal(held, before)
+        self._same(other.frames(['CCC'], '1y')['CCC'], before)
+        self.assertEqual(len(other.frames(['DDD'], '2y')['DDD']), len(slice_period(older, '2y')))
+
+    def test_old_and_gapped_series(self):
+        gapped = self.bars['CCC'].drop(self.bars['CCC'].index[-10:-5])
+        self.cube.update({'AAA': self.bars['AAA']}, fetched_at=1)
+        self.cube.update({'BBB': self.bars['BBB'], 'CCC': gapped})
+
+        frames = self.cube.frames(SYMBOLS, '1y', max_age=3600)
+        self.assertEqual(sorted(frames), ['BBB', 'CCC'])
+        self._same(frames['CCC'], slice_period(gapped, '1y'))
+
+        symbols, dates, closes = self.cube.panel('Close')
+        self.assertEqual(symbols, SYMBOLS)
+        self.assertEqual(closes.shape, (3, len(dates)))
+        self.assertEqual(int(np.isnan(closes[2]).sum()), 5)
+
+    def test_disabled(self):
+        cube = PriceCube('')
+        self.assertEqual(cube.update(self.bars), 0)
+        self.assertEqual(cube.frames(SYMBOLS, '1y'), {})
+
+
+class TestScreenerReadsTheCube(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cube = PriceCube(directory.name)
+        bars = SyntheticProvider(seed=5, universe_size=10, as_of="2024-06-14").download_bars(['X1', 'X2'], period='1y')
+        self.cube.update({'AAA': bars['X1']})
+        self.full = bars['X2']
+
+        self.calls = []
+
+        def fetch(symbols, projection=FULL, **kwargs):
+            self.calls.append((list(symbols), projection))
+            result = {}
+            for symbol in symbols:
+                result[symbol] = {'info': {'symbol': symbol}}
+                if projection.columns != ():
+                    result[symbol]['historical'] = self.full
+            return result
+
+        for patch in (mock.patch.object(screener_module, 'price_cube', self.cube),
+                      mock.patch.object(screener_module, 'fetch_yfinance_data', side_effect=fetch)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_cube_answers_the_bars(self):
+        screener = StockScreener()
+        data = screener.load_data(['BBB', 'aaa'], period='6mo', projection=TECHNICAL)
+
+        self.assertEqual(list(data), ['BBB', 'AAA'])
+        self.assertEqual(self.calls, [(['AAA'], TECHNICAL._replace(columns=())), (['BBB'], TECHNICAL)])
+        self.assertEqual(data['AAA']['info'], {'symbol': 'AAA'})
+        self.assertTrue(np.shares_memory(data['AAA']['historical'].to_numpy(), self.cube._view().bars))
+        self.assertIs(data['BBB']['historical'], self.full)
+
+    def test_reloads_and_full_projections_skip_the_cube(self):
+        screener = StockScreener()
+        screener.load_data(['AAA'], reload=True, projection=TECHNICAL)
+        screener.load_data(['AAA'])
+        self.assertEqual(self.calls, [(['AAA'], TECHNICAL), (['AAA'], FULL)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from app.data import price_worker, redis_cache
+from tests.fakes import FakeRedis
+
+
+def _bars(close):
+    return {'historical': pd.DataFrame({'Close': [close - 1, close]})}
+
+
+class TestPriceWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.closes = {'AAA': 10.0, 'BBB': 20.0}
+        self.heard = []
+        for patcher in (mock.patch.object(redis_cache, 'redis_client', self.redis),
+                        mock.patch.object(price_worker, 'get_all_symbols', return_value=['AAA', 'BBB']),
+                        mock.patch.object(price_worker, '_fetch_fresh_data',
+                                          side_effect=lambda symbols, **kwargs: {s: _bars(self.closes[s]) for s in symbols}),
+                        mock.patch.object(price_worker, '_price_listeners', [self.heard.append])):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_only_moved_prices_bump_the_version(self):
+        self.assertEqual(price_worker.fetch_and_cache_prices(), {'AAA': 10.0, 'BBB': 20.0})
+        self.assertEqual(redis_cache.get_data_version(), 1)
+
+        # the same last closes again: prices rewritten, cached screens kept
+        price_worker.fetch_and_cache_prices()
+        self.assertEqual(redis_cache.get_data_version(), 1)
+
+        self.closes['BBB'] = 21.0
+        price_worker.fetch_and_cache_prices()
+        self.assertEqual(redis_cache.get_data_version(), 2)
+        self.assertEqual(self.heard, [{'AAA': 10.0, 'BBB': 20.0}, {'BBB': 21.0}])
+        self.assertEqual(redis_cache.get_prices(['BBB']), {'BBB': 21.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
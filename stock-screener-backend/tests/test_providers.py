@@ -0,0 +1,163 @@
+import time
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from app.data.providers import MarketDataProvider, SyntheticProvider, YFinanceProvider, get_provider, set_provider, OHLCV_COLUMNS
+from app.data import redis_cache
+from app.data.yfinance_fetcher import _fetch_fresh_data, _fill_missing_info
+from app.data.providers import yahoo
+from app.data.rate_limit import TransientProviderError
+from tests.fakes import FakeRedis
+
+
+class TestSyntheticProvider(unittest.TestCase):
+
+    def setUp(self):
+        self.provider = SyntheticProvider(seed=7, as_of="2024-06-14")
+
+    def test_bars_are_deterministic_and_well_formed(self):
+        bars = self.provider.download_bars(["AAPL", "MSFT"], period="1y")
+        again = SyntheticProvider(seed=7, as_of="2024-06-14").download_bars(["AAPL"], period="1y")
+
+        self.assertEqual(sorted(bars), ["AAPL", "MSFT"])
+        aapl = bars["AAPL"]
+        self.assertEqual(list(aapl.columns), OHLCV_COLUMNS)
+        self.assertTrue(aapl.equals(again["AAPL"]))
+        self.assertFalse(aapl["Close"].equals(bars["MSFT"]["Close"]))
+        self.assertTrue((aapl["High"] >= aapl[["Open", "Close"]].max(axis=1)).all())
+        self.assertTrue((aapl["Low"] <= aapl[["Open", "Close"]].min(axis=1)).all())
+        self.assertEqual(aapl.index[-1].strftime("%Y-%m-%d"), "2024-06-14")
+        self.assertTrue(245 <= len(aapl) <= 262)
+
+    def test_history_does_not_change_as_days_pass(self):
+        earlier = self.provider.download_bars(["AAPL"], period="1mo")["AAPL"]
+        later = SyntheticProvider(seed=7, as_of="2024-07-01").download_bars(["AAPL"], period="3mo")["AAPL"]
+        self.assertTrue(earlier.equals(later.loc[earlier.index]))
+
+    def test_start_and_intraday(self):
+        tail = self.provider.download_bars(["AAPL"], start="2024-06-12")["AAPL"]
+        self.assertEqual(len(tail), 3)
+
+        minutes = self.provider.download_bars(["AAPL"], period="1d", interval="1m")["AAPL"]
+        self.assertEqual(len(minutes), 390)
+        self.assertAlmostEqual(minutes["Close"].iloc[-1], tail["Close"].iloc[-1])
+        self.assertAlmostEqual(self.provider.get_quotes(["AAPL"])["AAPL"], tail["Close"].iloc[-1])
+
+    def test_info_matches_prices(self):
+        info = self.provider.get_info("AAPL")
+        price = self.provider.get_quotes(["AAPL"])["AAPL"]
+        self.assertEqual(info["currentPrice"], price)
+        self.assertAlmostEqual(info["marketCap"], price * info["sharesOutstanding"])
+        if info["trailingEps"] > 0:
+            self.assertAlmostEqual(info["trailingPE"], price / info["trailingEps"])
+        self.assertIn("Net Income", self.provider.get_financials("AAPL")["income_statement"].index)
+
+    def test_index_constituents(self):
+        sp500 = self.provider.get_index_constituents("sp500")
+        self.assertEqual(len(sp500), 500)
+        self.assertEqual(len(set(sp500)), 500)
+        self.assertEqual(self.provider.get_index_constituents("dow30"), sp500[:30])
+        self.assertEqual(self.provider.get_index_constituents("nope"), [])
+
+    def test_latency_injection(self):
+        slow = SyntheticProvider(as_of="2024-06-14", latency_ms=50, latency_per_symbol_ms=10)
+        started = time.time()
+        slow.download_bars(["AAA", "BBB"], period="5d")
+        self.assertGreaterEqual(time.time() - started, 0.07)
+
+
+class TestProviderSelection(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = get_provider()
+        self.addCleanup(set_provider, self.previous)
+
+    def test_fetcher_uses_selected_provider(self):
+        self.assertIsInstance(set_provider("yfinance"), YFinanceProvider)
+        set_provider(SyntheticProvider(as_of="2024-06-14"))
+
+        data = _fetch_fresh_data(["aapl", "MSFT"], period="1mo")
+        self.assertEqual(sorted(data), ["AAPL", "MSFT"])
+        self.assertEqual(data["AAPL"]["info"]["symbol"], "AAPL")
+        self.assertIn("sector", data["AAPL"]["info"])
+        self.assertIn("balance_sheet", data["AAPL"]["financials"])
+
+    def test_failed_info_keeps_the_cached_info(self):
+        class NoInfo(SyntheticProvider):
+            def get_info(self, symbol):
+                raise ValueError("no info")
+
+        set_provider(NoInfo(as_of="2024-06-14", latency_ms=0))
+        redis = FakeRedis()
+        for name in ("redis_client", "redis_binary"):
+            patcher = mock.patch.object(redis_cache, name, redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        redis_cache.set_stock_data("AAPL", {"info": {"symbol": "AAPL", "sector": "Technology"}})
+
+        data = _fetch_fresh_data(["AAPL"], period="1mo")
+        self.assertIsNone(data["AAPL"]["info"])
+        redis_cache.set_stock_data("AAPL", data["AAPL"], period="1mo")
+        cached = redis_cache.get_stock_data("AAPL", period="1mo")
+        self.assertEqual(cached["info"]["sector"], "Technology")
+
+        # callers still get an info dict, the expired copy when there is one
+        self.assertEqual(_fill_missing_info({"AAPL": {"info": None}}, {"AAPL": cached})["AAPL"]["info"]["sector"], "Technology")
+        self.assertEqual(_fill_missing_info({"MSFT": {"info": None}})["MSFT"]["info"], {"symbol": "MSFT"})
+
+    def test_providers_implement_the_whole_interface(self):
+        class BarsOnly(MarketDataProvider):
+            def download_bars(self, symbols, period="1y", interval="1d", start=None):
+                return {}
+
+        with self.assertRaises(TypeError):
+            BarsOnly()
+        with self.assertRaises(TypeError):
+            MarketDataProvider()
+
+
+def _yahoo_frame(symbols, days=3):
+    index = pd.date_range("2024-06-10", periods=days, freq="B", name="Date")
+    columns = pd.MultiIndex.from_product([symbols, ["Open", "High", "Low", "Close", "Volume"]])
+    return pd.DataFrame(1.0, index=index, columns=columns)
+
+
+class TestYFinanceProvider(unittest.TestCase):
+
+    def test_missing_tickers_come_from_the_frame(self):
+        frame = _yahoo_frame(["AAPL", "MSFT", "GONE"])
+        frame[("GONE", "Close")] = float("nan")
+        with mock.patch.object(yahoo.yf, "download", return_value=frame):
+            bars = YFinanceProvider().download_bars(["AAPL", "MSFT", "GONE", "NOPE"])
+        self.assertEqual(sorted(bars), ["AAPL", "MSFT"])
+        self.assertEqual(list(bars["AAPL"].columns), OHLCV_COLUMNS)
+
+        # nothing at all for a whole batch is retried as a transient failure
+        with mock.patch.object(yahoo.yf, "download", return_value=pd.DataFrame()):
+            with self.assertRaises(TransientProviderError):
+                YFinanceProvider().download_bars(["AAPL", "MSFT"])
+
+    def test_single_ticker_errors(self):
+        class YFRateLimitError(Exception):
+            pass
+
+        history = _yahoo_frame(["X"])["X"].tz_localize("America/New_York")
+        ticker = mock.Mock()
+        with mock.patch.object(yahoo.yf, "Ticker", return_value=ticker):
+            ticker.history.return_value = history
+            bars = YFinanceProvider().download_bars(["AAPL"], start="2024-06-10")
+            self.assertIsNone(bars["AAPL"].index.tz)
+            self.assertEqual(ticker.history.call_args.kwargs["start"], "2024-06-10")
+
+            ticker.history.side_effect = Exception("$GONE: possibly delisted; no price data found")
+            self.assertEqual(YFinanceProvider().download_bars(["GONE"]), {})
+
+            ticker.history.side_effect = YFRateLimitError("Too Many Requests. Rate limited. Try after a while.")
+            with self.assertRaises(YFRateLimitError):
+                YFinanceProvider().download_bars(["AAPL"])
+
+
+if __name__ == '__main__':
+    unittest.main()
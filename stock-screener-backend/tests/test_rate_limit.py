@@ -0,0 +1,139 @@
+import time
+import unittest
+
+import pandas as pd
+import redis
+
+from app.data import yfinance_fetcher, rate_limit
+from app.data.providers import SyntheticProvider, get_provider, set_provider
+from app.data.rate_limit import (
+    TokenBucket, RedisTokenBucket, AdaptiveBatchSizer, RateLimitError, TransientProviderError,
+    call_with_retry, is_rate_limit_error, is_transient_error, get_limiter, set_limiter,
+)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=20, capacity=3)
+        started = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        # 3 from the burst, 2 more at 20/s
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+    def test_timeout_and_penalize(self):
+        bucket = TokenBucket(rate=10, capacity=1)
+        self.assertTrue(bucket.acquire(timeout=0))
+        bucket.penalize(1.0)
+        self.assertFalse(bucket.acquire(timeout=0.2))
+
+    def test_redis_bucket_falls_back_when_redis_is_down(self):
+        client = redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.1)
+        bucket = RedisTokenBucket(name="test", rate=100, capacity=2, client=client)
+        self.assertTrue(bucket.acquire(timeout=1))
+        bucket.penalize(0.01)
+        self.assertTrue(bucket.acquire(timeout=1))
+
+
+class TestRetry(unittest.TestCase):
+
+    def test_retries_until_success(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise RateLimitError("Too Many Requests")
+            return "ok"
+
+        bucket = TokenBucket(rate=1000, capacity=10)
+        self.assertEqual(call_with_retry(flaky, limiter=bucket, attempts=3, base=0.001), "ok")
+        self.assertEqual(len(calls), 3)
+
+    def test_last_error_is_raised(self):
+        def broken():
+            raise TimeoutError("read timed out")
+        with self.assertRaises(TimeoutError):
+            call_with_retry(broken, attempts=2, base=0.001)
+
+    def test_only_transient_errors_are_retried(self):
+        class HTTPError(Exception):
+            def __init__(self, status):
+                super().__init__(f"HTTP {status}")
+                self.response = type("Response", (), {"status_code": status})()
+
+        for error, calls_expected in ((ValueError("bad symbol"), 1), (KeyError("Close"), 1), (HTTPError(404), 1),
+                                      (HTTPError(503), 3), (ConnectionError("reset"), 3), (TransientProviderError(), 3)):
+            calls = []
+
+            def failing():
+                calls.append(1)
+                raise error
+            with self.assertRaises(type(error)):
+                call_with_retry(failing, attempts=3, base=0.001)
+            self.assertEqual(len(calls), calls_expected, error)
+
+    def test_rate_limit_detection(self):
+        self.assertTrue(is_rate_limit_error(RateLimitError()))
+        self.assertTrue(is_rate_limit_error(Exception("429 Client Error: Too Many Requests")))
+        self.assertFalse(is_rate_limit_error(KeyError("Close")))
+        self.assertTrue(is_transient_error(Exception("429 Client Error: Too Many Requests")))
+        self.assertTrue(is_transient_error(Exception("Read timed out.")))
+        self.assertFalse(is_transient_error(Exception("$XYZ: possibly delisted; no price data found")))
+
+
+class TestAdaptiveBatchSizer(unittest.TestCase):
+
+    def test_grows_on_success_and_halves_on_trouble(self):
+        sizer = AdaptiveBatchSizer(initial=20, maximum=24, step=2)
+        self.assertEqual(sizer.record(20, 0), 22)
+        self.assertEqual(sizer.record(22, 0), 24)
+        self.assertEqual(sizer.record(24, 0), 24)
+        self.assertEqual(sizer.record(24, 1), 24)
+        self.assertEqual(sizer.record(24, 10), 12)
+        self.assertEqual(sizer.record(12, 0, throttled=True), 6)
+
+
+class _FlakyProvider(SyntheticProvider):
+    """Fails every multi-symbol request that contains BAD."""
+
+    name = "flaky"
+
+    def __init__(self):
+        super().__init__(latency_ms=0, latency_per_symbol_ms=0, throttle_rate=0)
+        self.requests = []
+
+    def download_bars(self, symbols, period="1y", interval="1d", start=None):
+        self.requests.append(list(symbols))
+        if len(symbols) > 1 and "BAD" in symbols:
+            raise RateLimitError("Too Many Requests")
+        index = pd.to_datetime(["2024-01-02"])
+        return {s: pd.DataFrame({"Open": [1.0], "High": [1.0], "Low": [1.0], "Close": [1.0], "Volume": [1]}, index=index)
+                for s in symbols if s != "BAD"}
+
+
+class TestFetchRetries(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(set_provider, get_provider())
+        self.addCleanup(set_limiter, get_limiter())
+        self.addCleanup(setattr, yfinance_fetcher, "batch_sizer", yfinance_fetcher.batch_sizer)
+        self.addCleanup(setattr, rate_limit, "BACKOFF_BASE", rate_limit.BACKOFF_BASE)
+        rate_limit.BACKOFF_BASE = 0.001
+
+    def test_failed_batch_members_are_retried_one_by_one(self):
+        provider = set_provider(_FlakyProvider())
+        set_limiter(TokenBucket(rate=1000, capacity=100))
+        yfinance_fetcher.batch_sizer = AdaptiveBatchSizer(initial=4)
+
+        data = yfinance_fetcher._fetch_fresh_data(["AAA", "BAD", "CCC", "DDD", "EEE", "FFF"], include_info=False)
+
+        self.assertEqual(sorted(data), ["AAA", "CCC", "DDD", "EEE", "FFF"])
+        # the throttled batch halved the next one
+        self.assertIn(["EEE", "FFF"], provider.requests)
+        self.assertIn(["AAA"], provider.requests)
+
+
+if __name__ == '__main__':
+    unittest.main()
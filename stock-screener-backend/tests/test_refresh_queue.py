@@ -0,0 +1,74 @@
+import threading
+import time
+import unittest
+
+from app.data.refresh_queue import RefreshService
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestRefreshService(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.calls = []
+
+        def refresh(symbols, period, interval, context):
+            self.release.wait(5)
+            self.calls.append((list(symbols), period, interval, context))
+
+        self.refresh = refresh
+
+    def test_deduplicates_and_coalesces(self):
+        service = RefreshService(self.refresh, workers=1, max_queue=10, batch_size=3)
+        service.submit(['AAA'], '1y', '1d')
+        self.assertTrue(_wait_for(lambda: service.stats()['in_flight'] == 1))
+
+        # AAA is running, BBB queued twice, CCC/DDD same resolution, EEE different
+        self.assertEqual(service.submit(['AAA', 'BBB', 'BBB', 'CCC', 'DDD'], '1y', '1d'), 3)
+        self.assertEqual(service.submit(['EEE'], '1d', '1m'), 1)
+        stats = service.stats()
+        self.assertEqual(stats['deduplicated'], 2)
+        self.assertEqual(stats['queue_depth'], 4)
+
+        self.release.set()
+        self.assertTrue(_wait_for(lambda: service.stats()['refreshed'] == 5))
+        self.assertEqual(self.calls, [
+            (['AAA'], '1y', '1d', None),
+            (['BBB', 'CCC', 'DDD'], '1y', '1d', None),
+            (['EEE'], '1d', '1m', None),
+        ])
+
+    def test_bounded_queue_drops_overflow(self):
+        service = RefreshService(self.refresh, workers=1, max_queue=2, batch_size=1)
+        service.submit(['AAA'], '1y', '1d')
+        self.assertTrue(_wait_for(lambda: service.stats()['in_flight'] == 1))
+
+        self.assertEqual(service.submit(['BBB', 'CCC', 'DDD'], '1y', '1d'), 2)
+        self.assertEqual(service.stats()['dropped'], 1)
+        self.release.set()
+        self.assertTrue(_wait_for(lambda: service.stats()['refreshed'] == 3))
+
+    def test_batches_only_share_equal_contexts(self):
+        service = RefreshService(self.refresh, workers=1, batch_size=5)
+        service.submit(['AAA'], '1y', '1d', ('db', 1))
+        self.assertTrue(_wait_for(lambda: service.stats()['in_flight'] == 1))
+
+        service.submit(['BBB'], '1y', '1d', ('db', 1))
+        service.submit(['CCC'], '1y', '1d', ('db', 2))
+        service.submit(['DDD'], '1y', '1d', ('db', 1))
+        self.release.set()
+        self.assertTrue(_wait_for(lambda: service.stats()['refreshed'] == 4))
+        self.assertEqual([call[0] for call in self.calls], [['AAA'], ['BBB', 'DDD'], ['CCC']])
+        self.assertEqual(self.calls[2][3], ('db', 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
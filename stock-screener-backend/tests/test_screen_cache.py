@@ -0,0 +1,111 @@
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.models import Base, ScreeningResult
+from app.data import redis_cache
+from app.screener import cache
+from app.screener.cache import normalize_criteria, make_criteria_hash, get_cached_screen, store_screen, cached_screen
+from tests.fakes import FakeRedis
+
+
+class TestScreenCache(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        self.sessions = sessionmaker(bind=engine)
+        self.redis = FakeRedis()
+        for patcher in (mock.patch.object(cache, 'SessionLocal', self.sessions),
+                        mock.patch.object(cache, 'redis_client', self.redis)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_equivalent_criteria_share_a_hash(self):
+        a = {'pe_ratio': ('<', 15), 'sector': 'Technology'}
+        b = {'sector': ' Technology', 'pe_ratio': ('<', 15.0)}
+        self.assertEqual(normalize_criteria(a), normalize_criteria(b))
+        self.assertEqual(
+            make_criteria_hash('fundamental', a, 'sp500', '1y', '1d', 3),
+            make_criteria_hash('fundamental', b, 'sp500', '1y', '1d', 3),
+        )
+
+    def test_hash_changes_with_data_version_and_index(self):
+        criteria = {'rsi': ('<', 30)}
+        base = make_criteria_hash('technical', criteria, 'sp500', '1y', '1d', 1)
+        self.assertEqual(len(base), 64)
+        self.assertNotEqual(base, make_criteria_hash('technical', criteria, 'sp500', '1y', '1d', 2))
+        self.assertNotEqual(base, make_criteria_hash('technical', criteria, 'dow30', '1y', '1d', 1))
+        self.assertNotEqual(base, make_criteria_hash('fundamental', criteria, 'sp500', '1y', '1d', 1))
+
+    def test_store_and_read_back_from_table(self):
+        screen_hash = make_criteria_hash('fundamental', {'sector': 'Technology'}, 'dow30', '1y', '1d')
+        self.assertIsNone(get_cached_screen(screen_hash, 7))
+
+        results = [{'symbol': 'AAPL', 'price': 190.5}]
+        store_screen(screen_hash, 7, {'sector': 'Technology'}, results, 'dow30', 0.25)
+        self.assertEqual(get_cached_screen(screen_hash, 7), results)
+        self.assertIsNone(get_cached_screen(screen_hash, 8))
+
+        # Redis lost it: the table answers and puts it back
+        self.redis.strings.clear()
+        self.assertEqual(get_cached_screen(screen_hash, 7), results)
+        self.assertIn(f"screen:{screen_hash}:7", self.redis.strings)
+        self.redis.strings.clear()
+        self.assertIsNone(get_cached_screen(screen_hash, 8))
+
+        with self.sessions() as session:
+            entry = session.query(ScreeningResult).filter_by(criteria_hash=screen_hash).first()
+        self.assertEqual(entry.index_used, 'dow30')
+        self.assertEqual(entry.execution_time, 0.25)
+
+    def test_expired_entries_are_ignored(self):
+        screen_hash = make_criteria_hash('fundamental', {'beta': ('<', 1)}, 'sp500', '1y', '1d')
+        store_screen(screen_hash, 1, {'beta': ['<', 1.0]}, [{'symbol': 'KO'}], 'sp500', 0.1, ttl=-1)
+        self.redis.strings.clear()
+        self.assertIsNone(get_cached_screen(screen_hash, 1))
+
+    def test_one_row_per_screen_and_expired_rows_pruned(self):
+        first = make_criteria_hash('technical', {'rsi': ('<', 30)}, 'sp500', '1y', '1d')
+        second = make_criteria_hash('technical', {'rsi': ('<', 40)}, 'sp500', '1y', '1d')
+        store_screen(first, 1, {}, [{'symbol': 'A'}], 'sp500', 0.1, ttl=-1)
+        store_screen(second, 1, {}, [{'symbol': 'B'}], 'sp500', 0.1)
+        store_screen(second, 2, {}, [{'symbol': 'C'}], 'sp500', 0.1)
+
+        with self.sessions() as session:
+            rows = session.query(ScreeningResult).all()
+        self.assertEqual([(row.criteria_hash, row.criteria['data_version'], row.results) for row in rows],
+                         [(second, 2, [{'symbol': 'C'}])])
+
+    def test_results_are_not_stored_when_the_version_moves_during_compute(self):
+        patcher = mock.patch.object(redis_cache, 'redis_client', self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.redis.strings[redis_cache.DATA_VERSION_KEY] = 4
+        calls = []
+
+        def compute():
+            # the price worker bumps the version while the first screen runs
+            calls.append(1)
+            if len(calls) == 1:
+                self.redis.incr(redis_cache.DATA_VERSION_KEY)
+            return [{'symbol': 'MSFT'}]
+
+        args = ('technical', {'rsi': ('<', 30)}, 'dow30', '1y', '1d')
+        screen_hash = make_criteria_hash(*args)
+        self.assertEqual(cached_screen(*args, compute=compute), [{'symbol': 'MSFT'}])
+        self.assertNotIn(f"screen:{screen_hash}:4", self.redis.strings)
+        self.assertNotIn(f"screen:{screen_hash}:5", self.redis.strings)
+
+        # the data stayed put this time, so the results are kept and reused
+        cached_screen(*args, compute=compute)
+        self.assertIn(f"screen:{screen_hash}:5", self.redis.strings)
+        self.assertEqual(cached_screen(*args, compute=compute), [{'symbol': 'MSFT'}])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(cached_screen(*args, compute=compute, reload=True), [{'symbol': 'MSFT'}])
+        self.assertEqual(len(calls), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import threading
+import time
+import unittest
+
+from app.data.singleflight import SingleFlight
+from tests.fakes import FakeRedis, NoRedis
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_callers_share_one_fetch(self):
+        flight = SingleFlight(client=NoRedis())
+        calls = []
+        started = threading.Event()
+
+        def fetch(symbols):
+            calls.append(sorted(symbols))
+            started.set()
+            time.sleep(0.2)
+            return {symbol: {"symbol": symbol} for symbol in symbols}
+
+        results = [None, None]
+
+        def leader():
+            results[0] = flight.run(["AAA", "BBB"], "1y", "1d", fetch)
+
+        def follower():
+            started.wait(1)
+            results[1] = flight.run(["BBB", "CCC"], "1y", "1d", fetch)
+
+        threads = [threading.Thread(target=leader), threading.Thread(target=follower)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+
+        self.assertEqual(calls, [["AAA", "BBB"], ["CCC"]])
+        self.assertEqual(sorted(results[0]), ["AAA", "BBB"])
+        self.assertEqual(sorted(results[1]), ["BBB", "CCC"])
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+    def test_other_resolutions_are_not_coalesced(self):
+        flight = SingleFlight(client=NoRedis())
+        calls = []
+        fetch = lambda symbols: calls.append(list(symbols)) or {s: {"s": s} for s in symbols}
+        flight.run(["AAA"], "1y", "1d", fetch)
+        flight.run(["AAA"], "1d", "1m", fetch)
+        self.assertEqual(calls, [["AAA"], ["AAA"]])
+
+    def test_failed_fetch_releases_followers(self):
+        flight = SingleFlight(client=NoRedis())
+
+        def fetch(symbols):
+            raise RuntimeError("provider down")
+
+        self.assertEqual(flight.run(["AAA"], "1y", "1d", fetch), {})
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+    def test_waits_for_the_process_holding_the_lock(self):
+        redis = FakeRedis()
+        flight = SingleFlight(client=redis, poll=0.01, wait=2)
+        redis.store["singleflight:AAA:1y:1d"] = "someone-else"
+        cache = {}
+
+        def other_process():
+            time.sleep(0.1)
+            cache["AAA"] = {"symbol": "AAA", "from": "other"}
+            del redis.store["singleflight:AAA:1y:1d"]
+
+        threading.Thread(target=other_process).start()
+        calls = []
+        result = flight.run(
+            ["AAA", "BBB"], "1y", "1d",
+            fetch=lambda symbols: calls.append(list(symbols)) or {s: {"symbol": s} for s in symbols},
+            load_cached=lambda symbols, since: {s: cache[s] for s in symbols if s in cache},
+        )
+
+        self.assertEqual(calls, [["BBB"]])
+        self.assertEqual(result["AAA"]["from"], "other")
+        self.assertEqual(redis.store, {})
+
+    def test_leader_renews_its_lock_while_fetching(self):
+        redis = FakeRedis()
+        flight = SingleFlight(client=redis, lock_ms=30)
+
+        def slow_fetch(symbols):
+            time.sleep(0.1)
+            self.assertIn("singleflight:AAA:1y:1d", redis.store)
+            return {s: {"symbol": s} for s in symbols}
+
+        self.assertEqual(flight.run(["AAA"], "1y", "1d", fetch=slow_fetch), {"AAA": {"symbol": "AAA"}})
+        self.assertGreaterEqual(redis.renewed.count("singleflight:AAA:1y:1d"), 2)
+        self.assertEqual(redis.store, {})
+
+    def test_followers_read_the_cache_once_the_lock_is_gone(self):
+        redis = FakeRedis()
+        flight = SingleFlight(client=redis, poll=0.01, max_poll=0.02, wait=2)
+        redis.store["singleflight:AAA:1y:1d"] = "someone-else"
+        cache = {}
+        reads = []
+
+        def other_process():
+            time.sleep(0.2)
+            cache["AAA"] = {"symbol": "AAA"}
+            del redis.store["singleflight:AAA:1y:1d"]
+
+        threading.Thread(target=other_process).start()
+        result = flight.run(["AAA"], "1y", "1d", fetch=lambda symbols: self.fail("fetched"),
+                            load_cached=lambda symbols, since: reads.append(list(symbols)) or {s: cache[s] for s in symbols if s in cache})
+        self.assertEqual(result, {"AAA": {"symbol": "AAA"}})
+        self.assertEqual(reads, [["AAA"]])
+
+    def test_takes_over_when_the_lock_disappears_without_a_result(self):
+        redis = FakeRedis()
+        flight = SingleFlight(client=redis, poll=0.01, wait=2)
+        redis.store["singleflight:AAA:1y:1d"] = "crashed"
+        threading.Timer(0.05, redis.store.clear).start()
+
+        result = flight.run(["AAA"], "1y", "1d",
+                            fetch=lambda symbols: {s: {"symbol": s} for s in symbols},
+                            load_cached=lambda symbols, since: {})
+        self.assertEqual(result, {"AAA": {"symbol": "AAA"}})
+        self.assertEqual(flight.stats()["took_over"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import time
+import unittest
+from unittest import mock
+import pandas as pd
+
+from app.data import yfinance_fetcher
+from app.data.redis_cache import freshness_state, CACHE_POLICIES, FRESH, STALE, EXPIRED
+
+
+def _entry(symbol, age, historical="bars"):
+    fetched = time.time() - age
+    return {"historical": historical, "info": {"symbol": symbol}, "fetched_at": {"bars": fetched, "info": fetched, "financials": fetched}}
+
+
+class TestFreshnessState(unittest.TestCase):
+
+    def test_windows(self):
+        policy = CACHE_POLICIES["bars"]
+        now = 1_000_000.0
+        self.assertEqual(freshness_state("bars", now - 1, now), FRESH)
+        self.assertEqual(freshness_state("bars", now - policy["fresh"], now), STALE)
+        self.assertEqual(freshness_state("bars", now - policy["stale"], now), EXPIRED)
+        self.assertIsNone(freshness_state("bars", None, now))
+
+
+class TestStaleWhileRevalidate(unittest.TestCase):
+
+    def setUp(self):
+        day = 86400
+        self.redis = {
+            "FRESH": _entry("FRESH", 60),
+            "STALE": _entry("STALE", 1.5 * day),
+            "OLD": _entry("OLD", 10 * day),
+            "GONE": _entry("GONE", 10 * day),
+        }
+        self.submitted = []
+        self.fetched = []
+
+        def fake_fetch(symbols, period, interval, save_to_db):
+            self.fetched.append(list(symbols))
+            return {symbol: {"symbol": symbol, "fresh": True} for symbol in symbols if symbol != "GONE"}
+
+        patches = [
+            mock.patch.object(yfinance_fetcher, "get_stock_data_many", side_effect=lambda symbols, *args: {s: dict(self.redis[s]) for s in symbols if s in self.redis}),
+            mock.patch.object(yfinance_fetcher, "claim_revalidation", side_effect=lambda symbols, *args, **kwargs: list(symbols)),
+            mock.patch.object(yfinance_fetcher.refresh_service, "submit", side_effect=lambda symbols, *args: self.submitted.extend(symbols)),
+            mock.patch.object(yfinance_fetcher, "_fetch_coalesced", side_effect=fake_fetch),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_fresh_served_stale_revalidated_expired_refetched(self):
+        result = yfinance_fetcher.fetch_yfinance_data(["FRESH", "STALE", "OLD", "NEW"])
+
+        self.assertEqual(result["FRESH"]["historical"], "bars")
+        self.assertEqual(result["STALE"]["historical"], "bars")
+        self.assertTrue(result["OLD"]["fresh"])
+        self.assertTrue(result["NEW"]["fresh"])
+        self.assertEqual(self.submitted, ["STALE"])
+        self.assertEqual(self.fetched, [["OLD", "NEW"]])
+
+    def test_expired_copy_is_served_when_the_refetch_fails(self):
+        result = yfinance_fetcher.fetch_yfinance_data(["GONE"])
+        self.assertEqual(result["GONE"]["historical"], "bars")
+        self.assertEqual(self.submitted, [])
+
+    def test_fresh_db_rows_cause_no_refresh(self):
+        year = pd.DataFrame({"Close": 1.0}, index=pd.bdate_range("2023-01-02", "2024-01-05"))
+        db = {"DBFRESH": _entry("DBFRESH", 60, year), "DBSTALE": _entry("DBSTALE", 2 * 86400, year)}
+        with mock.patch.object(yfinance_fetcher, "set_stock_data_many") as promote:
+            result = yfinance_fetcher.fetch_yfinance_data(
+                ["DBFRESH", "DBSTALE"], load_many_from_db=lambda symbols: {s: db[s] for s in symbols})
+
+        self.assertEqual(sorted(result), ["DBFRESH", "DBSTALE"])
+        self.assertEqual(self.submitted, ["DBSTALE"])
+        self.assertEqual(sorted(promote.call_args.args[0]), ["DBFRESH", "DBSTALE"])
+        self.assertEqual(self.fetched, [])
+
+    def test_db_rows_shorter_than_the_period_are_refetched(self):
+        month = pd.DataFrame({"Close": 1.0}, index=pd.bdate_range("2023-12-01", "2024-01-05"))
+        db = {"SHORT": _entry("SHORT", 60, month)}
+        with mock.patch.object(yfinance_fetcher, "set_stock_data_many"):
+            result = yfinance_fetcher.fetch_yfinance_data(["SHORT"], load_many_from_db=lambda symbols: db)
+            self.assertTrue(result["SHORT"]["fresh"])
+            self.assertEqual(self.fetched, [["SHORT"]])
+
+            # a month of daily bars is plenty for a 5 day request
+            self.fetched.clear()
+            result = yfinance_fetcher.fetch_yfinance_data(["SHORT"], period="5d", load_many_from_db=lambda symbols: db)
+            self.assertEqual(len(result["SHORT"]["historical"]), 5)
+            self.assertEqual(self.fetched, [])
+
+    def test_stale_longer_series_is_revalidated_whole(self):
+        self.redis["LONG"] = dict(_entry("LONG", 1.5 * 86400), cached_period="5y")
+        with mock.patch.object(yfinance_fetcher.refresh_service, "submit") as submit:
+            yfinance_fetcher.fetch_yfinance_data(["LONG"], period="1y")
+        submit.assert_called_once_with(["LONG"], "5y", "1d", mock.ANY)
+
+    def test_intraday_requests_skip_the_database(self):
+        load_many = mock.MagicMock(return_value={})
+        yfinance_fetcher.fetch_yfinance_data(["NEW"], period="1d", interval="1m", load_many_from_db=load_many)
+        load_many.assert_not_called()
+        self.assertEqual(self.fetched, [["NEW"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
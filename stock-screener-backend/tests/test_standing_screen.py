@@ -0,0 +1,156 @@
+import json
+import unittest
+from unittest import mock
+
+from flask import Flask
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api import routes, watchlist_routes
+from app.database.models import Base, User, Watchlist
+from app.screener.standing import StandingScreen
+from app.services.watchlist_monitor import StandingWatchlists, criteria_to_dict
+
+
+def _stock(name, price, market_cap, sector='Technology'):
+    return {'info': {'shortName': name, 'sector': sector, 'currentPrice': price, 'marketCap': market_cap}}
+
+
+class TestStandingScreen(unittest.TestCase):
+
+    def setUp(self):
+        self.stock_data = {
+            'AAA': _stock('Alpha', 120.0, 3e9),
+            'BBB': _stock('Beta', 80.0, 2e9),
+            'CCC': _stock('Gamma', 150.0, 1e9, sector='Energy'),
+        }
+        self.screen = StandingScreen({'price': ('>', 100), 'sector': 'Technology'})
+
+    def test_full_evaluation(self):
+        results = self.screen.evaluate(self.stock_data)
+        self.assertEqual([r['symbol'] for r in results], ['AAA'])
+        self.assertEqual(self.screen.outcomes['CCC'], {'price': True, 'sector': False})
+
+    def test_live_prices_override_snapshot(self):
+        results = self.screen.evaluate(self.stock_data, prices={'AAA': 90.0, 'BBB': 101.0})
+        self.assertEqual([r['symbol'] for r in results], ['BBB'])
+
+    def test_price_update_emits_deltas(self):
+        self.screen.evaluate(self.stock_data)
+        delta = self.screen.update_prices({'AAA': 95.0, 'BBB': 105.0, 'CCC': 10.0})
+        self.assertEqual([r['symbol'] for r in delta['entered']], ['BBB'])
+        self.assertEqual([r['symbol'] for r in delta['exited']], ['AAA'])
+        self.assertEqual(delta['entered'][0]['price'], 105.0)
+        self.assertEqual([r['symbol'] for r in self.screen.results()], ['BBB'])
+
+    def test_unchanged_and_unknown_prices_are_ignored(self):
+        self.screen.evaluate(self.stock_data)
+        delta = self.screen.update_prices({'AAA': 120.0, 'ZZZ': 500.0})
+        self.assertEqual(delta, {'entered': [], 'exited': []})
+        self.assertNotIn('ZZZ', self.screen.outcomes)
+
+    def test_non_price_predicates_are_not_reevaluated(self):
+        self.screen.evaluate(self.stock_data)
+        self.screen.criteria['sector'] = 'Energy'  # would flip outcomes if re-checked
+        self.screen.update_prices({'AAA': 130.0})
+        self.assertTrue(self.screen.outcomes['AAA']['sector'])
+
+
+class TestStandingWatchlists(unittest.TestCase):
+
+    def setUp(self):
+        self.loads = 0
+        self.watchlists = StandingWatchlists(history=2)
+        self.criteria = criteria_to_dict([
+            {'field': 'price', 'operator': '>', 'value': '100'},
+            {'field': 'sector', 'operator': '=', 'value': 'Technology'},
+        ])
+
+    def load(self):
+        self.loads += 1
+        return {
+            'AAA': _stock('Alpha', 120.0, 3e9),
+            'BBB': _stock('Beta', 80.0, 2e9),
+        }
+
+    def test_screens_are_built_once_per_criteria(self):
+        screen = self.watchlists.watch(1, self.criteria, 'sp500', self.load)
+        self.assertIs(self.watchlists.watch(1, dict(self.criteria), 'sp500', self.load), screen)
+        self.assertEqual(self.loads, 1)
+
+        self.watchlists.watch(1, {'price': ('>', 50.0)}, 'sp500', self.load)
+        self.watchlists.watch(1, {'price': ('>', 50.0)}, 'dow30', self.load)
+        self.assertEqual(self.loads, 3)
+
+        # fundamentals older than max_age are reloaded
+        self.watchlists.max_age = 0
+        self.watchlists.watch(1, {'price': ('>', 50.0)}, 'dow30', self.load)
+        self.assertEqual(self.loads, 4)
+
+        self.assertIsNone(self.watchlists.watch(1, {}, 'sp500', self.load))
+        self.assertEqual(self.watchlists.snapshot(1), {'matches': [], 'changes': []})
+
+    def test_price_cycles_record_entries_and_exits(self):
+        self.watchlists.watch(7, self.criteria, 'sp500', self.load)
+        self.watchlists.on_prices({'AAA': 121.0})
+        self.watchlists.on_prices({'AAA': 90.0, 'BBB': 110.0})
+        self.watchlists.on_prices({'BBB': 105.0})
+
+        snapshot = self.watchlists.snapshot(7)
+        self.assertEqual([r['symbol'] for r in snapshot['matches']], ['BBB'])
+        self.assertEqual(len(snapshot['changes']), 1)
+        change = snapshot['changes'][0]
+        self.assertEqual([r['symbol'] for r in change['entered']], ['BBB'])
+        self.assertEqual([r['symbol'] for r in change['exited']], ['AAA'])
+        self.assertIn('at', change)
+
+        # only the last `history` changes are kept
+        for price in (90.0, 110.0, 90.0):
+            self.watchlists.on_prices({'BBB': price})
+        changes = self.watchlists.snapshot(7)['changes']
+        self.assertEqual([[r['symbol'] for r in c['exited']] for c in changes], [[], ['BBB']])
+
+        self.watchlists.forget(7)
+        self.watchlists.on_prices({'BBB': 200.0})
+        self.assertEqual(self.watchlists.snapshot(7), {'matches': [], 'changes': []})
+
+
+class TestWatchlistChangesRoute(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        sessions = sessionmaker(bind=engine)
+        with sessions() as session:
+            session.add(User(id=1, username='ann', email='ann@example.com'))
+            session.add(Watchlist(id=3, user_id=1, name='cheap tech', criteria=json.dumps({
+                'index': 'dow30',
+                'fundamental_criteria': [{'field': 'price', 'operator': '>', 'value': '100'}],
+            })))
+            session.commit()
+
+        self.screener = mock.Mock()
+        self.screener.load_data.return_value = {'AAA': _stock('Alpha', 120.0, 3e9), 'BBB': _stock('Beta', 80.0, 2e9)}
+        for patcher in (mock.patch.object(watchlist_routes, 'SessionLocal', sessions),
+                        mock.patch.object(watchlist_routes, 'standing_watchlists', StandingWatchlists()),
+                        mock.patch.object(watchlist_routes, 'get_stock_symbols', return_value=['AAA', 'BBB']),
+                        mock.patch.object(watchlist_routes, 'StockScreener', return_value=self.screener)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        app = Flask(__name__)
+        routes.register_routes(app)
+        self.client = app.test_client()
+
+    def test_changes_load_outside_the_shared_screener(self):
+        shared = routes.screener.stock_data
+        response = self.client.get('/api/watchlists/3/changes')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['symbol'] for r in response.get_json()['stocks']], ['AAA'])
+        self.assertEqual(response.get_json()['index'], 'dow30')
+        self.assertIs(routes.screener.stock_data, shared)
+        self.assertEqual(self.client.get('/api/watchlists/4/changes').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import threading
+import unittest
+from unittest import mock
+
+from app.data import warmup
+from app.data.warmup import CacheWarmer
+
+
+INDEXES = {'dow30': ['AAPL', 'MSFT', 'JPM'], 'nasdaq100': ['AAPL', 'MSFT', 'NVDA', 'BAD1', 'BAD2']}
+
+
+class TestCacheWarmer(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(warmup, 'get_stock_symbols', side_effect=lambda index: list(INDEXES[index]))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = []
+
+    def _load(self, symbols, period, interval):
+        self.calls.append((sorted(symbols), period, interval))
+        if 'BAD1' in symbols:
+            raise ConnectionError("provider down")
+        return {symbol: {'info': {}} for symbol in symbols if symbol != 'NVDA'}
+
+    def test_symbols_are_loaded_once_across_indexes(self):
+        warmer = CacheWarmer(indexes=['dow30', 'nasdaq100'], chunk_size=2, workers=2)
+        self.assertTrue(warmer.ready)
+
+        reports = []
+        progress = warmer.run(self._load, report=reports.append)
+
+        loaded = sorted(symbol for symbols, _, _ in self.calls for symbol in symbols)
+        self.assertEqual(loaded, ['AAPL', 'BAD1', 'BAD2', 'JPM', 'MSFT', 'NVDA'])
+        self.assertEqual(self.calls[0][1:], ('1y', '1d'))
+        self.assertEqual(len(reports), 3)
+
+        self.assertEqual(progress['state'], 'done')
+        self.assertTrue(progress['ready'])
+        self.assertEqual(progress['indexes'], {'dow30': 3, 'nasdaq100': 5})
+        self.assertEqual(progress['total'], 6)
+        self.assertEqual(progress['done'], 6)
+        self.assertEqual(progress['failed'], 2)
+        self.assertEqual(progress['loaded'] + progress['missing'] + progress['failed'], 6)
+        self.assertEqual(progress['percent'], 100.0)
+
+    def test_not_ready_while_warming_in_the_background(self):
+        release = threading.Event()
+
+        def slow_load(symbols, period, interval):
+            release.wait(5)
+            return {symbol: {} for symbol in symbols}
+
+        warmer = CacheWarmer(indexes=['dow30'], max_wait=60)
+        thread = warmer.start(slow_load)
+        self.assertIs(warmer.start(slow_load), thread)
+        self.assertFalse(warmer.ready)
+        self.assertEqual(warmer.progress()['state'], 'warming')
+
+        release.set()
+        thread.join(5)
+        self.assertTrue(warmer.ready)
+        self.assertEqual(warmer.progress()['loaded'], 3)
+
+    def test_ready_after_max_wait(self):
+        release = threading.Event()
+
+        def slow_load(symbols, period, interval):
+            release.wait(5)
+            return {}
+
+        warmer = CacheWarmer(indexes=['dow30'], max_wait=0)
+        thread = warmer.start(slow_load)
+        self.assertTrue(warmer.ready)
+        release.set()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(warmer.progress()['state'], 'done')
+
+    def test_failed_symbol_lists_still_finish(self):
+        warmer = CacheWarmer(indexes=['unknown'])
+        progress = warmer.run(self._load)
+        self.assertEqual(progress['state'], 'failed')
+        self.assertTrue(progress['ready'])
+
+    def test_only_the_serving_process_warms_up(self):
+        for env, enabled in (({}, False),
+                             ({'WARMUP_ON_START': '1'}, True),
+                             ({'WARMUP_ON_START': '1', 'WARMUP_RELOADER': '1'}, False),
+                             ({'WARMUP_ON_START': '1', 'WARMUP_RELOADER': '1', 'WERKZEUG_RUN_MAIN': 'true'}, True)):
+            with mock.patch.dict('os.environ', env, clear=True):
+                self.assertEqual(warmup.warmup_enabled(), enabled, env)
+
+
+if __name__ == "__main__":
+    unittest.main()